@@ -1,51 +1,157 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, g, Response
+import hmac
 import os
-import random
 from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import select, tuple_, event
+import numpy as np
+from models import db, User, Transaction, UserStats, FairSeed
+from money import STARTING_BALANCE, InvalidBet, to_units, to_stake, from_units, payout
+from wallet import settle_bet, place_bet, refund_bet, settle_open_bet, settle_batch, set_write_behind
+from ledger import TransactionLog
+from gamestate import create_store
+import games
+from games import plinko, dice, mines, crash, pump, limbo, roulette, blackjack, blackjack_ev
+from games.blackjack import CARDS
+import fair
+from stats import rebuild_stats, user_stats
+from migrations import migrate_amounts_to_units
+from leaderboard import Leaderboard
+from auth import user_cache, login_required, load_user, REMEMBER_COOKIE, make_remember_token, remembered_user_id
+from passwords import PasswordHasher, HasherBusy, DEFAULT_METHOD
+import events
+import metrics
+from metrics import span
+from crash_rounds import CrashRounds, CHANNEL as CRASH_CHANNEL
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///casino.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
+# Hosted Postgres URLs use the postgres:// scheme, which SQLAlchemy 2 rejects;
+# name the driver too (psycopg2, from requirements.txt), as newer SQLAlchemy
+# releases default to psycopg 3
+for scheme in ('postgres://', 'postgresql://'):
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith(scheme):
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql+psycopg2://' + app.config['SQLALCHEMY_DATABASE_URI'][len(scheme):]
 
-# Models
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(200), nullable=False)
-    balance = db.Column(db.Float, default=1000.0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-    
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+# Engine and connection pool. Under the gevent worker (gunicorn.conf.py) every
+# greenlet of the process shares the pool; requests hold a connection only
+# while they run and streams release theirs before streaming, so the pool
+# bounds concurrent queries, not connected clients. Requests beyond it wait up
+# to pool_timeout. Keep workers x (pool_size + max_overflow) under the
+# database's connection limit (tight on free-tier Postgres).
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'query_cache_size': int(os.environ.get('DB_QUERY_CACHE_SIZE', 1000))
+}
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    })
 
-class Transaction(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    game = db.Column(db.String(50), nullable=False)
-    bet_amount = db.Column(db.Float, nullable=False)
-    win_amount = db.Column(db.Float, nullable=False)
-    multiplier = db.Column(db.Float, default=0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+db.init_app(app)
+user_cache.ttl = float(os.environ.get('USER_CACHE_TTL', 5))
+game_states = create_store(app.config)
+leaderboard = Leaderboard(
+    app,
+    interval=int(os.environ.get('LEADERBOARD_INTERVAL', 30)),
+    ttl=int(os.environ.get('LEADERBOARD_TTL', 120)),
+    size=int(os.environ.get('LEADERBOARD_SIZE', 10))
+)
+transaction_log = None
+if os.environ.get('TRANSACTION_LOG') == 'write-behind':
+    transaction_log = TransactionLog(
+        app,
+        interval=float(os.environ.get('TRANSACTION_LOG_INTERVAL', 0.2)),
+        max_rows=int(os.environ.get('TRANSACTION_LOG_BATCH', 1000)),
+        spill_path=os.environ.get('TRANSACTION_LOG_SPILL', 'transactions.spill.jsonl')
+    )
+    set_write_behind(transaction_log)
+crash_rounds = CrashRounds(
+    app,
+    events.bus,
+    betting_time=float(os.environ.get('CRASH_BETTING_TIME', 6)),
+    cooldown=float(os.environ.get('CRASH_COOLDOWN', 3))
+)
+password_hasher = PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+)
+REMEMBER_SECONDS = int(os.environ.get('REMEMBER_DAYS', 30)) * 86400
+# Server-Sent Events (/api/stream, live crash). Off, the pages poll instead;
+# gunicorn.conf.py turns it off for sync workers, which a stream would pin,
+# and for several workers, which would each run their own crash rounds
+app.config['STREAMING'] = os.environ.get('STREAMING', '1') == '1'
+metrics.registry.enabled = os.environ.get('METRICS', '1') == '1'
+metrics.registry.init_app(app)
+profiler = metrics.SamplingProfiler(interval=float(os.environ.get('PROFILER_INTERVAL', 0.005)))
+if os.environ.get('PROFILER') == '1':
+    profiler.start()
+
+def set_sqlite_pragmas(connection, record):
+    # WAL lets readers run alongside the writer, and with WAL synchronous=NORMAL
+    # only syncs at checkpoints instead of on every commit
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
 
-# Create tables
+# Create tables (and indexes added to tables that already exist)
 with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
+    metrics.registry.instrument_engine(db.engine)
+    
     db.create_all()
+    # Euro floats from before money.py -> integer cents
+    migrate_amounts_to_units()
+    for index in Transaction.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    
+    # Rows a previous run could not write before shutting down
+    if transaction_log:
+        transaction_log.load_spill()
+    
+    # Backfill stats the first time they are enabled on an existing ledger
+    if db.session.query(Transaction.id).first() and not db.session.query(UserStats.user_id).first():
+        rebuild_stats()
 
-# Helper function to get authenticated user
-def get_current_user():
-    if 'user_id' not in session:
-        return None
-    return User.query.get(session['user_id'])
+# Live crash stakes a previous run took and never settled
+crash_rounds.refund_open_bets()
+
+# Solve the blackjack hints of every opening hand now rather than on the
+# first requests (about a second)
+if os.environ.get('BLACKJACK_HINT_WARMUP', '1') == '1':
+    blackjack_ev.warm_up()
 
 # Routes
+@app.errorhandler(InvalidBet)
+def invalid_bet(error):
+    # Every route reads its stakes with to_stake
+    return jsonify({'error': f'Invalid bet: {error}'}), 400
+
+@app.before_request
+def remembered_login():
+    # A remember-me cookie stands in for the password when the session is gone
+    if 'user_id' not in session and REMEMBER_COOKIE in request.cookies:
+        user_id = remembered_user_id(request.cookies[REMEMBER_COOKIE])
+        user = load_user(user_id) if user_id is not None else None
+        if user is not None:
+            session['user_id'] = user.id
+            session['username'] = user.username
+
+def hasher_busy():
+    response = jsonify({'success': False, 'message': 'Server busy, try again'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.route('/')
 def home():
     return render_template('home.html')
@@ -54,7 +160,7 @@ def home():
 def index():
     if 'user_id' not in session:
         return redirect(url_for('login'))
-    return render_template('index.html')
+    return render_template('index.html', streaming=app.config['STREAMING'])
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -62,10 +168,31 @@ def login():
         data = request.json
         user = User.query.filter_by(username=data['username']).first()
         
-        if user and user.check_password(data['password']):
+        try:
+            with span('hash'):
+                valid = user is not None and password_hasher.verify(user.password_hash, data['password'])
+                # Hashes made with older parameters are upgraded while the
+                # password is at hand
+                if valid and password_hasher.needs_rehash(user.password_hash):
+                    user.password_hash = password_hasher.hash(data['password'])
+                    db.session.commit()
+        except HasherBusy:
+            return hasher_busy()
+        
+        if valid:
             session['user_id'] = user.id
             session['username'] = user.username
-            return jsonify({'success': True, 'balance': user.balance, 'redirect': '/casino'})
+            response = jsonify({'success': True, 'balance': from_units(user.balance), 'redirect': '/casino'})
+            if data.get('remember'):
+                response.set_cookie(
+                    REMEMBER_COOKIE,
+                    make_remember_token(user.id, user.password_hash, REMEMBER_SECONDS),
+                    max_age=REMEMBER_SECONDS,
+                    httponly=True,
+                    secure=request.is_secure,
+                    samesite='Lax'
+                )
+            return response
         
         return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
     
@@ -78,9 +205,14 @@ def register():
     if User.query.filter_by(username=data['username']).first():
         return jsonify({'success': False, 'message': 'Username already exists'}), 400
     
-    user = User(username=data['username'])
-    user.set_password(data['password'])
-    user.balance = 1000.0
+    try:
+        with span('hash'):
+            password_hash = password_hasher.hash(data['password'])
+    except HasherBusy:
+        return hasher_busy()
+    
+    user = User(username=data['username'], password_hash=password_hash)
+    user.balance = STARTING_BALANCE
     
     db.session.add(user)
     db.session.commit()
@@ -88,734 +220,897 @@ def register():
     session['user_id'] = user.id
     session['username'] = user.username
     
-    return jsonify({'success': True, 'balance': user.balance, 'redirect': '/casino'})
+    return jsonify({'success': True, 'balance': from_units(user.balance), 'redirect': '/casino'})
 
 @app.route('/logout')
 def logout():
     session.clear()
-    return redirect(url_for('login'))
+    response = redirect(url_for('login'))
+    response.delete_cookie(REMEMBER_COOKIE)
+    return response
 
 @app.route('/api/balance')
+@login_required
 def get_balance():
-    if 'user_id' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(session['user_id'])
-    if not user:
-        session.clear()
-        return jsonify({'error': 'User not found'}), 401
-    
-    return jsonify({'balance': user.balance})
+    return jsonify({'balance': from_units(g.user.balance)})
+
+@app.route('/api/stream')
+@login_required
+def stream_events():
+    # Live balance and history: starts with the current balance, then one
+    # event per settlement (see wallet._apply). The generator needs neither
+    # the request nor the database, so both are released once this returns.
+    if not app.config['STREAMING']:
+        return jsonify({'error': 'Streaming is disabled'}), 404
+    balance = db.session.scalar(select(User.balance).where(User.id == g.user.id))
+    initial = [('balance', {'balance': from_units(balance), 'delta': 0})]
+    response = Response(events.stream(events.bus, g.user.id, initial), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+
+def encode_history_cursor(created_at, transaction_id):
+    return f'{created_at.isoformat()}_{transaction_id}'
+
+def decode_history_cursor(cursor):
+    created_at, transaction_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(transaction_id)
 
 @app.route('/api/history')
+@login_required
 def get_history():
-    if 'user_id' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
+    limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), HISTORY_MAX_PAGE_SIZE)
+    
+    # Keyset pagination on (created_at, id), served by ix_transaction_user_created.
+    # Plain column rows, no ORM objects.
+    query = select(
+        Transaction.id,
+        Transaction.game,
+        Transaction.bet_amount,
+        Transaction.win_amount,
+        Transaction.multiplier,
+        Transaction.created_at
+    ).where(Transaction.user_id == g.user.id)
+    
+    if request.args.get('game'):
+        query = query.where(Transaction.game == request.args['game'])
+    
+    if request.args.get('cursor'):
+        try:
+            cursor = decode_history_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.where(tuple_(Transaction.created_at, Transaction.id) < cursor)
+    
+    query = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit + 1)
+    rows = db.session.execute(query).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id)
     
-    user = User.query.get(session['user_id'])
-    if not user:
-        session.clear()
-        return jsonify({'error': 'User not found'}), 401
+    return jsonify({
+        'transactions': [{
+            'game': game,
+            'bet': from_units(bet),
+            'win': from_units(win),
+            'multiplier': multiplier,
+            'profit': from_units(win - bet),
+            'time': created_at.isoformat()
+        } for _, game, bet, win, multiplier, created_at in rows],
+        'nextCursor': next_cursor
+    })
+
+@app.route('/api/stats')
+@login_required
+def get_stats():
+    return jsonify(user_stats(g.user.id))
+
+@app.route('/api/leaderboard')
+def get_leaderboard():
+    return jsonify(leaderboard.get())
+
+# Instrumentation (see metrics.py); set METRICS_TOKEN to require
+# "Authorization: Bearer <token>"
+def metrics_authorized():
+    token = os.environ.get('METRICS_TOKEN')
+    return not token or hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+@app.route('/metrics')
+def get_metrics():
+    if not metrics_authorized():
+        return jsonify({'error': 'Not authorized'}), 401
+    return Response(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/metrics/profile', methods=['GET', 'POST'])
+def metrics_profile():
+    if not metrics_authorized():
+        return jsonify({'error': 'Not authorized'}), 401
     
-    transactions = Transaction.query.filter_by(user_id=session['user_id'])\
-        .order_by(Transaction.created_at.desc()).limit(50).all()
+    # POST {"enabled": true|false} starts or stops sampling; GET returns the
+    # folded stacks sampled so far (?reset=1 clears them)
+    if request.method == 'POST':
+        try:
+            if (request.get_json(silent=True) or {}).get('enabled', True):
+                profiler.start()
+            else:
+                profiler.stop()
+        except ValueError as e:
+            # signal handlers can only be set from the main thread
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'running': profiler.running, 'samples': sum(profiler.samples.values())})
+    
+    return Response(profiler.folded(reset=request.args.get('reset') == '1'), mimetype='text/plain')
+
+# Provably fair
+@app.route('/api/fair')
+@login_required
+def get_fair_seed():
+    return jsonify(fair.seed_info(g.user.id))
+
+@app.route('/api/fair/rotate', methods=['POST'])
+@login_required
+def rotate_fair_seed():
+    # Revealing the seed mid-game would reveal the mines / deck / pop point
+    for game in ('mines', 'pump', 'blackjack'):
+        if game_states.get(g.user.id, game) is not None:
+            return jsonify({'error': 'Finish your current game first'}), 400
+    # The rest of the blackjack shoe would be revealed too: the next round
+    # shuffles a new one with the new seed
+    game_states.delete(g.user.id, 'blackjack_shoe')
+    
+    data = request.json or {}
+    return jsonify(fair.rotate_seed(g.user.id, data.get('clientSeed')))
+
+@app.route('/api/fair/verify', methods=['POST'])
+@login_required
+def verify_fair():
+    data = request.json
     
-    return jsonify([{
-        'game': t.game,
-        'bet': t.bet_amount,
-        'win': t.win_amount,
-        'multiplier': t.multiplier,
-        'profit': t.win_amount - t.bet_amount,
-        'time': t.created_at.isoformat()
-    } for t in transactions])
+    try:
+        outcomes = fair.verify(
+            data['game'],
+            data['serverSeed'],
+            data['clientSeed'],
+            int(data['nonce']),
+            int(data.get('count', 1)),
+            *data.get('args', [])
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'serverSeedHash': fair.hash_seed(data['serverSeed']),
+        'outcomes': outcomes
+    })
 
 # Game: Plinko
+def plinko_args(data):
+    # Checked here, for the single-bet and the batch route alike
+    try:
+        args = (data.get('risk', 'medium'), int(data.get('rows', plinko.MAX_ROWS)))
+    except TypeError:
+        raise ValueError(f"invalid rows {data.get('rows')!r}")
+    plinko.multipliers(*args)
+    return args
+
+@app.route('/api/plinko/table')
+def get_plinko_table():
+    return jsonify(plinko.TABLE)
+
 @app.route('/api/play/plinko', methods=['POST'])
+@login_required
 def play_plinko():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
-    bet_amount = float(data['bet'])
-    risk_level = data.get('risk', 'medium')
-    
-    if user.balance < bet_amount:
+    bet_amount = to_stake(data['bet'])
+    try:
+        args = plinko_args(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with span('rng'):
+        rng = fair.next_rng(g.user.id)
+    with span('game', game='plinko'):
+        outcome = games.play('plinko', *args, rng=rng)
+    multiplier = outcome['multiplier']
+    win_amount = payout(bet_amount, multiplier)
+    
+    balance = settle_bet(g.user.id, 'plinko', bet_amount, win_amount, multiplier)
+    if balance is None:
         return jsonify({'error': 'Insufficient balance'}), 400
     
-    # Plinko multipliers based on risk
-    multipliers = {
-        'low': [0.5, 0.7, 0.9, 1.0, 1.1, 1.3, 1.5, 1.3, 1.1, 1.0, 0.9, 0.7, 0.5],
-        'medium': [0.3, 0.5, 0.7, 1.0, 1.5, 2.0, 3.0, 2.0, 1.5, 1.0, 0.7, 0.5, 0.3],
-        'high': [0.2, 0.3, 0.5, 1.0, 2.0, 5.0, 10.0, 5.0, 2.0, 1.0, 0.5, 0.3, 0.2]
-    }
-    
-    # Simulate ball path (16 rows)
-    path = []
-    position = 8
-    for row in range(16):
-        direction = random.choice([-1, 1])
-        position = max(0, min(12, position + direction))
-        path.append(position)
-    
-    final_position = path[-1]
-    multiplier = multipliers[risk_level][final_position]
-    win_amount = bet_amount * multiplier
-    
-    user.balance -= bet_amount
-    user.balance += win_amount
-    
-    transaction = Transaction(
-        user_id=user.id,
-        game='plinko',
-        bet_amount=bet_amount,
-        win_amount=win_amount,
-        multiplier=multiplier
-    )
-    
-    db.session.add(transaction)
-    db.session.commit()
-    
+    # The path as a bitfield: bit i set when the ball went right at row i
     return jsonify({
-        'path': path,
+        'path': outcome['path'],
+        'rows': args[1],
+        'slot': outcome['slot'],
         'multiplier': multiplier,
-        'win': win_amount,
-        'balance': user.balance
+        'win': from_units(win_amount),
+        'balance': from_units(balance),
+        'nonce': rng.nonce
     })
 
 # Game: Crash
+@app.route('/api/crash/path/<float:crash_point>')
+def get_crash_path(crash_point):
+    # Full curve for audits; the game itself only ships the schedule
+    return jsonify(crash.crash_path(min(crash_point, crash.CRASH_CAP)))
+
 @app.route('/api/play/crash', methods=['POST'])
+@login_required
 def play_crash():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
-    bet_amount = float(data['bet'])
+    bet_amount = to_stake(data['bet'])
     cashout_multiplier = float(data.get('autoCashout', 2.0))
     
-    if user.balance < bet_amount:
-        return jsonify({'error': 'Insufficient balance'}), 400
+    if not cashout_multiplier >= crash.MIN_CASHOUT:
+        return jsonify({'error': 'Invalid bet'}), 400
     
-    # Generate crash point (weighted towards lower values)
-    crash_point = round(1.0 / (1.0 - random.random() ** 2), 2)
-    crash_point = min(crash_point, 100.0)
-    
-    # Generate crash path
-    path = []
-    current = 1.0
-    step = 0.01
-    while current < crash_point:
-        path.append(round(current, 2))
-        current += step
-        if current > 2.0:
-            step = 0.05
-        if current > 5.0:
-            step = 0.1
-    
-    path.append(crash_point)
-    
-    # Determine if player wins
-    if cashout_multiplier <= crash_point:
-        multiplier = cashout_multiplier
-        win_amount = bet_amount * multiplier
-        won = True
-    else:
-        multiplier = 0
-        win_amount = 0
-        won = False
-    
-    user.balance -= bet_amount
-    user.balance += win_amount
-    
-    transaction = Transaction(
-        user_id=user.id,
-        game='crash',
-        bet_amount=bet_amount,
-        win_amount=win_amount,
-        multiplier=multiplier
-    )
+    with span('rng'):
+        rng = fair.next_rng(g.user.id)
+    with span('game', game='crash'):
+        outcome = crash.play(cashout_multiplier, rng)
+    multiplier = outcome['multiplier']
+    win_amount = payout(bet_amount, multiplier)
     
-    db.session.add(transaction)
-    db.session.commit()
+    balance = settle_bet(g.user.id, 'crash', bet_amount, win_amount, multiplier)
+    if balance is None:
+        return jsonify({'error': 'Insufficient balance'}), 400
     
     return jsonify({
-        'crashPoint': crash_point,
-        'path': path,
-        'won': won,
+        'crashPoint': outcome['crashPoint'],
+        'curve': crash.crash_curve(),
+        'won': outcome['won'],
         'multiplier': multiplier,
-        'win': win_amount,
-        'balance': user.balance
+        'win': from_units(win_amount),
+        'balance': from_units(balance),
+        'nonce': rng.nonce
     })
 
+# Live crash: shared rounds (see crash_rounds.py)
+@app.route('/api/crash/live/stream')
+@login_required
+def crash_live_stream():
+    if not app.config['STREAMING']:
+        return jsonify({'error': 'Streaming is disabled'}), 404
+    crash_rounds.start()
+    initial = [('round', crash_rounds.snapshot())]
+    response = Response(events.stream(events.bus, CRASH_CHANNEL, initial), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/crash/live/bet', methods=['POST'])
+@login_required
+def crash_live_bet():
+    # Rounds live in one process, like the stream (see crash_rounds.py)
+    if not app.config['STREAMING']:
+        return jsonify({'error': 'Live crash is disabled'}), 404
+    data = request.json
+    bet_amount = to_stake(data['bet'])
+    auto_cashout = float(data['autoCashout']) if data.get('autoCashout') else None
+    
+    if auto_cashout is not None and not auto_cashout >= crash.MIN_CASHOUT:
+        return jsonify({'error': 'Invalid bet'}), 400
+    
+    try:
+        round_id, balance = crash_rounds.bet(g.user.id, g.user.username, bet_amount, auto_cashout)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'round': round_id, 'balance': from_units(balance)})
+
+@app.route('/api/crash/live/cashout', methods=['POST'])
+@login_required
+def crash_live_cashout():
+    if not app.config['STREAMING']:
+        return jsonify({'error': 'Live crash is disabled'}), 404
+    try:
+        multiplier, win_amount = crash_rounds.cashout(g.user.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Credited when the round settles (balance arrives on /api/stream)
+    return jsonify({'multiplier': multiplier, 'win': from_units(win_amount)})
+
 # Game: Dice
+def dice_args(data):
+    # Checked here, for the single-bet and the batch route alike
+    try:
+        target = float(data['target'])
+    except TypeError:
+        raise ValueError(f"invalid target {data.get('target')!r}")
+    over = data.get('over', True)
+    if not dice.MIN_CHANCE <= dice.win_chance(target, over) <= dice.MAX_CHANCE:
+        raise ValueError(f'win chance must be between {dice.MIN_CHANCE}% and {dice.MAX_CHANCE}%')
+    return target, over
+
 @app.route('/api/play/dice', methods=['POST'])
+@login_required
 def play_dice():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
-    bet_amount = float(data['bet'])
-    target = float(data['target'])
-    over = data.get('over', True)
-    
-    if user.balance < bet_amount:
+    bet_amount = to_stake(data['bet'])
+    try:
+        args = dice_args(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with span('rng'):
+        rng = fair.next_rng(g.user.id)
+    with span('game', game='dice'):
+        outcome = games.play('dice', *args, rng=rng)
+    multiplier = outcome['multiplier']
+    win_amount = payout(bet_amount, multiplier)
+    
+    balance = settle_bet(g.user.id, 'dice', bet_amount, win_amount, multiplier)
+    if balance is None:
         return jsonify({'error': 'Insufficient balance'}), 400
     
-    # Roll dice (0-100)
-    roll = round(random.uniform(0, 100), 2)
-    
-    # Calculate win chance and multiplier
-    if over:
-        win_chance = 100 - target
-        won = roll > target
-    else:
-        win_chance = target
-        won = roll < target
-    
-    multiplier = (98.0 / win_chance) if win_chance > 0 else 0
-    
-    if won:
-        win_amount = bet_amount * multiplier
-    else:
-        win_amount = 0
-        multiplier = 0
-    
-    user.balance -= bet_amount
-    user.balance += win_amount
-    
-    transaction = Transaction(
-        user_id=user.id,
-        game='dice',
-        bet_amount=bet_amount,
-        win_amount=win_amount,
-        multiplier=multiplier
-    )
-    
-    db.session.add(transaction)
-    db.session.commit()
-    
     return jsonify({
-        'roll': roll,
-        'won': won,
+        'roll': outcome['roll'],
+        'won': outcome['won'],
         'multiplier': round(multiplier, 2),
-        'win': win_amount,
-        'balance': user.balance,
-        'winChance': round(win_chance, 2)
+        'win': from_units(win_amount),
+        'balance': from_units(balance),
+        'winChance': round(outcome['winChance'], 2),
+        'nonce': rng.nonce
     })
 
 # Game: Mines
 @app.route('/api/play/mines', methods=['POST'])
+@login_required
 def play_mines():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
     action = data['action']
     
     if action == 'start':
-        bet_amount = float(data['bet'])
+        bet_amount = to_stake(data['bet'])
         num_mines = int(data.get('mines', 3))
         
-        if user.balance < bet_amount:
-            return jsonify({'error': 'Insufficient balance'}), 400
-        
-        # Generate mine positions (5x5 grid)
-        all_positions = list(range(25))
-        mine_positions = random.sample(all_positions, num_mines)
+        if not 1 <= num_mines < mines.GRID_SIZE:
+            return jsonify({'error': 'Invalid number of mines'}), 400
         
-        session['mines_game'] = {
-            'bet': bet_amount,
-            'mines': mine_positions,
-            'revealed': [],
-            'num_mines': num_mines
-        }
+        with span('rng'):
+            rng = fair.next_rng(g.user.id)
+        balance = place_bet(g.user.id, bet_amount)
+        if balance is None:
+            return jsonify({'error': 'Insufficient balance'}), 400
         
-        user.balance -= bet_amount
-        db.session.commit()
+        with span('game', game='mines'):
+            game = mines.start(bet_amount, num_mines, rng)
+        if not game_states.add(g.user.id, 'mines', game):
+            refund_bet(g.user.id, bet_amount)
+            return jsonify({'error': 'Finish your current game first'}), 400
         
-        return jsonify({'success': True, 'balance': user.balance})
+        return jsonify({'success': True, 'balance': from_units(balance), 'nonce': rng.nonce})
     
     elif action == 'reveal':
-        if 'mines_game' not in session:
+        game = game_states.get(g.user.id, 'mines')
+        if game is None:
             return jsonify({'error': 'No active game'}), 400
         
         position = int(data['position'])
-        game = session['mines_game']
+        
+        if not 0 <= position < mines.GRID_SIZE:
+            return jsonify({'error': 'Invalid position'}), 400
         
         if position in game['revealed']:
             return jsonify({'error': 'Already revealed'}), 400
         
-        game['revealed'].append(position)
+        with span('game', game='mines'):
+            result = mines.reveal(game, position)
         
-        if position in game['mines']:
+        # Only if the game is still the one read above: a cashout since then
+        # has settled it, and it must not be settled again or written back
+        if result['hit']:
             # Hit a mine - game over
-            user = get_current_user()
-            if not user:
-                return jsonify({'error': 'Not authenticated'}), 401
-            
-            transaction = Transaction(
-                user_id=user.id,
-                game='mines',
-                bet_amount=game['bet'],
-                win_amount=0,
-                multiplier=0
-            )
-            
-            db.session.add(transaction)
-            db.session.commit()
-            
-            del session['mines_game']
-            
-            return jsonify({
-                'hit': True,
-                'gameOver': True,
-                'mines': game['mines'],
-                'balance': user.balance
-            })
-        else:
-            # Safe tile
-            gems_found = len(game['revealed'])
-            total_safe = 25 - game['num_mines']
+            if not game_states.delete(g.user.id, 'mines', game):
+                return jsonify({'error': 'No active game'}), 400
+            balance = settle_open_bet(g.user.id, 'mines', game['bet'], 0, 0)
             
-            # Calculate current multiplier
-            multiplier = 1.0
-            for i in range(gems_found):
-                multiplier *= (25 - game['num_mines'] - i) / (25 - i)
-            
-            multiplier = round(1.0 / (multiplier * 0.97), 2)
-            
-            session['mines_game'] = game
-            
-            return jsonify({
-                'hit': False,
-                'multiplier': multiplier,
-                'gemsFound': gems_found
-            })
+            result.update({'gameOver': True, 'mines': game['mines'], 'balance': from_units(balance)})
+        elif not game_states.update(g.user.id, 'mines', game):
+            return jsonify({'error': 'No active game'}), 400
+        
+        return jsonify(result)
     
     elif action == 'cashout':
-        if 'mines_game' not in session:
+        game = game_states.take(g.user.id, 'mines')
+        if game is None:
             return jsonify({'error': 'No active game'}), 400
         
-        user = get_current_user()
-        if not user:
-            return jsonify({'error': 'Not authenticated'}), 401
+        with span('game', game='mines'):
+            multiplier = mines.cashout(game)
+        win_amount = payout(game['bet'], multiplier)
         
-        game = session['mines_game']
-        gems_found = len(game['revealed'])
-        
-        # Calculate final multiplier
-        multiplier = 1.0
-        for i in range(gems_found):
-            multiplier *= (25 - game['num_mines'] - i) / (25 - i)
-        
-        multiplier = round(1.0 / (multiplier * 0.97), 2)
-        
-        win_amount = game['bet'] * multiplier
-        
-        user.balance += win_amount
-        
-        transaction = Transaction(
-            user_id=user.id,
-            game='mines',
-            bet_amount=game['bet'],
-            win_amount=win_amount,
-            multiplier=multiplier
-        )
-        
-        db.session.add(transaction)
-        db.session.commit()
-        
-        mines = game['mines']
-        del session['mines_game']
+        balance = settle_open_bet(g.user.id, 'mines', game['bet'], win_amount, multiplier)
         
         return jsonify({
-            'win': win_amount,
+            'win': from_units(win_amount),
             'multiplier': multiplier,
-            'mines': mines,
-            'balance': user.balance
+            'mines': game['mines'],
+            'balance': from_units(balance)
         })
 
+@app.route('/api/mines/table')
+def get_mines_table():
+    return jsonify({'houseEdge': mines.HOUSE_EDGE, 'multipliers': mines.MULTIPLIERS})
+
 # Game: Pump
 @app.route('/api/play/pump', methods=['POST'])
+@login_required
 def play_pump():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
     action = data['action']
     
     if action == 'start':
-        bet_amount = float(data['bet'])
+        bet_amount = to_stake(data['bet'])
         
-        if user.balance < bet_amount:
+        with span('rng'):
+            rng = fair.next_rng(g.user.id)
+        balance = place_bet(g.user.id, bet_amount)
+        if balance is None:
             return jsonify({'error': 'Insufficient balance'}), 400
         
-        # Generate random max multiplier (pop point)
-        max_mult = round(1.0 + random.expovariate(0.5), 2)
-        max_mult = min(max_mult, 50.0)
-        
-        session['pump_game'] = {
-            'bet': bet_amount,
-            'max_multiplier': max_mult
-        }
-        
-        user.balance -= bet_amount
-        db.session.commit()
+        with span('game', game='pump'):
+            game = pump.start(bet_amount, rng)
+        if not game_states.add(g.user.id, 'pump', game):
+            refund_bet(g.user.id, bet_amount)
+            return jsonify({'error': 'Finish your current game first'}), 400
         
+        # The pop point is only sent once the balloon has popped; the client
+        # inflates it at the server's rate and asks for its status
         return jsonify({
             'success': True,
-            'maxMultiplier': max_mult,
-            'balance': user.balance
+            'growth': pump.GROWTH,
+            'balance': from_units(balance),
+            'nonce': rng.nonce
         })
     
-    elif action == 'pop':
-        if 'pump_game' not in session:
+    elif action == 'status':
+        game = game_states.get(g.user.id, 'pump')
+        if game is None:
             return jsonify({'error': 'No active game'}), 400
         
-        game = session['pump_game']
+        if not pump.popped(game):
+            return jsonify({'popped': False, 'multiplier': pump.current_multiplier(game)})
         
-        transaction = Transaction(
-            user_id=user.id,
-            game='pump',
-            bet_amount=game['bet'],
-            win_amount=0,
-            multiplier=0
-        )
+        # Popped: settle the loss (once, whichever request gets there first)
+        if not game_states.delete(g.user.id, 'pump', game):
+            return jsonify({'error': 'No active game'}), 400
+        balance = settle_open_bet(g.user.id, 'pump', game['bet'], 0, 0)
         
-        db.session.add(transaction)
-        db.session.commit()
+        return jsonify({'popped': True, 'popPoint': game['max_multiplier'], 'balance': from_units(balance)})
+    
+    elif action == 'pop':
+        # The player gives up the game
+        game = game_states.take(g.user.id, 'pump')
+        if game is None:
+            return jsonify({'error': 'No active game'}), 400
         
-        del session['pump_game']
+        balance = settle_open_bet(g.user.id, 'pump', game['bet'], 0, 0)
         
-        return jsonify({'balance': user.balance})
+        return jsonify({'popPoint': game['max_multiplier'], 'balance': from_units(balance)})
     
     elif action == 'cashout':
-        if 'pump_game' not in session:
+        game = game_states.take(g.user.id, 'pump')
+        if game is None:
             return jsonify({'error': 'No active game'}), 400
         
-        game = session['pump_game']
-        multiplier = float(data['multiplier'])
-        win_amount = game['bet'] * multiplier
+        # Priced at the multiplier the balloon has reached now: nothing once
+        # it has popped
+        with span('game', game='pump'):
+            multiplier = pump.cashout(game, pump.current_multiplier(game))
+        win_amount = payout(game['bet'], multiplier)
         
-        user.balance += win_amount
-        
-        transaction = Transaction(
-            user_id=user.id,
-            game='pump',
-            bet_amount=game['bet'],
-            win_amount=win_amount,
-            multiplier=multiplier
-        )
-        
-        db.session.add(transaction)
-        db.session.commit()
-        
-        del session['pump_game']
+        balance = settle_open_bet(g.user.id, 'pump', game['bet'], win_amount, multiplier)
         
         return jsonify({
-            'win': win_amount,
+            'popped': multiplier == 0,
+            'popPoint': game['max_multiplier'],
+            'win': from_units(win_amount),
             'multiplier': multiplier,
-            'balance': user.balance
+            'balance': from_units(balance)
         })
 
 # Game: Limbo
+def limbo_args(data):
+    # Checked here, for the single-bet and the batch route alike
+    try:
+        target = float(data['target'])
+    except TypeError:
+        raise ValueError(f"invalid target {data.get('target')!r}")
+    if not target >= limbo.MIN_TARGET:
+        raise ValueError(f'target must be at least {limbo.MIN_TARGET}')
+    return (target,)
+
 @app.route('/api/play/limbo', methods=['POST'])
+@login_required
 def play_limbo():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
-    bet_amount = float(data['bet'])
-    target = float(data['target'])
-    
-    if user.balance < bet_amount:
+    bet_amount = to_stake(data['bet'])
+    try:
+        args = limbo_args(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with span('rng'):
+        rng = fair.next_rng(g.user.id)
+    with span('game', game='limbo'):
+        outcome = games.play('limbo', *args, rng=rng)
+    multiplier = outcome['multiplier']
+    win_amount = payout(bet_amount, multiplier)
+    
+    balance = settle_bet(g.user.id, 'limbo', bet_amount, win_amount, multiplier)
+    if balance is None:
         return jsonify({'error': 'Insufficient balance'}), 400
     
-    # Generate result with weighted probability (harder for high multipliers)
-    # Use exponential distribution for realistic casino odds
-    rand_value = random.random()
-    
-    # Transform to make high values rare
-    if rand_value < 0.5:
-        # 50% chance of 1-2x
-        result = round(1.0 + rand_value * 2, 2)
-    elif rand_value < 0.8:
-        # 30% chance of 2-5x
-        result = round(2.0 + (rand_value - 0.5) * 10, 2)
-    elif rand_value < 0.95:
-        # 15% chance of 5-20x
-        result = round(5.0 + (rand_value - 0.8) * 100, 2)
-    else:
-        # 5% chance of 20-100x
-        result = round(20.0 + (rand_value - 0.95) * 1600, 2)
-    
-    result = min(result, 100.0)  # Cap at 100x
-    
-    won = result >= target
-    
-    if won:
-        multiplier = target
-        win_amount = bet_amount * multiplier
-    else:
-        multiplier = 0
-        win_amount = 0
-    
-    user.balance -= bet_amount
-    user.balance += win_amount
-    
-    transaction = Transaction(
-        user_id=user.id,
-        game='limbo',
-        bet_amount=bet_amount,
-        win_amount=win_amount,
-        multiplier=multiplier
-    )
-    
-    db.session.add(transaction)
-    db.session.commit()
-    
     return jsonify({
-        'result': result,
-        'won': won,
+        'result': outcome['result'],
+        'won': outcome['won'],
         'multiplier': multiplier,
-        'win': win_amount,
-        'balance': user.balance
+        'win': from_units(win_amount),
+        'balance': from_units(balance),
+        'nonce': rng.nonce
     })
 
 # Game: Roulette
+def roulette_bet(data):
+    # (type, numbers) of a bet, on the spin route and the batch route alike:
+    # {type, numbers for inside bets}, or the betType of older clients
+    return data.get('type', data.get('betType')), tuple(data.get('numbers') or ())
+
+def roulette_args(data):
+    # Checked here, before the batch route reserves its nonces
+    args = roulette_bet(data)
+    roulette.compile_bet(*args)
+    return args
+
+# Most bets on one spin
+MAX_ROULETTE_BETS = 200
+
 @app.route('/api/play/roulette', methods=['POST'])
+@login_required
 def play_roulette():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
+    data = request.json
+    # A slip of bets (each a roulette_bet with its stake), or the single bet
+    # of older clients
+    bets = data['bets'] if 'bets' in data else [data]
+    if not isinstance(bets, list) or not 0 < len(bets) <= MAX_ROULETTE_BETS:
+        return jsonify({'error': f'Between 1 and {MAX_ROULETTE_BETS} bets per spin'}), 400
+    
+    try:
+        stakes = [to_stake(bet['bet']) for bet in bets]
+        slip = [roulette.compile_bet(*roulette_bet(bet)) for bet in bets]
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with span('rng'):
+        rng = fair.next_rng(g.user.id)
+    with span('game', game='roulette'):
+        number = roulette.spin(rng)
+        multipliers = roulette.resolve(slip, number)
+    
+    # The whole slip is one round in the ledger
+    win_amounts = [payout(stake, multiplier) for stake, multiplier in zip(stakes, multipliers)]
+    bet_amount = sum(stakes)
+    win_amount = sum(win_amounts)
+    multiplier = round(win_amount / bet_amount, 4)
+    
+    balance = settle_bet(g.user.id, 'roulette', bet_amount, win_amount, multiplier)
+    if balance is None:
+        return jsonify({'error': 'Insufficient balance'}), 400
+    
+    return jsonify({
+        'number': number,
+        'won': win_amount > 0,
+        'multiplier': multiplier,
+        'win': from_units(win_amount),
+        'bets': [{'multiplier': m, 'win': from_units(w)} for m, w in zip(multipliers, win_amounts)],
+        'balance': from_units(balance),
+        'nonce': rng.nonce
+    })
+
+# Batch betting for the instant games (auto-bet)
+MAX_BATCH_BETS = 1000
+
+# game -> (argument parser, outcome field returned per bet)
+BATCH_GAMES = {
+    'plinko': (plinko_args, 'slot'),
+    'dice': (dice_args, 'roll'),
+    'limbo': (limbo_args, 'result'),
+    'roulette': (roulette_args, 'number')
+}
+
+@app.route('/api/play/<game>/batch', methods=['POST'])
+@login_required
+def play_batch(game):
+    if game not in BATCH_GAMES:
+        return jsonify({'error': 'Batch betting not available for this game'}), 404
     
+    parse_args, outcome_key = BATCH_GAMES[game]
     data = request.json
-    bet_amount = float(data['bet'])
-    bet_type = data['betType']
     
-    if user.balance < bet_amount:
+    # Either an explicit list of bets (each overriding the shared fields) or
+    # the shared bet repeated `count` times, drawn in one vectorized call.
+    # Invalid bets are rejected before any nonce is used.
+    try:
+        if 'bets' in data:
+            if not isinstance(data['bets'], list) or not all(isinstance(b, dict) for b in data['bets']):
+                raise ValueError('bets must be a list of objects')
+            count = len(data['bets'])
+        else:
+            count = int(data.get('count', 1))
+        
+        if not 0 < count <= MAX_BATCH_BETS:
+            return jsonify({'error': f'Between 1 and {MAX_BATCH_BETS} bets per batch'}), 400
+        
+        if 'bets' in data:
+            bet_amounts = np.array([to_stake(b.get('bet', data.get('bet'))) for b in data['bets']], dtype=np.int64)
+            args = [parse_args({**data, **b}) for b in data['bets']]
+        else:
+            bet_amounts = np.full(count, to_stake(data['bet']), dtype=np.int64)
+            args = parse_args(data)
+        
+        stop_on_profit = to_units(data['stopOnProfit']) if data.get('stopOnProfit') is not None else None
+        stop_on_loss = to_units(data['stopOnLoss']) if data.get('stopOnLoss') is not None else None
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with span('rng'):
+        rng = fair.next_rng(g.user.id, count)
+    
+    try:
+        with span('game', game=game):
+            if 'bets' in data:
+                drawn = [games.draw(game, 1, *bet_args, rng=rng.round(i)) for i, bet_args in enumerate(args)]
+                outcomes = np.concatenate([d[outcome_key] for d in drawn])
+                multipliers = np.concatenate([d['multiplier'] for d in drawn])
+            else:
+                drawn = games.draw(game, count, *args, rng=rng)
+                outcomes = drawn[outcome_key]
+                multipliers = drawn['multiplier']
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Rounded per bet, exactly as a single bet would be
+    win_amounts = np.array([payout(b, m) for b, m in zip(bet_amounts.tolist(), multipliers.tolist())], dtype=np.int64)
+    profit = np.cumsum(win_amounts - bet_amounts)
+    
+    # Play the bets in order against the current balance until the next bet
+    # can no longer be covered or a stop rule triggers. The balance is read
+    # fresh: the cached one may lag behind bets settled by another worker.
+    played = count
+    stopped = None
+    
+    balance = db.session.scalar(select(User.balance).where(User.id == g.user.id))
+    available = balance + np.concatenate(([0], profit[:-1]))
+    short = bet_amounts > available
+    if short.any():
+        played = int(np.argmax(short))
+        stopped = 'balance'
+    
+    triggered = np.zeros(count, dtype=bool)
+    if stop_on_profit is not None:
+        triggered |= profit >= stop_on_profit
+    if stop_on_loss is not None:
+        triggered |= -profit >= stop_on_loss
+    if triggered.any():
+        first = int(np.argmax(triggered))
+        if first < played:
+            played = first + 1
+            stopped = 'profit' if profit[first] >= 0 else 'loss'
+    
+    if played == 0:
         return jsonify({'error': 'Insufficient balance'}), 400
     
-    # Roulette numbers
-    red_numbers = [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36]
-    black_numbers = [2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35]
-    
-    # Spin wheel
-    number = random.randint(0, 36)
-    
-    won = False
-    
-    if bet_type == 'red' and number in red_numbers:
-        won = True
-    elif bet_type == 'black' and number in black_numbers:
-        won = True
-    elif bet_type == 'even' and number > 0 and number % 2 == 0:
-        won = True
-    elif bet_type == 'odd' and number % 2 == 1:
-        won = True
-    elif bet_type == 'low' and 1 <= number <= 18:
-        won = True
-    elif bet_type == 'high' and 19 <= number <= 36:
-        won = True
-    
-    if won:
-        multiplier = 2.0
-        win_amount = bet_amount * multiplier
-    else:
-        multiplier = 0
-        win_amount = 0
-    
-    user.balance -= bet_amount
-    user.balance += win_amount
-    
-    transaction = Transaction(
-        user_id=user.id,
-        game='roulette',
-        bet_amount=bet_amount,
-        win_amount=win_amount,
-        multiplier=multiplier
-    )
-    
-    db.session.add(transaction)
-    db.session.commit()
+    rounds = list(zip(bet_amounts[:played].tolist(), win_amounts[:played].tolist(), multipliers[:played].tolist()))
+    balance = settle_batch(g.user.id, game, rounds)
+    if balance is None:
+        return jsonify({'error': 'Insufficient balance'}), 400
     
     return jsonify({
-        'number': number,
-        'won': won,
+        'count': played,
+        'outcomes': outcomes[:played].tolist(),
+        'multipliers': multipliers[:played].tolist(),
+        'wagered': from_units(int(bet_amounts[:played].sum())),
+        'won': from_units(int(win_amounts[:played].sum())),
+        'profit': from_units(int(profit[played - 1])),
+        'stopped': stopped,
+        'balance': from_units(balance),
+        'nonce': rng.nonce
+    })
+
+# Game: BlackJack (rules in games/blackjack.py)
+@lru_cache(maxsize=1024)
+def blackjack_shoe_cards(seed_id, nonce):
+    # Shoes are stored as the seed and nonce they were shuffled with; the
+    # cards are rebuilt once per process and kept while the shoe is played
+    seed = db.session.get(FairSeed, seed_id)
+    return tuple(blackjack.shuffle_shoe(fair.FairRandom(seed.server_seed, seed.client_seed, nonce)))
+
+def blackjack_view(game):
+    over = game['phase'] == 'done'
+    hand = blackjack.active_hand(game)
+    dealer = game['dealer']['cards']
+    if not over:
+        # The hole card stays on the server until the round is over
+        dealer = dealer[:1]
+    
+    return {
+        'playerHand': [CARDS[card] for card in hand['cards']],
+        'playerScore': blackjack.score(hand),
+        'hands': [{
+            'cards': [CARDS[card] for card in h['cards']],
+            'score': blackjack.score(h),
+            'soft': blackjack.is_soft(h),
+            'bet': from_units(h['bet']),
+            'doubled': h['doubled'],
+            'done': h['done']
+        } for h in game['hands']],
+        'activeHand': game['active'],
+        'dealerHand': [CARDS[card] for card in dealer],
+        'dealerScore': blackjack.score(game['dealer']) if over else blackjack.card_score(dealer[0]),
+        'insuranceOffered': game['phase'] == 'insurance',
+        'insurance': from_units(game['insurance']),
+        'canDouble': blackjack.can_double(game),
+        'canSplit': blackjack.can_split(game),
+        'shoe': {'nonce': game['shoe']['nonce'], 'position': game['shoe']['position']},
+        'gameOver': over
+    }
+
+def settle_blackjack(user_id, game):
+    """Credit a finished round, put its shoe back and return the response."""
+    outcomes, insurance_multiplier = blackjack.results(game)
+    bet_amount = sum(hand['bet'] for hand in game['hands']) + game['insurance']
+    win_amount = sum(payout(hand['bet'], multiplier) for hand, (_, multiplier) in zip(game['hands'], outcomes))
+    win_amount += payout(game['insurance'], insurance_multiplier)
+    multiplier = round(win_amount / bet_amount, 4) if bet_amount else 0
+    
+    balance = settle_open_bet(user_id, 'blackjack', bet_amount, win_amount, multiplier)
+    game_states.put(user_id, 'blackjack_shoe', dict(game['shoe'], in_round=False))
+    
+    result = blackjack_view(game)
+    for hand, (hand_result, _) in zip(result['hands'], outcomes):
+        hand['result'] = hand_result
+    result.update({
+        'result': 'win' if win_amount > bet_amount else 'lose' if win_amount < bet_amount else 'push',
+        'win': from_units(win_amount),
         'multiplier': multiplier,
-        'win': win_amount,
-        'balance': user.balance
+        'balance': from_units(balance)
     })
+    return result
+
+BLACKJACK_ACTIONS = {
+    'hit': blackjack.hit,
+    'stand': blackjack.stand,
+    'double': blackjack.double,
+    'split': blackjack.split
+}
 
-# Game: BlackJack
 @app.route('/api/play/blackjack', methods=['POST'])
+@login_required
 def play_blackjack():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     data = request.json
     action = data['action']
     
     if action == 'deal':
-        bet_amount = float(data['bet'])
+        bet_amount = to_stake(data['bet'])
+        if game_states.get(g.user.id, 'blackjack') is not None:
+            return jsonify({'error': 'Finish your current game first'}), 400
         
-        if user.balance < bet_amount:
+        with span('rng'):
+            rng = fair.next_rng(g.user.id)
+        balance = place_bet(g.user.id, bet_amount)
+        if balance is None:
             return jsonify({'error': 'Insufficient balance'}), 400
         
-        # Create deck
-        suits = ['♠', '♥', '♦', '♣']
-        ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-        deck = [f"{rank}{suit}" for suit in suits for rank in ranks]
-        random.shuffle(deck)
-        
-        # Deal cards
-        player_hand = [deck.pop(), deck.pop()]
-        dealer_hand = [deck.pop(), deck.pop()]
-        
-        session['blackjack_game'] = {
-            'bet': bet_amount,
-            'deck': deck,
-            'player_hand': player_hand,
-            'dealer_hand': dealer_hand
-        }
-        
-        user.balance -= bet_amount
-        db.session.commit()
-        
-        player_score = calculate_blackjack_score(player_hand)
-        dealer_score = calculate_blackjack_score([dealer_hand[0]])
+        # Deal from the user's shoe; at the cut card (or if the last round
+        # dealt from it was lost) shuffle a new one with this round's rng
+        shoe = game_states.get(g.user.id, 'blackjack_shoe')
+        if shoe is not None and not shoe['in_round']:
+            shoe['cards'] = blackjack_shoe_cards(shoe['seed'], shoe['nonce'])
+        if shoe is None or shoe['in_round'] or blackjack.needs_shuffle(shoe):
+            shoe = {'seed': rng.seed_id, 'nonce': rng.nonce, 'position': 0}
+            shoe['cards'] = blackjack_shoe_cards(rng.seed_id, rng.nonce)
         
-        return jsonify({
-            'playerHand': player_hand,
-            'dealerHand': dealer_hand,
-            'playerScore': player_score,
-            'dealerScore': dealer_score,
-            'balance': user.balance
-        })
-    
-    elif action == 'hit':
-        if 'blackjack_game' not in session:
-            return jsonify({'error': 'No active game'}), 400
-        
-        game = session['blackjack_game']
-        game['player_hand'].append(game['deck'].pop())
-        session['blackjack_game'] = game
-        
-        player_score = calculate_blackjack_score(game['player_hand'])
-        dealer_score = calculate_blackjack_score([game['dealer_hand'][0]])
-        
-        game_over = player_score > 21
-        
-        result_data = {
-            'playerHand': game['player_hand'],
-            'dealerHand': game['dealer_hand'],
-            'playerScore': player_score,
-            'dealerScore': dealer_score,
-            'gameOver': game_over
-        }
-        
-        if game_over:
-            # Player busts
-            transaction = Transaction(
-                user_id=user.id,
-                game='blackjack',
-                bet_amount=game['bet'],
-                win_amount=0,
-                multiplier=0
-            )
-            
-            db.session.add(transaction)
-            db.session.commit()
-            
-            del session['blackjack_game']
-            
-            result_data['result'] = 'lose'
-            result_data['win'] = 0
-            result_data['balance'] = user.balance
-        
-        return jsonify(result_data)
-    
-    elif action == 'stand':
-        if 'blackjack_game' not in session:
-            return jsonify({'error': 'No active game'}), 400
+        with span('game', game='blackjack'):
+            game = blackjack.deal(bet_amount, shoe)
+        # A blackjack on either side ends the round at once; any other round
+        # is only played if no concurrent deal got its round in first
+        if game['phase'] != 'done' and not game_states.add(g.user.id, 'blackjack', game):
+            refund_bet(g.user.id, bet_amount)
+            return jsonify({'error': 'Finish your current game first'}), 400
+        game_states.put(g.user.id, 'blackjack_shoe', dict(shoe, in_round=True))
         
-        game = session['blackjack_game']
-        
-        # Dealer plays
-        while calculate_blackjack_score(game['dealer_hand']) < 17:
-            game['dealer_hand'].append(game['deck'].pop())
-        
-        player_score = calculate_blackjack_score(game['player_hand'])
-        dealer_score = calculate_blackjack_score(game['dealer_hand'])
-        
-        # Determine winner
-        if dealer_score > 21:
-            result = 'win'
-            multiplier = 2.0
-        elif player_score > dealer_score:
-            result = 'win'
-            multiplier = 2.0
-        elif player_score < dealer_score:
-            result = 'lose'
-            multiplier = 0
+        if game['phase'] == 'done':
+            result = settle_blackjack(g.user.id, game)
         else:
-            result = 'push'
-            multiplier = 1.0
-        
-        win_amount = game['bet'] * multiplier
-        user.balance += win_amount
-        
-        transaction = Transaction(
-            user_id=user.id,
-            game='blackjack',
-            bet_amount=game['bet'],
-            win_amount=win_amount,
-            multiplier=multiplier
-        )
+            result = dict(blackjack_view(game), balance=from_units(balance))
+        result['nonce'] = rng.nonce
+        return jsonify(result)
+    
+    if action != 'insurance' and action not in BLACKJACK_ACTIONS:
+        return jsonify({'error': 'Unknown action'}), 400
+    
+    game = game_states.get(g.user.id, 'blackjack')
+    if game is None:
+        return jsonify({'error': 'No active game'}), 400
+    game['shoe']['cards'] = blackjack_shoe_cards(game['shoe']['seed'], game['shoe']['nonce'])
+    
+    balance = None
+    # Stakes taken by this request, given back if the round turns out to
+    # have changed under it
+    staked = 0
+    if game['phase'] == 'insurance':
+        # Playing on declines insurance
+        stake = 0
+        if action == 'insurance' and data.get('take'):
+            stake = game['hands'][0]['bet'] // 2
+            balance = place_bet(g.user.id, stake)
+            if balance is None:
+                return jsonify({'error': 'Insufficient balance'}), 400
+            staked += stake
+        blackjack.insurance(game, stake)
+    elif action == 'insurance':
+        return jsonify({'error': 'Insurance is not offered'}), 400
+    
+    if action in BLACKJACK_ACTIONS and game['phase'] == 'player':
+        if action == 'double' and not blackjack.can_double(game):
+            return jsonify({'error': 'Cannot double this hand'}), 400
+        if action == 'split' and not blackjack.can_split(game):
+            return jsonify({'error': 'Cannot split this hand'}), 400
+        if action in ('double', 'split'):
+            stake = blackjack.active_hand(game)['bet']
+            balance = place_bet(g.user.id, stake)
+            if balance is None:
+                if staked:
+                    refund_bet(g.user.id, staked)
+                return jsonify({'error': 'Insufficient balance'}), 400
+            staked += stake
         
-        db.session.add(transaction)
-        db.session.commit()
-        
-        del session['blackjack_game']
-        
-        return jsonify({
-            'playerHand': game['player_hand'],
-            'dealerHand': game['dealer_hand'],
-            'playerScore': player_score,
-            'dealerScore': dealer_score,
-            'result': result,
-            'win': win_amount,
-            'multiplier': multiplier,
-            'balance': user.balance,
-            'gameOver': True
-        })
-
-def calculate_blackjack_score(hand):
-    score = 0
-    aces = 0
-    
-    for card in hand:
-        rank = card[:-1]
-        if rank in ['J', 'Q', 'K']:
-            score += 10
-        elif rank == 'A':
-            aces += 1
-            score += 11
-        else:
-            score += int(rank)
-    
-    # Adjust for aces
-    while score > 21 and aces > 0:
-        score -= 10
-        aces -= 1
+        with span('game', game='blackjack'):
+            BLACKJACK_ACTIONS[action](game)
     
-    return score
+    # Only if the round is still the one read above: a concurrent request
+    # may have finished and settled it, or played on from it
+    if game['phase'] == 'done':
+        saved = game_states.delete(g.user.id, 'blackjack', game)
+    else:
+        saved = game_states.update(g.user.id, 'blackjack', game)
+    if not saved:
+        if staked:
+            refund_bet(g.user.id, staked)
+        return jsonify({'error': 'No active game'}), 400
+    
+    if game['phase'] == 'done':
+        return jsonify(settle_blackjack(g.user.id, game))
+    
+    result = blackjack_view(game)
+    if balance is not None:
+        result['balance'] = from_units(balance)
+    return jsonify(result)
+
+@app.route('/api/blackjack/hint')
+@login_required
+def get_blackjack_hint():
+    # EV per unit of the hand's bet (see games/blackjack_ev.py)
+    game = game_states.get(g.user.id, 'blackjack')
+    if game is None:
+        return jsonify({'error': 'No active game'}), 400
+    
+    hint = blackjack_ev.hint(game)
+    result = {
+        'action': hint['action'],
+        'ev': {action: round(ev, 4) for action, ev in hint['ev'].items()}
+    }
+    if 'insurance' in hint:
+        result['insurance'] = round(hint['insurance'], 4)
+    return jsonify(result)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=False)
@@ -0,0 +1,127 @@
+# Authenticated user lookup
+#
+# Every API call used to load the User row by primary key just to check the
+# session and read the balance. The logged-in user is now resolved once per
+# request (flask.g) and kept in a short-TTL per-process cache, so balance polls
+# and other read-only endpoints are served without touching the database.
+#
+# The wallet writes the new balance through to the cache after each commit.
+# Other workers see the change when their entry expires, so the cached balance
+# is for display only: spending is always guarded by the wallet's conditional
+# UPDATE, never by this value.
+#
+# Remember-me tokens let a returning user in without a password hash: a
+# signed "<user id>.<expiry>.<signature>" cookie. The HMAC covers the user's
+# current password hash, so changing the password revokes every token issued
+# before, and checking one costs a primary-key lookup instead of an scrypt.
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from flask import g, session, jsonify, current_app
+from sqlalchemy import select
+from models import db, User
+
+CachedUser = namedtuple('CachedUser', ['id', 'username', 'balance'])
+
+class UserCache:
+    """Per-process LRU of CachedUser snapshots with TTL expiry."""
+    
+    def __init__(self, max_entries=10000, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+    
+    def put(self, user):
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def set_balance(self, user_id, balance):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (entry[0]._replace(balance=balance), entry[1])
+    
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+user_cache = UserCache()
+
+def load_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        row = db.session.execute(
+            select(User.id, User.username, User.balance).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        user_cache.put(user)
+    return user
+
+REMEMBER_COOKIE = 'remember_token'
+
+def _remember_signature(user_id, expires, password_hash):
+    message = f'remember:{user_id}.{expires}.{password_hash}'
+    key = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(key, message.encode(), hashlib.sha256).hexdigest()
+
+def make_remember_token(user_id, password_hash, ttl):
+    expires = int(time.time() + ttl)
+    return f'{user_id}.{expires}.{_remember_signature(user_id, expires, password_hash)}'
+
+def remembered_user_id(token):
+    """The user a remember-me token was issued to, or None if it is malformed,
+    expired or no longer matches the user's password."""
+    try:
+        user_id, expires, signature = token.split('.')
+        user_id, expires = int(user_id), int(expires)
+    except (AttributeError, ValueError):
+        return None
+    if expires < time.time():
+        return None
+    password_hash = db.session.scalar(select(User.password_hash).where(User.id == user_id))
+    if password_hash is None:
+        return None
+    if not hmac.compare_digest(signature, _remember_signature(user_id, expires, password_hash)):
+        return None
+    return user_id
+
+def get_current_user():
+    if 'user_id' not in session:
+        return None
+    if 'user' not in g:
+        g.user = load_user(session['user_id'])
+    return g.user
+
+def login_required(view):
+    """Reject the request with 401 unless the session has a live user, who is
+    then available as flask.g.user."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Not authenticated'}), 401
+        if get_current_user() is None:
+            session.clear()
+            return jsonify({'error': 'User not found'}), 401
+        return view(*args, **kwargs)
+    return wrapped
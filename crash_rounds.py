@@ -0,0 +1,312 @@
+# Live crash rounds
+#
+# /api/play/crash draws a crash point per request. Live mode runs shared
+# rounds on a fixed cadence from a background thread instead:
+#
+#   betting  (betting_time s)  players bet through /api/crash/live/bet
+#   running                    the multiplier climbs with time
+#                              (crash.live_multiplier); players cash out
+#                              through /api/crash/live/cashout
+#   crashed  (cooldown s)      every bet of the round is settled in one commit
+#                              (wallet.settle_round)
+#
+# Each round draws one crash point and broadcasts each state change once on
+# the 'crash' channel of the event bus, which every /api/crash/live/stream
+# connection subscribes to. Joins and cashouts are batched into one 'players'
+# event per tick.
+#
+# Rounds are provably fair. The seed hash is published when betting opens and
+# the seed when the round crashes. The crash point is then
+# fair.verify('crash', seed, ROUND_CLIENT_SEED, round id, 1).
+#
+# Open bets are also kept in the CrashBet table. The row is written in the
+# commit that takes the stake and deleted in the commit that settles it. A
+# round that fails before settling has its stakes refunded. So do rounds a
+# previous process left unsettled, at startup (refund_open_bets).
+#
+# Like the event bus, rounds live in this process: run a single worker. The
+# live routes are only served with STREAMING on, which gunicorn.conf.py only
+# turns on for a single gevent worker.
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+import fair
+from games import crash
+from money import from_units, payout
+from models import db, CrashRound, CrashBet
+from wallet import place_bet, refund_bet, settle_round
+
+CHANNEL = 'crash'
+ROUND_CLIENT_SEED = 'crash'
+
+class CrashRounds:
+    def __init__(self, app, bus, betting_time=6, cooldown=3, tick=0.1):
+        self.app = app
+        self.bus = bus
+        self.betting_time = betting_time
+        self.cooldown = cooldown
+        self.tick = tick
+        self.round = None
+        self._updates = []
+        self._lock = threading.Lock()
+        self._thread = None
+        # Rounds created before this are another process's
+        self.created = datetime.utcnow()
+    
+    def start(self):
+        # Started lazily, like the leaderboard thread
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='crash-rounds', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            try:
+                self.play_round()
+            except Exception:
+                self.app.logger.exception('Crash round failed')
+                self._abandon_round()
+                time.sleep(self.cooldown)
+    
+    def _abandon_round(self):
+        # Close the failed round to new bets and cashouts, then give back the
+        # stakes it did not settle
+        with self._lock:
+            current, self.round = self.round, None
+            if current is None:
+                return
+            current['state'] = 'failed'
+        try:
+            self.refund_open_bets(current['id'])
+        except Exception:
+            self.app.logger.exception('Refunding crash round %s failed', current['id'])
+    
+    def play_round(self):
+        server_seed = fair.new_seed()
+        with self.app.app_context():
+            row = CrashRound(server_seed=server_seed, server_seed_hash=fair.hash_seed(server_seed))
+            db.session.add(row)
+            db.session.commit()
+            round_id = row.id
+            db.session.remove()
+        
+        crash_point = crash.draw_crash_point(fair.FairRandom(server_seed, ROUND_CLIENT_SEED, round_id))
+        
+        # Betting
+        with self._lock:
+            self.round = {
+                'id': round_id,
+                'state': 'betting',
+                'hash': fair.hash_seed(server_seed),
+                'seed': server_seed,
+                'crash_point': crash_point,
+                'betting_ends': time.monotonic() + self.betting_time,
+                'started': None,
+                'crash_at': None,
+                'players': {}
+            }
+            self._updates = []
+            current = self.round
+        self.bus.publish(CHANNEL, 'betting', self.snapshot())
+        
+        while time.monotonic() < current['betting_ends']:
+            time.sleep(self.tick)
+            self._flush()
+        
+        # Running
+        with self._lock:
+            current['state'] = 'running'
+            current['started'] = time.monotonic()
+            current['crash_at'] = current['started'] + crash.live_duration(crash_point)
+        self.bus.publish(CHANNEL, 'running', self.snapshot())
+        
+        while time.monotonic() < current['crash_at']:
+            time.sleep(min(self.tick, max(current['crash_at'] - time.monotonic(), 0)))
+            self._auto_cashouts(current)
+            self._flush()
+        
+        # Crashed: settle everyone at once
+        with self._lock:
+            current['state'] = 'crashed'
+            players = dict(current['players'])
+        self._flush()
+        
+        self._settle(round_id, crash_point, players)
+        
+        self.bus.publish(CHANNEL, 'crashed', {
+            'id': round_id,
+            'crashPoint': crash_point,
+            'serverSeed': server_seed,
+            'serverSeedHash': current['hash'],
+            'clientSeed': ROUND_CLIENT_SEED
+        })
+        time.sleep(self.cooldown)
+    
+    def _settle(self, round_id, crash_point, players):
+        bets = []
+        for user_id, player in players.items():
+            multiplier = player['cashout']
+            if multiplier is None and player['auto'] is not None and player['auto'] <= crash_point:
+                multiplier = player['auto']
+            multiplier = multiplier or 0
+            bets.append((user_id, player['bet'], payout(player['bet'], multiplier), multiplier))
+        
+        with self.app.app_context():
+            # Only the bets still open are settled, their rows going in
+            # settle_round's commit: a bet refunded meanwhile is not paid too
+            settled = _drop_open_bets(round_id, list(players))
+            bets = [bet for bet in bets if bet[0] in settled]
+            settle_round('crash', bets)
+            row = db.session.get(CrashRound, round_id)
+            row.crash_point = crash_point
+            row.players = len(bets)
+            row.crashed_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+    
+    def _auto_cashouts(self, current):
+        with self._lock:
+            multiplier = crash.live_multiplier(time.monotonic() - current['started'])
+            for player in current['players'].values():
+                if player['cashout'] is None and player['auto'] is not None and player['auto'] <= multiplier:
+                    player['cashout'] = player['auto']
+                    self._updates.append(_player_info(player))
+    
+    def _flush(self):
+        with self._lock:
+            updates, self._updates = self._updates, []
+        if updates:
+            self.bus.publish(CHANNEL, 'players', updates)
+    
+    def snapshot(self):
+        with self._lock:
+            current = self.round
+            if current is None:
+                return {'state': 'starting'}
+            
+            now = time.monotonic()
+            info = {
+                'id': current['id'],
+                'state': current['state'],
+                'serverSeedHash': current['hash'],
+                'growth': crash.LIVE_GROWTH,
+                'players': [_player_info(p) for p in current['players'].values()]
+            }
+            if current['state'] == 'betting':
+                info['bettingLeft'] = max(current['betting_ends'] - now, 0)
+            elif current['state'] == 'running':
+                info['elapsed'] = now - current['started']
+            return info
+    
+    def bet(self, user_id, username, bet_amount, auto_cashout=None):
+        """Join the round in its betting phase (bet_amount in cents); returns
+        (round id, balance).
+        
+        Raises ValueError if betting is closed, the user already joined or the
+        balance does not cover the bet.
+        """
+        self.start()
+        with self._lock:
+            current = self.round
+            if current is None or current['state'] != 'betting':
+                raise ValueError('Betting is closed')
+            if user_id in current['players']:
+                raise ValueError('Already in this round')
+        
+        try:
+            balance = place_bet(user_id, bet_amount, [CrashBet(round_id=current['id'], user_id=user_id, bet_amount=bet_amount)])
+        except IntegrityError:
+            # The same user's other request got its open bet in first
+            db.session.rollback()
+            raise ValueError('Already in this round')
+        if balance is None:
+            raise ValueError('Insufficient balance')
+        
+        with self._lock:
+            if current['state'] == 'betting' and user_id not in current['players']:
+                player = {'username': username, 'bet': bet_amount, 'auto': auto_cashout, 'cashout': None}
+                current['players'][user_id] = player
+                self._updates.append(_player_info(player))
+                return current['id'], balance
+        
+        # Betting closed (or the round failed) while the stake was being
+        # taken; the open bet goes in the refund's commit, unless the failed
+        # round's refund got to it first
+        if _drop_open_bet(current['id'], user_id):
+            refund_bet(user_id, bet_amount)
+        else:
+            db.session.rollback()
+        raise ValueError('Betting is closed')
+    
+    def cashout(self, user_id):
+        """Cash out at the current multiplier; the win is credited when the
+        round settles. Returns (multiplier, win)."""
+        now = time.monotonic()
+        with self._lock:
+            current = self.round
+            player = current['players'].get(user_id) if current else None
+            if player is None or current['state'] != 'running':
+                raise ValueError('No active bet')
+            if player['cashout'] is not None:
+                raise ValueError('Already cashed out')
+            if now >= current['crash_at']:
+                raise ValueError('Round crashed')
+            
+            multiplier = crash.live_multiplier(now - current['started'])
+            if player['auto'] is not None:
+                multiplier = min(multiplier, player['auto'])
+            player['cashout'] = multiplier
+            self._updates.append(_player_info(player))
+        
+        return multiplier, payout(player['bet'], multiplier)
+    
+    def refund_open_bets(self, round_id=None):
+        """Give back the stakes of open bets: those of `round_id`, or without
+        one those of every unsettled round created before this process.
+        Returns how many were refunded."""
+        with self.app.app_context():
+            query = select(CrashBet.round_id, CrashBet.user_id, CrashBet.bet_amount)
+            if round_id is not None:
+                query = query.where(CrashBet.round_id == round_id)
+            else:
+                query = query.join(CrashRound, CrashRound.id == CrashBet.round_id)\
+                    .where(CrashRound.crashed_at.is_(None), CrashRound.created_at < self.created)
+            open_bets = db.session.execute(query).all()
+            
+            refunded = 0
+            for bet_round, user_id, bet_amount in open_bets:
+                # Only if the row is still there, in the refund's commit
+                if _drop_open_bet(bet_round, user_id):
+                    refund_bet(user_id, bet_amount)
+                    refunded += 1
+                else:
+                    db.session.rollback()
+            db.session.remove()
+            return refunded
+
+def _drop_open_bet(round_id, user_id):
+    # Deleted without committing: the caller's wallet commit does
+    result = db.session.execute(
+        delete(CrashBet).where(CrashBet.round_id == round_id, CrashBet.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+def _drop_open_bets(round_id, user_ids):
+    # Deleted without committing, like _drop_open_bet; returns the users
+    # whose open bet was still there
+    if not user_ids:
+        return set()
+    if not db.engine.dialect.delete_returning:
+        return {user_id for user_id in user_ids if _drop_open_bet(round_id, user_id)}
+    return set(db.session.scalars(
+        delete(CrashBet).where(CrashBet.round_id == round_id, CrashBet.user_id.in_(user_ids))
+        .returning(CrashBet.user_id).execution_options(synchronize_session=False)
+    ))
+
+def _player_info(player):
+    return {'username': player['username'], 'bet': from_units(player['bet']), 'cashout': player['cashout']}
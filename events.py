@@ -0,0 +1,78 @@
+# Per-user event stream
+#
+# The wallet publishes the new balance and the logged rounds after each
+# commit; /api/stream subscribers for that user receive them as Server-Sent
+# Events, so the client no longer re-fetches /api/balance and /api/history
+# after every bet.
+#
+# The bus is in-process: a stream only sees the bets settled by the worker
+# serving it. Run a single (threaded or async) worker, or put a shared broker
+# behind publish() when scaling out. Under sync workers STREAMING is off and
+# the pages fetch the history instead (see gunicorn.conf.py).
+import json
+import queue
+import threading
+from collections import defaultdict
+
+class EventBus:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+    
+    def subscribe(self, user_id):
+        q = queue.Queue(self.max_queue)
+        with self._lock:
+            self._subscribers[user_id].add(q)
+        return q
+    
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[user_id]
+    
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if not subscribers:
+            return
+        
+        message = format_event(event, data)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop it, EventSource reconnects and resyncs
+                self.unsubscribe(user_id, q)
+                try:
+                    q.get_nowait()
+                    q.put_nowait(None)
+                except (queue.Empty, queue.Full):
+                    pass
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+def stream(bus, user_id, initial=(), heartbeat=15):
+    """Generate the SSE body for one connection until the client goes away."""
+    q = bus.subscribe(user_id)
+    try:
+        for event, data in initial:
+            yield format_event(event, data)
+        while True:
+            try:
+                message = q.get(timeout=heartbeat)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        bus.unsubscribe(user_id, q)
+
+bus = EventBus()
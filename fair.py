@@ -0,0 +1,274 @@
+# Provably-fair randomness
+#
+# Every random draw of a bet is derived from
+#     HMAC-SHA256(server_seed, f'{client_seed}:{nonce}:{block}')
+# where the server seed is committed to up front by publishing its SHA-256,
+# the client seed is chosen by the player and the nonce counts the player's
+# bets. Each digest yields eight floats in [0, 1) (four big-endian bytes
+# each) and `block` is bumped when a round needs more than eight. Once the
+# server seed is rotated and revealed, anyone can replay every bet made with
+# it, which is what verify() and the command line below do.
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import secrets
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+
+FLOATS_PER_DIGEST = 8
+MAX_VERIFY_ROUNDS = 10000
+# A shoe is 312 cards to shuffle and send, not one outcome
+MAX_VERIFY_SHOES = 100
+
+@lru_cache(maxsize=1024)
+def _keyed_mac(server_seed):
+    # Keying HMAC costs two extra compression rounds; keep the keyed context
+    # and copy it for every message
+    return hmac.new(server_seed.encode(), digestmod=hashlib.sha256)
+
+def hash_seed(server_seed):
+    return hashlib.sha256(server_seed.encode()).hexdigest()
+
+def new_seed():
+    return secrets.token_hex(32)
+
+class FairRandom:
+    """Seeded draws for `rounds` consecutive nonces.
+    
+    Implements the parts of numpy.random.Generator used by the games package
+    (random, uniform, integers with a leading `rounds` dimension) and, for a
+    single round, the parts of the random module used by the stateful games
+    (random, shuffle, sample, expovariate).
+    """
+    
+    def __init__(self, server_seed, client_seed, nonce, rounds=1, seed_id=None):
+        self.server_seed = server_seed
+        self.client_seed = client_seed
+        self.nonce = nonce
+        self.rounds = rounds
+        # FairSeed row the seeds come from, for state derived from this rng
+        # later on (the blackjack shoe)
+        self.seed_id = seed_id
+        self._mac = _keyed_mac(server_seed)
+        self._floats = np.empty((rounds, 0))
+        self._cursor = 0
+    
+    def round(self, i):
+        return FairRandom(self.server_seed, self.client_seed, self.nonce + i)
+    
+    def _block(self, block):
+        digests = []
+        for nonce in range(self.nonce, self.nonce + self.rounds):
+            mac = self._mac.copy()
+            mac.update(f'{self.client_seed}:{nonce}:{block}'.encode())
+            digests.append(mac.digest())
+        words = np.frombuffer(b''.join(digests), dtype='>u4').reshape(self.rounds, FLOATS_PER_DIGEST)
+        return words / 2.0 ** 32
+    
+    def floats(self, m):
+        """Next m floats of every round, shape (rounds, m)."""
+        end = self._cursor + m
+        while self._floats.shape[1] < end:
+            block = self._floats.shape[1] // FLOATS_PER_DIGEST
+            self._floats = np.hstack([self._floats, self._block(block)])
+        out = self._floats[:, self._cursor:end]
+        self._cursor = end
+        return out
+    
+    def _draw(self, size):
+        if size is None:
+            return float(self.floats(1)[0, 0])
+        shape = (size,) if isinstance(size, int) else tuple(size)
+        if shape[0] != self.rounds:
+            raise ValueError('leading dimension must equal the number of rounds')
+        return self.floats(math.prod(shape[1:])).reshape(shape)
+    
+    # numpy.random.Generator subset
+    
+    def random(self, size=None):
+        return self._draw(size)
+    
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return low + self._draw(size) * (high - low)
+    
+    def integers(self, low, high, size=None, dtype=np.int64):
+        values = low + np.floor(np.asarray(self._draw(size)) * (high - low))
+        return values.astype(dtype) if size is not None else int(values)
+    
+    # random module subset (single round)
+    
+    def shuffle(self, x):
+        # Fisher-Yates, one float per swap
+        floats = self.floats(max(len(x) - 1, 0))[0]
+        for k, i in enumerate(range(len(x) - 1, 0, -1)):
+            j = int(floats[k] * (i + 1))
+            x[i], x[j] = x[j], x[i]
+    
+    def sample(self, population, k):
+        # Partial Fisher-Yates over a copy
+        pool = list(population)
+        floats = self.floats(k)[0]
+        for i in range(k):
+            j = i + int(floats[i] * (len(pool) - i))
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+    
+    def expovariate(self, lambd):
+        return -math.log(1.0 - self.random()) / lambd
+
+# Replaying outcomes
+
+def _instant(game):
+    def replay(rng, count, *args):
+        import games
+        outcomes = games.draw(game, count, *args, rng=rng)
+        return {key: value.tolist() for key, value in outcomes.items()}
+    return replay
+
+def _crash(rng, count, *args):
+    from games import crash
+    return {'crashPoint': crash.crash_points(count, rng).tolist()}
+
+def _pump(rng, count, *args):
+    from games import pump
+    return {'popPoint': pump.pop_points(count, rng).tolist()}
+
+def _mines(rng, count, num_mines=3):
+    from games import mines
+    num_mines = int(num_mines)
+    if not 1 <= num_mines < mines.GRID_SIZE:
+        raise ValueError(f'mines must be between 1 and {mines.GRID_SIZE - 1}')
+    return {'mines': [mines.draw_mines(int(num_mines), rng.round(i)) for i in range(count)]}
+
+def _blackjack(rng, count, decks=None):
+    # The shoe shuffled at each nonce (a round only shuffles when the previous
+    # shoe reached its cut card; its response names the shoe's nonce)
+    from games import blackjack
+    if count > MAX_VERIFY_SHOES:
+        raise ValueError(f'count must be between 1 and {MAX_VERIFY_SHOES} for blackjack')
+    if decks is not None and decks != blackjack.DECKS:
+        raise ValueError(f'shoes have {blackjack.DECKS} decks')
+    return {'shoe': [
+        [blackjack.CARDS[card] for card in blackjack.shuffle_shoe(rng.round(i))]
+        for i in range(count)
+    ]}
+
+REPLAYS = {
+    'plinko': _instant('plinko'),
+    'dice': _instant('dice'),
+    'limbo': _instant('limbo'),
+    'roulette': _instant('roulette'),
+    'crash': _crash,
+    'mines': _mines,
+    'pump': _pump,
+    'blackjack': _blackjack
+}
+
+def verify(game, server_seed, client_seed, nonce, count, *args):
+    """Re-derive the outcomes of `count` bets starting at `nonce`."""
+    if not 0 < count <= MAX_VERIFY_ROUNDS:
+        raise ValueError(f'count must be between 1 and {MAX_VERIFY_ROUNDS}')
+    if game not in REPLAYS:
+        raise ValueError(f'unknown game {game!r}')
+    return REPLAYS[game](FairRandom(server_seed, client_seed, nonce, count), count, *args)
+
+# Seed storage (needs the Flask app's database)
+
+def _active_seed(user_id):
+    from models import db, FairSeed
+    seed = FairSeed.query.filter_by(user_id=user_id, active=True).first()
+    if seed is None:
+        server_seed = new_seed()
+        seed = FairSeed(
+            user_id=user_id,
+            server_seed=server_seed,
+            server_seed_hash=hash_seed(server_seed),
+            client_seed=secrets.token_hex(8),
+            nonce=0
+        )
+        db.session.add(seed)
+        db.session.commit()
+    return seed
+
+def next_rng(user_id, rounds=1):
+    """Reserve `rounds` nonces of the user's active seed and return their rng.
+    
+    The nonce bump is part of the caller's transaction: if the bet is rolled
+    back, its outcome was never shown, so reusing the nonce is harmless.
+    """
+    from sqlalchemy import update, select
+    from models import db, FairSeed
+    
+    seed_id = _active_seed(user_id).id
+    stmt = update(FairSeed).where(FairSeed.id == seed_id)\
+        .values(nonce=FairSeed.nonce + rounds)\
+        .execution_options(synchronize_session=False)
+    
+    if db.engine.dialect.update_returning:
+        row = db.session.execute(stmt.returning(FairSeed.server_seed, FairSeed.client_seed, FairSeed.nonce)).one()
+    else:
+        db.session.execute(stmt)
+        row = db.session.execute(
+            select(FairSeed.server_seed, FairSeed.client_seed, FairSeed.nonce).where(FairSeed.id == seed_id)
+        ).one()
+    
+    server_seed, client_seed, nonce = row
+    return FairRandom(server_seed, client_seed, nonce - rounds, rounds, seed_id)
+
+def seed_info(user_id):
+    seed = _active_seed(user_id)
+    return {
+        'serverSeedHash': seed.server_seed_hash,
+        'clientSeed': seed.client_seed,
+        'nonce': seed.nonce
+    }
+
+def rotate_seed(user_id, client_seed=None):
+    """Reveal the active server seed and commit to a new one."""
+    from models import db
+    
+    seed = _active_seed(user_id)
+    seed.active = False
+    seed.revealed_at = datetime.utcnow()
+    revealed = {
+        'serverSeed': seed.server_seed,
+        'serverSeedHash': seed.server_seed_hash,
+        'clientSeed': seed.client_seed,
+        'nonce': seed.nonce
+    }
+    db.session.commit()
+    
+    new = _active_seed(user_id)
+    if client_seed:
+        new.client_seed = client_seed[:64]
+        db.session.commit()
+    
+    return {'revealed': revealed, 'current': seed_info(user_id)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay provably-fair outcomes from a revealed seed.')
+    parser.add_argument('game', choices=sorted(REPLAYS))
+    parser.add_argument('server_seed')
+    parser.add_argument('client_seed')
+    parser.add_argument('nonce', type=int)
+    parser.add_argument('--count', type=int, default=1)
+    parser.add_argument('args', nargs='*', help='game parameters as JSON values, e.g. 50 true for dice')
+    options = parser.parse_intermixed_args()
+    
+    game_args = []
+    for arg in options.args:
+        try:
+            game_args.append(json.loads(arg))
+        except ValueError:
+            game_args.append(arg)
+    
+    print(json.dumps({
+        'serverSeedHash': hash_seed(options.server_seed),
+        'outcomes': verify(options.game, options.server_seed, options.client_seed, options.nonce, options.count, *game_args)
+    }))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# Game logic
+#
+# Each game module is pure: outcomes are functions of the game parameters and
+# an rng (a numpy Generator for simulations, fair.FairRandom for real bets),
+# with no Flask, session or database access. The instant games expose
+#     play(*params, rng)          one round as plain Python values (the
+#                                 per-request fast path, no arrays)
+#     play_many(k, *params, rng)  k rounds as a dict of NumPy arrays
+# which draw the same floats in the same order, so a bet played with play()
+# is reproduced exactly by play_many() when verifying a seed.
+import os
+import numpy as np
+from games import plinko, crash, dice, mines, pump, limbo, roulette, blackjack
+
+_rng = None
+_rng_pid = None
+
+def get_rng():
+    # One generator per process: workers forked from a preloaded master must
+    # not share a seed
+    global _rng, _rng_pid
+    if _rng is None or _rng_pid != os.getpid():
+        _rng = np.random.default_rng()
+        _rng_pid = os.getpid()
+    return _rng
+
+INSTANT_GAMES = {
+    'plinko': plinko,
+    'dice': dice,
+    'limbo': limbo,
+    'roulette': roulette
+}
+
+def draw(game, k, *args, rng=None):
+    """Draw k rounds of an instant game; returns a dict of per-round arrays."""
+    return INSTANT_GAMES[game].play_many(k, *args, rng=rng or get_rng())
+
+def play(game, *args, rng=None):
+    """Play a single round of an instant game."""
+    return INSTANT_GAMES[game].play(*args, rng=rng or get_rng())
@@ -0,0 +1,199 @@
+# Blackjack: multi-deck shoe, integer cards, incremental hand totals
+#
+# A card is an int 0..51 (suit = card // 13, rank = card % 13 with the ace at
+# 0 and the ten, jack, queen, king at 9..12), so CARDS[card] is its label and
+# a hand or a whole shoe packs into one byte per card. A hand keeps its hard
+# total (aces counted as 1) and its ace count as cards are added, so its score
+# and soft flag are O(1) however many cards it holds.
+#
+# Cards are dealt from a shoe of DECKS decks that is shuffled once and played
+# down to the cut card (PENETRATION of the shoe), rather than from a fresh
+# deck per round. The shoe is a pure function of the rng it was shuffled with,
+# so callers only need to keep how it was shuffled and its position.
+#
+# Rules: the dealer stands on soft 17 and peeks for blackjack, which pays 3:2.
+# Double down on any first two cards; split pairs up to MAX_HANDS hands (split
+# aces get one card each, and 21 on a split hand is not a blackjack);
+# insurance is offered under an ace and pays 2:1.
+
+SUITS = ['♠', '♥', '♦', '♣']
+RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+CARDS = [f"{rank}{suit}" for suit in SUITS for rank in RANKS]
+
+# Hard value of each card, the ace counting 1
+CARD_VALUES = [min(card % 13 + 1, 10) for card in range(52)]
+
+DECKS = 6
+PENETRATION = 0.75
+MAX_HANDS = 4
+
+BLACKJACK_PAYS = 2.5
+INSURANCE_PAYS = 3.0
+
+# Shoe
+
+def shuffle_shoe(rng, decks=DECKS):
+    cards = list(range(52)) * decks
+    rng.shuffle(cards)
+    return cards
+
+def cut_card(size):
+    # At least a deck stays behind the cut card, so a round never runs out
+    return max(min(int(size * PENETRATION), size - 52), 0)
+
+def needs_shuffle(shoe):
+    return shoe['position'] >= cut_card(len(shoe['cards']))
+
+def draw(shoe):
+    card = shoe['cards'][shoe['position']]
+    shoe['position'] += 1
+    return card
+
+# Hands
+
+def new_hand(bet, cards=(), split=False):
+    hand = {'cards': [], 'hard': 0, 'aces': 0, 'bet': bet, 'split': split, 'doubled': False, 'done': False}
+    for card in cards:
+        add_card(hand, card)
+    return hand
+
+def add_card(hand, card):
+    value = CARD_VALUES[card]
+    hand['cards'].append(card)
+    hand['hard'] += value
+    hand['aces'] += value == 1
+
+def is_soft(hand):
+    # An ace can count 11 without busting
+    return hand['aces'] > 0 and hand['hard'] <= 11
+
+def score(hand):
+    return hand['hard'] + 10 if is_soft(hand) else hand['hard']
+
+def is_blackjack(hand):
+    return len(hand['cards']) == 2 and not hand['split'] and score(hand) == 21
+
+def card_score(card):
+    return 11 if CARD_VALUES[card] == 1 else CARD_VALUES[card]
+
+# Rounds
+#
+# A round is a dict: the shoe, the player's hands (the one being played is
+# `active`), the dealer's hand, the insurance stake and the phase:
+# 'insurance' (waiting for the insurance decision), 'player' or 'done'.
+
+def deal(bet, shoe):
+    player = new_hand(bet)
+    dealer = new_hand(0)
+    for hand in (player, dealer, player, dealer):
+        add_card(hand, draw(shoe))
+    
+    game = {'shoe': shoe, 'hands': [player], 'active': 0, 'dealer': dealer, 'insurance': 0, 'phase': 'player'}
+    if CARD_VALUES[dealer['cards'][0]] == 1 and not is_blackjack(player):
+        game['phase'] = 'insurance'
+    else:
+        _peek(game)
+    return game
+
+def insurance(game, stake):
+    """Take insurance for `stake` (half the bet), or decline with 0."""
+    game['insurance'] = stake
+    _peek(game)
+
+def _peek(game):
+    # The round ends at once on a dealer or player blackjack
+    if is_blackjack(game['dealer']) or is_blackjack(game['hands'][0]):
+        game['phase'] = 'done'
+    else:
+        game['phase'] = 'player'
+
+def active_hand(game):
+    return game['hands'][game['active']]
+
+def can_double(game):
+    hand = active_hand(game)
+    return game['phase'] == 'player' and len(hand['cards']) == 2 and not hand['done']
+
+def can_split(game):
+    hand = active_hand(game)
+    return (game['phase'] == 'player' and len(game['hands']) < MAX_HANDS and len(hand['cards']) == 2
+            and hand['cards'][0] % 13 == hand['cards'][1] % 13)
+
+def hit(game):
+    hand = active_hand(game)
+    add_card(hand, draw(game['shoe']))
+    if score(hand) >= 21:
+        hand['done'] = True
+        _advance(game)
+
+def stand(game):
+    active_hand(game)['done'] = True
+    _advance(game)
+
+def double(game):
+    """Double the active hand's bet (the caller takes the extra stake) and
+    draw its last card."""
+    hand = active_hand(game)
+    hand['bet'] *= 2
+    hand['doubled'] = True
+    add_card(hand, draw(game['shoe']))
+    hand['done'] = True
+    _advance(game)
+
+def split(game):
+    """Split the active pair into two hands (the caller takes the second
+    hand's stake)."""
+    hand = active_hand(game)
+    aces = CARD_VALUES[hand['cards'][0]] == 1
+    hands = [new_hand(hand['bet'], [card], split=True) for card in hand['cards']]
+    for new in hands:
+        add_card(new, draw(game['shoe']))
+        new['done'] = aces or score(new) == 21
+    game['hands'][game['active']:game['active'] + 1] = hands
+    _advance(game)
+
+def _advance(game):
+    # Move to the next unfinished hand, or let the dealer play
+    while game['active'] < len(game['hands']) and game['hands'][game['active']]['done']:
+        game['active'] += 1
+    if game['active'] < len(game['hands']):
+        return
+    
+    game['active'] = len(game['hands']) - 1
+    if any(score(hand) <= 21 for hand in game['hands']):
+        play_dealer(game['dealer'], game['shoe'])
+    game['phase'] = 'done'
+
+def play_dealer(dealer, shoe):
+    # Dealer draws to 17 and stands on soft 17
+    while score(dealer) < 17:
+        add_card(dealer, draw(shoe))
+
+def results(game):
+    """Per-hand (result, multiplier) and the insurance multiplier of a
+    finished round."""
+    dealer = game['dealer']
+    dealer_score = score(dealer)
+    dealer_blackjack = is_blackjack(dealer)
+    
+    outcomes = []
+    for hand in game['hands']:
+        player_score = score(hand)
+        if is_blackjack(hand):
+            outcomes.append(('push', 1.0) if dealer_blackjack else ('blackjack', BLACKJACK_PAYS))
+        elif player_score > 21 or dealer_blackjack:
+            outcomes.append(('lose', 0))
+        else:
+            outcomes.append(settle(player_score, dealer_score))
+    return outcomes, INSURANCE_PAYS if dealer_blackjack else 0
+
+def settle(player_score, dealer_score):
+    """(result, multiplier) once the player stands and the dealer has played."""
+    if dealer_score > 21:
+        return 'win', 2.0
+    elif player_score > dealer_score:
+        return 'win', 2.0
+    elif player_score < dealer_score:
+        return 'lose', 0
+    else:
+        return 'push', 1.0
@@ -0,0 +1,184 @@
+# Blackjack expected values
+#
+# EV of standing, hitting, doubling and splitting a hand against the dealer's
+# up card, given the composition of the unseen cards: `counts` is a tuple of
+# how many cards of each rank (ace, 2..9, then every ten-valued card) are
+# left. Within one evaluation the cards still to come are drawn from that
+# composition (a few cards out of a six-deck shoe barely move it), so a hand
+# is a (hard total, holds an ace) state and every action's EV is a small
+# dynamic program over those states, memoized on (state, up card, counts).
+# The composition changes as the round's cards are seen, and each decision is
+# evaluated on its own.
+#
+# Hints use the full shoe minus the cards of the round (composition-dependent
+# basic strategy), not the cards left in the user's shoe: that keeps the
+# compositions few enough to warm up at startup, and the hint is not a card
+# count. Rules are those of games/blackjack.py, except that a split hand is
+# valued without resplitting.
+from functools import lru_cache
+from games.blackjack import CARD_VALUES, DECKS, INSURANCE_PAYS, active_hand, can_double, can_split
+
+ACE = 0
+TEN = 9
+RANKS = 10
+# Dealer final totals 17..21, then bust
+BUST = 5
+
+CACHE_SIZE = 1 << 17
+
+def full_shoe(decks=DECKS):
+    return (4 * decks,) * (RANKS - 1) + (16 * decks,)
+
+def rank(card):
+    return CARD_VALUES[card] - 1
+
+def remove(counts, r):
+    return counts[:r] + (counts[r] - 1,) + counts[r + 1:]
+
+def composition(cards, decks=DECKS):
+    """The full shoe without `cards`."""
+    counts = list(full_shoe(decks))
+    for card in cards:
+        counts[rank(card)] -= 1
+    return tuple(counts)
+
+def _total(hard, ace):
+    return hard + 10 if ace and hard <= 11 else hard
+
+@lru_cache(maxsize=CACHE_SIZE)
+def probabilities(counts):
+    n = sum(counts)
+    return tuple(count / n for count in counts)
+
+# Dealer
+
+@lru_cache(maxsize=CACHE_SIZE)
+def dealer_outcomes(up, counts):
+    """Probabilities of the dealer ending on 17..21 or busting with `up`
+    showing, given that the peek found no blackjack."""
+    # Outcomes from every dealer total, highest first
+    p = probabilities(counts)
+    table = {}
+    for hard in range(26, 1, -1):
+        for ace in (False, True):
+            total = _total(hard, ace)
+            if total > 21:
+                table[hard, ace] = (0.0,) * BUST + (1.0,)
+            elif total >= 17:
+                # Stands on soft 17
+                table[hard, ace] = tuple(float(i == total - 17) for i in range(BUST + 1))
+            else:
+                table[hard, ace] = tuple(
+                    sum(p[r] * table[hard + r + 1, ace or r == ACE][i] for r in range(RANKS))
+                    for i in range(BUST + 1)
+                )
+    
+    blackjack = TEN if up == ACE else ACE if up == TEN else None
+    hole = sum(counts) - (counts[blackjack] if blackjack is not None else 0)
+    outcomes = [0.0] * (BUST + 1)
+    for r, count in enumerate(counts):
+        if count and r != blackjack:
+            for i, q in enumerate(table[up + r + 2, up == ACE or r == ACE]):
+                outcomes[i] += count / hole * q
+    return tuple(outcomes)
+
+# Player (EVs per unit of the hand's bet)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def stand_ev(total, up, counts):
+    if total > 21:
+        return -1.0
+    outcomes = dealer_outcomes(up, counts)
+    ev = outcomes[BUST]
+    for i in range(BUST):
+        if total > 17 + i:
+            ev += outcomes[i]
+        elif total < 17 + i:
+            ev -= outcomes[i]
+    return ev
+
+def _best(hard, ace, up, counts):
+    total = _total(hard, ace)
+    if total > 21:
+        return -1.0
+    if total == 21:
+        # The hand stands by itself
+        return stand_ev(total, up, counts)
+    return max(stand_ev(total, up, counts), hit_ev(hard, ace, up, counts))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def hit_ev(hard, ace, up, counts):
+    ev = 0.0
+    for r, p in enumerate(probabilities(counts)):
+        if p:
+            ev += p * _best(hard + r + 1, ace or r == ACE, up, counts)
+    return ev
+
+@lru_cache(maxsize=CACHE_SIZE)
+def double_ev(hard, ace, up, counts):
+    ev = 0.0
+    for r, p in enumerate(probabilities(counts)):
+        if p:
+            ev += p * stand_ev(_total(hard + r + 1, ace or r == ACE), up, counts)
+    return 2 * ev
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_ev(pair, up, counts):
+    # Both hands are valued alike: one card of the pair and the next card,
+    # played on (split aces stand on their two cards)
+    ev = 0.0
+    for r, p in enumerate(probabilities(counts)):
+        if not p:
+            continue
+        hard = pair + r + 2
+        ace = pair == ACE or r == ACE
+        if pair == ACE or _total(hard, ace) == 21:
+            value = stand_ev(_total(hard, ace), up, counts)
+        else:
+            value = max(_best(hard, ace, up, counts), double_ev(hard, ace, up, counts))
+        ev += p * value
+    return 2 * ev
+
+def evaluate(hand, up, counts, double=False, split=False):
+    """EV of each allowed action for a hand of card ranks against the up
+    card's rank, with `counts` the unseen cards."""
+    hard = sum(hand) + len(hand)
+    ace = ACE in hand
+    evs = {'stand': stand_ev(_total(hard, ace), up, counts)}
+    if _total(hard, ace) < 21:
+        evs['hit'] = hit_ev(hard, ace, up, counts)
+    if double:
+        evs['double'] = double_ev(hard, ace, up, counts)
+    if split:
+        evs['split'] = split_ev(hand[0], up, counts)
+    return evs
+
+def insurance_ev(counts):
+    """EV per unit of insurance stake under an ace."""
+    return counts[TEN] / sum(counts) * INSURANCE_PAYS - 1
+
+def hint(game, decks=DECKS):
+    """The best action for the active hand of a round in play, and the EV of
+    each action it allows (and of insurance while it is offered)."""
+    up = game['dealer']['cards'][0]
+    seen = [card for hand in game['hands'] for card in hand['cards']] + [up]
+    counts = composition(seen, decks)
+    
+    # The hand's options once the insurance decision is made
+    playing = dict(game, phase='player')
+    hand = [rank(card) for card in active_hand(game)['cards']]
+    evs = evaluate(hand, rank(up), counts, can_double(playing), can_split(playing))
+    result = {'action': max(evs, key=evs.get), 'ev': evs}
+    if game['phase'] == 'insurance':
+        result['insurance'] = insurance_ev(counts)
+    return result
+
+def warm_up(decks=DECKS):
+    """Solve every two-card hand against every up card from a full shoe."""
+    for up in range(RANKS):
+        for first in range(RANKS):
+            for second in range(first, RANKS):
+                counts = full_shoe(decks)
+                for r in (up, first, second):
+                    counts = remove(counts, r)
+                evaluate([first, second], up, counts, double=True, split=first == second)
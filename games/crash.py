@@ -0,0 +1,74 @@
+# Crash
+#
+# The multiplier climbs from 1.00x in steps whose size grows with the
+# multiplier. Instead of shipping every point of the climb, the crash route
+# returns this schedule and the client (static/js/crash.js) expands it with
+# the same loop; crash_path() reproduces the exact same points server-side
+# for audits.
+import math
+import numpy as np
+
+CRASH_START = 1.0
+CRASH_CAP = 100.0
+
+# Lowest auto cashout a bet can take (the climb starts at 1.00x)
+MIN_CASHOUT = 1.01
+
+# (threshold, step): the step applies once the multiplier is above threshold
+CRASH_SCHEDULE = ((0.0, 0.01), (2.0, 0.05), (5.0, 0.1))
+
+def draw_crash_point(rng):
+    # Weighted towards lower values
+    return min(float(np.round(1.0 / (1.0 - rng.random() ** 2), 2)), CRASH_CAP)
+
+def crash_points(k, rng):
+    return np.minimum(np.round(1.0 / (1.0 - rng.random(k) ** 2), 2), CRASH_CAP)
+
+def play(cashout_multiplier, rng):
+    crash_point = draw_crash_point(rng)
+    won = cashout_multiplier <= crash_point
+    
+    return {
+        'crashPoint': crash_point,
+        'won': won,
+        'multiplier': cashout_multiplier if won else 0
+    }
+
+def play_many(k, cashout_multiplier, rng):
+    points = crash_points(k, rng)
+    won = cashout_multiplier <= points
+    
+    return {
+        'crashPoint': points,
+        'won': won,
+        'multiplier': np.where(won, cashout_multiplier, 0.0)
+    }
+
+def crash_curve(schedule=CRASH_SCHEDULE):
+    return {'start': CRASH_START, 'schedule': [list(s) for s in schedule]}
+
+def crash_path(crash_point, schedule=CRASH_SCHEDULE):
+    path = []
+    current = CRASH_START
+    step = schedule[0][1]
+    while current < crash_point:
+        path.append(round(current, 2))
+        current += step
+        for threshold, next_step in schedule[1:]:
+            if current > threshold:
+                step = next_step
+    
+    path.append(crash_point)
+    return path
+
+# Live rounds (crash_rounds.py): the multiplier is a function of the time
+# since the round started, so every player sees the same curve and the server
+# can price a cashout from its own clock
+LIVE_GROWTH = 0.06
+
+def live_multiplier(elapsed):
+    return math.floor(100 * math.exp(LIVE_GROWTH * max(elapsed, 0.0))) / 100
+
+def live_duration(crash_point):
+    # Seconds until the live multiplier reaches crash_point
+    return math.log(crash_point) / LIVE_GROWTH
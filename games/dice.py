@@ -0,0 +1,36 @@
+# Dice
+import numpy as np
+
+# Win chances (in %) a bet can take
+MIN_CHANCE = 0.01
+MAX_CHANCE = 98.0
+
+def win_chance(target, over):
+    return 100 - target if over else target
+
+def payout(target, over):
+    chance = win_chance(target, over)
+    return (98.0 / chance) if chance > 0 else 0
+
+def play(target, over, rng):
+    # Roll dice (0-100)
+    roll = float(np.round(rng.uniform(0, 100), 2))
+    won = roll > target if over else roll < target
+    
+    return {
+        'roll': roll,
+        'won': won,
+        'multiplier': payout(target, over) if won else 0,
+        'winChance': win_chance(target, over)
+    }
+
+def play_many(k, target, over, rng):
+    roll = np.round(rng.uniform(0, 100, size=k), 2)
+    won = roll > target if over else roll < target
+    
+    return {
+        'roll': roll,
+        'won': won,
+        'multiplier': np.where(won, payout(target, over), 0.0),
+        'winChance': np.full(k, win_chance(target, over), dtype=float)
+    }
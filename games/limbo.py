@@ -0,0 +1,51 @@
+# Limbo
+import numpy as np
+
+CAP = 100.0
+
+# Lowest target a bet can take (anything below would always win)
+MIN_TARGET = 1.01
+
+def play(target, rng):
+    # Generate result with weighted probability (harder for high multipliers)
+    rand_value = rng.random()
+    
+    # Transform to make high values rare
+    if rand_value < 0.5:
+        # 50% chance of 1-2x
+        result = 1.0 + rand_value * 2
+    elif rand_value < 0.8:
+        # 30% chance of 2-5x
+        result = 2.0 + (rand_value - 0.5) * 10
+    elif rand_value < 0.95:
+        # 15% chance of 5-20x
+        result = 5.0 + (rand_value - 0.8) * 100
+    else:
+        # 5% chance of 20-100x
+        result = 20.0 + (rand_value - 0.95) * 1600
+    
+    result = min(float(np.round(result, 2)), CAP)
+    won = result >= target
+    
+    return {
+        'result': result,
+        'won': won,
+        'multiplier': target if won else 0
+    }
+
+def play_many(k, target, rng):
+    rand_value = rng.random(k)
+    
+    result = np.select(
+        [rand_value < 0.5, rand_value < 0.8, rand_value < 0.95],
+        [1.0 + rand_value * 2, 2.0 + (rand_value - 0.5) * 10, 5.0 + (rand_value - 0.8) * 100],
+        20.0 + (rand_value - 0.95) * 1600
+    )
+    result = np.minimum(np.round(result, 2), CAP)
+    won = result >= target
+    
+    return {
+        'result': result,
+        'won': won,
+        'multiplier': np.where(won, float(target), 0.0)
+    }
@@ -0,0 +1,59 @@
+# Mines
+#
+# The payout after finding `gems` safe tiles with `mines` mines on the 5x5
+# board is the house edge factor divided by the probability of getting that
+# far; cashing out before the first reveal gives the bet back. It only depends
+# on (mines, gems), so the whole 25x25 table is built once and every
+# reveal/cashout is a lookup.
+from functools import lru_cache
+
+GRID_SIZE = 25
+HOUSE_EDGE = 0.97
+
+@lru_cache(maxsize=None)
+def build_table(house_edge=HOUSE_EDGE):
+    """table[mines][gems] for 0 <= mines, gems < 25; None where gems > 25 - mines."""
+    table = []
+    for mines in range(GRID_SIZE):
+        row = [None] * GRID_SIZE
+        chance = 1.0
+        for gems in range(min(GRID_SIZE - mines + 1, GRID_SIZE)):
+            row[gems] = round(house_edge / chance, 2) if gems else 1.0
+            chance *= (GRID_SIZE - mines - gems) / (GRID_SIZE - gems)
+        table.append(row)
+    return tuple(tuple(row) for row in table)
+
+MULTIPLIERS = build_table()
+
+def multiplier(mines, gems, house_edge=HOUSE_EDGE):
+    table = MULTIPLIERS if house_edge == HOUSE_EDGE else build_table(house_edge)
+    return table[mines][gems]
+
+def draw_mines(num_mines, rng):
+    # Mine positions on the 5x5 grid
+    return rng.sample(range(GRID_SIZE), num_mines)
+
+def start(bet, num_mines, rng):
+    return {
+        'bet': bet,
+        'mines': draw_mines(num_mines, rng),
+        'revealed': [],
+        'num_mines': num_mines
+    }
+
+def reveal(game, position):
+    """Reveal a tile (the caller checks it is on the board and new)."""
+    game['revealed'].append(position)
+    
+    if position in game['mines']:
+        return {'hit': True}
+    
+    gems_found = len(game['revealed'])
+    return {
+        'hit': False,
+        'multiplier': multiplier(game['num_mines'], gems_found),
+        'gemsFound': gems_found
+    }
+
+def cashout(game):
+    return multiplier(game['num_mines'], len(game['revealed']))
@@ -0,0 +1,98 @@
+# Plinko
+#
+# The ball falls through `rows` rows of pegs (8 to 16) and goes right or left
+# at each one with even odds, so it lands in slot k (of rows + 1) when it went
+# right k times, with probability C(rows, k) / 2**rows. One 16-bit draw is the
+# whole path: bit i is the direction at row i (1 = right) and the slot is the
+# number of set bits among the first `rows`. The path is returned as that
+# bitfield; the slot comes from a popcount table, with no per-row work.
+# Requests that leave `rows` out play the full 16-row board.
+from math import comb
+import numpy as np
+
+MAX_ROWS = 16
+PATH_BITS = 16
+
+# Multipliers from the edge slot to the middle one; the board is symmetric.
+# Every table returns about 99% (see DISTRIBUTIONS / rtp)
+_HALF_TABLES = {
+    8: {'low': [5.6, 2.1, 1.1, 1, 0.5], 'medium': [13, 3, 1.3, 0.7, 0.4], 'high': [29, 4, 1.5, 0.3, 0.2]},
+    9: {'low': [5.6, 2, 1.6, 1, 0.7], 'medium': [18, 4, 1.7, 0.9, 0.5], 'high': [43, 7, 2, 0.6, 0.2]},
+    10: {'low': [8.9, 3, 1.4, 1.1, 1, 0.5], 'medium': [22, 5, 2, 1.4, 0.6, 0.4], 'high': [76, 10, 3, 0.9, 0.3, 0.2]},
+    11: {'low': [8.4, 3, 1.9, 1.3, 1, 0.7], 'medium': [24, 6, 3, 1.8, 0.7, 0.5], 'high': [120, 14, 5.2, 1.4, 0.4, 0.2]},
+    12: {'low': [10, 3, 1.6, 1.4, 1.1, 1, 0.5], 'medium': [33, 11, 4, 2, 1.1, 0.6, 0.3], 'high': [170, 24, 8.1, 2, 0.7, 0.2, 0.2]},
+    13: {'low': [8.1, 4, 3, 1.9, 1.2, 0.9, 0.7], 'medium': [43, 13, 6, 3, 1.3, 0.7, 0.4], 'high': [260, 37, 11, 4, 1, 0.2, 0.2]},
+    14: {'low': [7.1, 4, 1.9, 1.4, 1.3, 1.1, 1, 0.5], 'medium': [58, 15, 7, 4, 1.9, 1, 0.5, 0.2], 'high': [420, 56, 18, 5, 1.9, 0.3, 0.2, 0.2]},
+    15: {'low': [15, 8, 3, 2, 1.5, 1.1, 1, 0.7], 'medium': [88, 18, 11, 5, 3, 1.3, 0.5, 0.3], 'high': [620, 83, 27, 8, 3, 0.5, 0.2, 0.2]},
+    16: {'low': [16, 9, 2, 1.4, 1.4, 1.2, 1.1, 1, 0.5], 'medium': [110, 41, 10, 5, 3, 1.5, 1, 0.5, 0.3], 'high': [1000, 130, 26, 9, 4, 2, 0.2, 0.2, 0.2]}
+}
+
+def _mirror(half, slots):
+    return [float(m) for m in half + half[::-1][slots % 2:]]
+
+# MULTIPLIERS[rows][risk][slot]
+MULTIPLIERS = {
+    rows: {risk: _mirror(half, rows + 1) for risk, half in risks.items()}
+    for rows, risks in _HALF_TABLES.items()
+}
+MULTIPLIER_ARRAYS = {
+    rows: {risk: np.array(values) for risk, values in risks.items()}
+    for rows, risks in MULTIPLIERS.items()
+}
+
+# Landing-slot probabilities per row count, exact as counts of paths out of
+# 2**rows
+PATHS = {rows: [comb(rows, k) for k in range(rows + 1)] for rows in MULTIPLIERS}
+DISTRIBUTIONS = {rows: [count / 2 ** rows for count in counts] for rows, counts in PATHS.items()}
+
+# Set bits of every path
+POPCOUNT = np.array([bin(path).count('1') for path in range(1 << PATH_BITS)], dtype=np.int8)
+
+def multipliers(risk_level, rows=MAX_ROWS):
+    """The slot multipliers; raises ValueError for a board that is not offered."""
+    if rows not in MULTIPLIERS or risk_level not in MULTIPLIERS[rows]:
+        raise ValueError(f'no {risk_level!r} board with {rows!r} rows')
+    return MULTIPLIERS[rows][risk_level]
+
+def rtp(risk_level, rows=MAX_ROWS):
+    return sum(p * m for p, m in zip(DISTRIBUTIONS[rows], multipliers(risk_level, rows)))
+
+# Every board: multipliers, landing probabilities (and path counts) and
+# return to player, for the UI and RTP checks
+TABLE = {
+    rows: {
+        risk: {
+            'multipliers': values,
+            'probabilities': DISTRIBUTIONS[rows],
+            'paths': PATHS[rows],
+            'rtp': round(rtp(risk, rows), 6)
+        }
+        for risk, values in risks.items()
+    }
+    for rows, risks in MULTIPLIERS.items()
+}
+
+def play(risk_level, rows=MAX_ROWS, rng=None):
+    slot_multipliers = multipliers(risk_level, rows)
+    
+    # Only the first `rows` bits are played
+    path = int(rng.integers(0, 1 << PATH_BITS)) & ((1 << rows) - 1)
+    slot = int(POPCOUNT[path])
+    
+    return {
+        'path': path,
+        'slot': slot,
+        'multiplier': slot_multipliers[slot]
+    }
+
+def play_many(k, risk_level, rows=MAX_ROWS, rng=None):
+    multipliers(risk_level, rows)
+    
+    paths = rng.integers(0, 1 << PATH_BITS, size=k) & ((1 << rows) - 1)
+    slots = POPCOUNT[paths]
+    
+    return {
+        'path': paths,
+        'slot': slots,
+        'multiplier': MULTIPLIER_ARRAYS[rows][risk_level][slots]
+    }
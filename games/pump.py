@@ -0,0 +1,44 @@
+# Pump
+#
+# The balloon inflates on the server's clock: its multiplier is a function of
+# the time since the game started (multiplier_at), like a live crash round,
+# and it pops when that reaches the pop point drawn at the start. The pop
+# point stays on the server until the balloon has popped, and a cashout is
+# priced at the multiplier reached when it arrives, not at one the client
+# names.
+import math
+import time
+import numpy as np
+
+POP_CAP = 50.0
+# The multiplier grows by 15% a second
+GROWTH = 0.15
+
+def draw_pop_point(rng):
+    # Random max multiplier (pop point): 1 + Exp(0.5)
+    return min(float(np.round(1.0 - np.log(1.0 - rng.random()) / 0.5, 2)), POP_CAP)
+
+def pop_points(k, rng):
+    return np.minimum(np.round(1.0 - np.log(1.0 - rng.random(k)) / 0.5, 2), POP_CAP)
+
+def multiplier_at(elapsed):
+    return math.floor(100 * math.exp(GROWTH * max(elapsed, 0.0))) / 100
+
+def start(bet, rng, now=None):
+    return {
+        'bet': bet,
+        'max_multiplier': draw_pop_point(rng),
+        # Wall-clock time, shared by every worker
+        'started': time.time() if now is None else now
+    }
+
+def current_multiplier(game, now=None):
+    return multiplier_at((time.time() if now is None else now) - game['started'])
+
+def popped(game, now=None):
+    return current_multiplier(game, now) >= game['max_multiplier']
+
+def cashout(game, multiplier):
+    """Payout multiplier for cashing out at `multiplier`; 0 if the balloon
+    had already popped by then."""
+    return multiplier if 1.0 <= multiplier < game['max_multiplier'] else 0
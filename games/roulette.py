@@ -0,0 +1,96 @@
+# Roulette
+#
+# Every bet compiles to a 37-bit mask of the numbers it covers (bit n is set
+# when it wins on n) and the multiplier it returns, 36 / numbers covered:
+# straight 36x, split 18x, street 12x, corner 9x, line 6x, dozen and column
+# 3x, the even-money bets 2x. A spin resolves a whole slip of bets with one
+# shift and one and per bet, whatever their types.
+import numpy as np
+
+RED_NUMBERS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
+BLACK_NUMBERS = {2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35}
+
+def _mask(numbers):
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+def _count(mask):
+    return bin(mask).count('1')
+
+# Bets named by their type alone
+OUTSIDE_BETS = {
+    'red': _mask(RED_NUMBERS),
+    'black': _mask(BLACK_NUMBERS),
+    'even': _mask(range(2, 37, 2)),
+    'odd': _mask(range(1, 37, 2)),
+    'low': _mask(range(1, 19)),
+    'high': _mask(range(19, 37)),
+    **{f'dozen{i + 1}': _mask(range(12 * i + 1, 12 * i + 13)) for i in range(3)},
+    **{f'column{i + 1}': _mask(range(i + 1, 37, 3)) for i in range(3)}
+}
+
+# Bets on numbers, by the masks of every placement the layout allows (the
+# numbers run across rows of three: 1 2 3, 4 5 6, ..., with 0 above them)
+INSIDE_BETS = {
+    'straight': {_mask([n]) for n in range(37)},
+    'split': {_mask([n, n + 1]) for n in range(1, 36) if n % 3}
+        | {_mask([n, n + 3]) for n in range(1, 34)}
+        | {_mask([0, n]) for n in (1, 2, 3)},
+    'street': {_mask([n, n + 1, n + 2]) for n in range(1, 35, 3)}
+        | {_mask([0, 1, 2]), _mask([0, 2, 3])},
+    'corner': {_mask([n, n + 1, n + 3, n + 4]) for n in range(1, 33) if n % 3}
+        | {_mask([0, 1, 2, 3])},
+    'line': {_mask(range(n, n + 6)) for n in range(1, 32, 3)}
+}
+
+BET_TYPES = sorted(OUTSIDE_BETS) + sorted(INSIDE_BETS)
+
+def compile_bet(bet_type, numbers=()):
+    """(mask, multiplier) of a bet; `numbers` are the numbers an inside bet
+    covers. Raises ValueError for a bet the table does not take."""
+    if bet_type in OUTSIDE_BETS:
+        mask = OUTSIDE_BETS[bet_type]
+    elif bet_type in INSIDE_BETS:
+        numbers = [int(n) for n in numbers]
+        mask = _mask(n for n in numbers if 0 <= n <= 36)
+        if mask not in INSIDE_BETS[bet_type] or len(numbers) != _count(mask):
+            raise ValueError(f'invalid {bet_type} bet {numbers}')
+    else:
+        raise ValueError(f'unknown bet type {bet_type!r}')
+    return mask, 36.0 / _count(mask)
+
+def spin(rng):
+    return int(rng.integers(0, 37))
+
+def resolve(slip, number):
+    """Multiplier of each compiled bet of a slip when `number` comes up."""
+    bit = 1 << number
+    return [multiplier if mask & bit else 0 for mask, multiplier in slip]
+
+# Single bets of any type (the instant game interface, used by the batch
+# route and seed verification); `numbers` as for compile_bet
+
+def play(bet_type, numbers=(), rng=None):
+    mask, multiplier = compile_bet(bet_type, numbers)
+    # Spin wheel
+    number = spin(rng)
+    won = bool(mask >> number & 1)
+    
+    return {
+        'number': number,
+        'won': won,
+        'multiplier': multiplier if won else 0
+    }
+
+def play_many(k, bet_type, numbers=(), rng=None):
+    mask, multiplier = compile_bet(bet_type, numbers)
+    number = rng.integers(0, 37, size=k)
+    won = (np.int64(mask) >> number & 1).astype(bool)
+    
+    return {
+        'number': number,
+        'won': won,
+        'multiplier': np.where(won, multiplier, 0.0)
+    }
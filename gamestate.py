@@ -0,0 +1,287 @@
+# Server-side state for the multi-step games (mines, pump, blackjack)
+#
+# Game state used to live in Flask's signed cookie session, so a blackjack
+# game shipped its whole remaining deck back and forth on every request. It is
+# now kept on the server, keyed by (user id, game), in a compact binary form:
+# mine positions as 25-bit masks and cards as one byte per card (blackjack
+# keeps its shoe as the seed and nonce it was shuffled with).
+#
+# A new game is written with add(), which only succeeds if no game is stored
+# in its slot: of two concurrent starts only one gets in, and the other gives
+# its stake back rather than overwriting a game that was paid for.
+#
+# Every write stamps the state with a new random version, returned by get()
+# in state['version']. A step that keeps the game going writes it back with
+# update(), and a step that ends it removes it with delete(state) or take():
+# each only succeeds if the state is still the version it read. A request
+# that read a game before a concurrent cashout therefore cannot write it
+# back, and it cannot be settled a second time. The version is random rather
+# than a counter, so a game that is deleted and started again never matches
+# a version read before.
+import secrets
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from models import db, GameState
+from metrics import span
+from games import blackjack
+
+# Codecs: state dict <-> bytes (bets are integer cents, see money.py)
+
+def _mask(positions):
+    mask = 0
+    for position in positions:
+        mask |= 1 << position
+    return mask
+
+def _positions(mask):
+    return [i for i in range(25) if mask >> i & 1]
+
+_MINES = struct.Struct('<qBII')
+
+def encode_mines(game):
+    return _MINES.pack(game['bet'], game['num_mines'], _mask(game['mines']), _mask(game['revealed']))
+
+def decode_mines(data):
+    bet, num_mines, mines, revealed = _MINES.unpack(data)
+    return {
+        'bet': bet,
+        'mines': _positions(mines),
+        'revealed': _positions(revealed),
+        'num_mines': num_mines
+    }
+
+_PUMP = struct.Struct('<qdd')
+
+def encode_pump(game):
+    return _PUMP.pack(game['bet'], game['max_multiplier'], game['started'])
+
+def decode_pump(data):
+    bet, max_multiplier, started = _PUMP.unpack(data)
+    return {'bet': bet, 'max_multiplier': max_multiplier, 'started': started}
+
+# A round in progress: where its cards come from (the shoe's seed, shuffle
+# nonce and position; the cards themselves are rebuilt from those), the
+# insurance stake, then each hand and the dealer's hand as one byte per card
+_BLACKJACK = struct.Struct('<IIHqBBB')
+_HAND = struct.Struct('<qBB')
+_PHASES = ['insurance', 'player', 'done']
+
+def encode_blackjack(game):
+    shoe = game['shoe']
+    parts = [_BLACKJACK.pack(
+        shoe['seed'], shoe['nonce'], shoe['position'], game['insurance'],
+        _PHASES.index(game['phase']), game['active'], len(game['hands'])
+    )]
+    for hand in game['hands']:
+        flags = hand['split'] | hand['doubled'] << 1 | hand['done'] << 2
+        parts.append(_HAND.pack(hand['bet'], flags, len(hand['cards'])) + bytes(hand['cards']))
+    parts.append(bytes([len(game['dealer']['cards'])]) + bytes(game['dealer']['cards']))
+    return b''.join(parts)
+
+def decode_blackjack(data):
+    seed, nonce, position, insurance, phase, active, n_hands = _BLACKJACK.unpack_from(data)
+    offset = _BLACKJACK.size
+    hands = []
+    for _ in range(n_hands):
+        bet, flags, n_cards = _HAND.unpack_from(data, offset)
+        offset += _HAND.size
+        hand = blackjack.new_hand(bet, data[offset:offset + n_cards], split=bool(flags & 1))
+        hand['doubled'] = bool(flags & 2)
+        hand['done'] = bool(flags & 4)
+        hands.append(hand)
+        offset += n_cards
+    return {
+        'shoe': {'seed': seed, 'nonce': nonce, 'position': position},
+        'hands': hands,
+        'active': active,
+        'dealer': blackjack.new_hand(0, data[offset + 1:offset + 1 + data[offset]]),
+        'insurance': insurance,
+        'phase': _PHASES[phase]
+    }
+
+# The user's shoe between rounds. `in_round` is set while a round is dealt
+# from it; a shoe still marked when the next round is dealt lost its round
+# state and is shuffled again rather than replayed from a stale position.
+_SHOE = struct.Struct('<IIH?')
+
+def encode_shoe(shoe):
+    return _SHOE.pack(shoe['seed'], shoe['nonce'], shoe['position'], shoe['in_round'])
+
+def decode_shoe(data):
+    seed, nonce, position, in_round = _SHOE.unpack(data)
+    return {'seed': seed, 'nonce': nonce, 'position': position, 'in_round': in_round}
+
+CODECS = {
+    'mines': (encode_mines, decode_mines),
+    'pump': (encode_pump, decode_pump),
+    'blackjack': (encode_blackjack, decode_blackjack),
+    'blackjack_shoe': (encode_shoe, decode_shoe)
+}
+
+# Stores: each keeps (data, version) per key
+
+def _new_version():
+    return secrets.randbits(62)
+
+class MemoryStore:
+    """Per-process LRU with TTL eviction. Only safe with a single worker."""
+    
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+    
+    def load(self, key):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+    
+    def save(self, key, data):
+        with self._lock:
+            self._entries[key] = (data, _new_version(), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def insert(self, key, data):
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._entries[key] = (data, _new_version(), time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+    
+    def replace(self, key, data, version):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None or entry[1] != version:
+                return False
+            self._entries[key] = (data, _new_version(), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            return True
+    
+    def remove(self, key, version=None):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None or (version is not None and entry[1] != version):
+                return False
+            del self._entries[key]
+            return True
+
+class DatabaseStore:
+    """GameState table, shared by every worker."""
+    
+    def _where(self, key, version=None):
+        condition = (GameState.user_id == key[0]) & (GameState.game == key[1])
+        if version is not None:
+            condition &= GameState.version == version
+        return condition
+    
+    def load(self, key):
+        # A query rather than session.get(), which could answer from the
+        # session's identity map instead of the current row
+        row = db.session.execute(select(GameState.data, GameState.version).where(self._where(key))).first()
+        return (row.data, row.version) if row else None
+    
+    def save(self, key, data):
+        db.session.merge(GameState(user_id=key[0], game=key[1], data=data, version=_new_version()))
+        with span('commit'):
+            db.session.commit()
+    
+    def insert(self, key, data):
+        # Core rather than session.add(), which could clash with a row
+        # already in the session's identity map instead of the table
+        try:
+            db.session.execute(insert(GameState).values(user_id=key[0], game=key[1], data=data, version=_new_version()))
+            with span('commit'):
+                db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+    
+    def replace(self, key, data, version):
+        result = db.session.execute(
+            update(GameState).where(self._where(key, version))
+            .values(data=data, version=_new_version(), updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        with span('commit'):
+            db.session.commit()
+        return result.rowcount > 0
+    
+    def remove(self, key, version=None):
+        result = db.session.execute(
+            delete(GameState).where(self._where(key, version)).execution_options(synchronize_session=False)
+        )
+        with span('commit'):
+            db.session.commit()
+        return result.rowcount > 0
+
+class GameStateStore:
+    def __init__(self, backend):
+        self.backend = backend
+    
+    def get(self, user_id, game):
+        """The state with its version, or None."""
+        entry = self.backend.load((user_id, game))
+        if entry is None:
+            return None
+        state = CODECS[game][1](entry[0])
+        state['version'] = entry[1]
+        return state
+    
+    def put(self, user_id, game, state):
+        """Write the state whatever is stored."""
+        self.backend.save((user_id, game), CODECS[game][0](state))
+    
+    def add(self, user_id, game, state):
+        """Write a new game. Returns False, writing nothing, if a game is
+        already stored in its slot."""
+        return self.backend.insert((user_id, game), CODECS[game][0](state))
+    
+    def update(self, user_id, game, state):
+        """Write back a state read with get(). Returns False, writing nothing,
+        if it changed or was removed in the meantime."""
+        return self.backend.replace((user_id, game), CODECS[game][0](state), state['version'])
+    
+    def delete(self, user_id, game, state=None):
+        """Remove the state, only if it is still `state` when one is given.
+        Returns whether this call removed it."""
+        version = state['version'] if state is not None else None
+        return self.backend.remove((user_id, game), version)
+    
+    def take(self, user_id, game):
+        """Remove and return the state. Of two concurrent calls only one gets
+        it, so a finished game cannot be settled twice."""
+        state = self.get(user_id, game)
+        if state is None or not self.delete(user_id, game, state):
+            return None
+        return state
+
+def create_store(config):
+    if config.get('GAME_STATE_STORE', 'database') == 'memory':
+        return GameStateStore(MemoryStore(
+            config.get('GAME_STATE_MAX_ENTRIES', 10000),
+            config.get('GAME_STATE_TTL', 3600)
+        ))
+    return GameStateStore(DatabaseStore())
@@ -0,0 +1,32 @@
+# Gunicorn settings
+#
+# The default is one gevent worker: /api/stream and the live crash stream
+# hold a connection open per client, which would pin a whole sync worker
+# each, while a gevent worker serves thousands of them as greenlets. One
+# worker is also what the in-process event bus and crash rounds expect (see
+# events.py).
+#
+#   WORKER_CLASS=sync WEB_CONCURRENCY=2   the previous setup (no streaming)
+#
+# loadtest.py compares the two.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = os.environ.get('WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 2000))
+timeout = int(os.environ.get('TIMEOUT', 120))
+keepalive = 75
+
+# A sync worker is pinned by every open event stream, so a few tabs would
+# take the site down: the pages only open streams under an async worker
+# (see STREAMING in app.py). Several workers would each run their own event
+# bus and crash rounds, so streaming also needs a single worker.
+os.environ.setdefault('STREAMING', '1' if worker_class == 'gevent' and workers == 1 else '0')
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # psycopg2 talks to Postgres in C; without this every query would
+        # block the whole worker instead of yielding to other greenlets
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
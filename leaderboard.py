@@ -0,0 +1,101 @@
+# Leaderboard snapshots
+#
+# The leaderboard queries aggregate over every user, so they are run by a
+# background thread every `interval` seconds and page views only read the
+# last snapshot. If the thread falls behind (or is not running in this
+# process) a snapshot older than `ttl` is rebuilt on demand.
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from models import db, User, Transaction, UserStats
+from money import from_units
+
+class Leaderboard:
+    def __init__(self, app, interval=30, ttl=120, size=10):
+        self.app = app
+        self.interval = interval
+        self.ttl = ttl
+        self.size = size
+        self._snapshot = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def build(self):
+        since = datetime.utcnow() - timedelta(hours=24)
+        
+        top_balance = db.session.execute(
+            select(User.username, User.balance)
+            .order_by(User.balance.desc())
+            .limit(self.size)
+        ).all()
+        
+        profit = (UserStats.won - UserStats.wagered).label('profit')
+        top_profit = {}
+        for game in db.session.execute(select(UserStats.game).distinct()).scalars():
+            top_profit[game] = [
+                {'username': username, 'profit': from_units(value)}
+                for username, value in db.session.execute(
+                    select(User.username, profit)
+                    .join(User, User.id == UserStats.user_id)
+                    .where(UserStats.game == game)
+                    .order_by(profit.desc())
+                    .limit(self.size)
+                )
+            ]
+        
+        biggest_multipliers = db.session.execute(
+            select(User.username, Transaction.game, Transaction.multiplier, Transaction.created_at)
+            .join(User, User.id == Transaction.user_id)
+            .where(Transaction.created_at >= since, Transaction.multiplier > 0)
+            .order_by(Transaction.multiplier.desc())
+            .limit(self.size)
+        ).all()
+        
+        return {
+            'topBalance': [{'username': u, 'balance': from_units(b)} for u, b in top_balance],
+            'topProfit': top_profit,
+            'biggestMultipliers': [{
+                'username': u,
+                'game': g,
+                'multiplier': m,
+                'time': t.isoformat()
+            } for u, g, m, t in biggest_multipliers],
+            'updatedAt': datetime.utcnow().isoformat()
+        }
+    
+    def refresh(self):
+        with self.app.app_context():
+            snapshot = self.build()
+            db.session.remove()
+        with self._lock:
+            self._snapshot = snapshot
+            self._built_at = time.monotonic()
+        return snapshot
+    
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                self.app.logger.exception('Leaderboard refresh failed')
+            time.sleep(self.interval)
+    
+    def start(self):
+        # Started lazily from the first request so each worker process gets
+        # its own thread (threads do not survive a fork)
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='leaderboard', daemon=True)
+            self._thread.start()
+    
+    def get(self):
+        self.start()
+        with self._lock:
+            snapshot = self._snapshot
+            fresh = time.monotonic() - self._built_at < self.ttl
+        if snapshot is None or not fresh:
+            snapshot = self.refresh()
+        return snapshot
@@ -0,0 +1,144 @@
+# Write-behind transaction log (optional, TRANSACTION_LOG=write-behind)
+#
+# By default the wallet writes a bet's Transaction rows and stats in the same
+# commit as the balance change. In write-behind mode only the balance change
+# is committed per bet; the history rows are queued here and a background
+# thread inserts them in bulk (one executemany plus one stats upsert per
+# flush) every `interval` seconds or as soon as `max_rows` are waiting, so
+# the commit rate no longer caps bets per second.
+#
+# The trade-off: /api/history, stats and the leaderboard lag by up to one
+# interval, and rows still queued when the process dies without a clean
+# shutdown are lost (balances are not). On a clean shutdown, and whenever the
+# database rejects a flush for too long, queued rows go to a local spill
+# file that is loaded back on the next start.
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, Transaction
+from metrics import span
+from stats import record_stats_many
+
+class TransactionLog:
+    def __init__(self, app, interval=0.2, max_rows=1000, max_pending=100000,
+                 spill_path='transactions.spill.jsonl'):
+        self.app = app
+        self.interval = interval
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self.spill_path = spill_path
+        self._pending = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+    
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='transaction-log', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+    
+    def append(self, user_id, records, created_at):
+        """Queue the Transaction rows of a committed balance change."""
+        self.start()
+        rows = [dict(record, user_id=user_id, created_at=created_at) for record in records]
+        with self._cond:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.max_rows:
+                self._cond.notify()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_rows or self._closed, self.interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Transaction log flush failed')
+    
+    def flush(self):
+        """Insert every queued row; on failure they are queued again (or
+        spilled once more than max_pending are waiting)."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            
+            try:
+                with self.app.app_context():
+                    _insert(rows)
+                    db.session.remove()
+            except Exception:
+                with self._cond:
+                    self._pending[:0] = rows
+                    if len(self._pending) > self.max_pending:
+                        rows, self._pending = self._pending, []
+                        self.spill(rows)
+                raise
+            return len(rows)
+    
+    def spill(self, rows):
+        with open(self.spill_path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(dict(row, created_at=row['created_at'].isoformat())) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        try:
+            self.flush()
+        except Exception:
+            with self._cond:
+                rows, self._pending = self._pending, []
+            self.spill(rows)
+    
+    def load_spill(self):
+        """Insert the rows spilled by a previous run (call at startup, inside
+        an app context). Returns the number of rows loaded."""
+        # Claim the file first so concurrently starting workers load it once
+        claimed = f'{self.spill_path}.{os.getpid()}'
+        try:
+            os.rename(self.spill_path, claimed)
+        except FileNotFoundError:
+            return 0
+        
+        with open(claimed) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for row in rows:
+            row['created_at'] = datetime.fromisoformat(row['created_at'])
+        try:
+            if rows:
+                _insert(rows)
+        except Exception:
+            # Put the rows back for the next start
+            db.session.rollback()
+            with open(claimed) as src, open(self.spill_path, 'a') as dst:
+                dst.write(src.read())
+            os.remove(claimed)
+            raise
+        os.remove(claimed)
+        return len(rows)
+
+def _insert(rows):
+    records = {}
+    for row in rows:
+        records.setdefault(row['user_id'], []).append(row)
+    
+    db.session.execute(insert(Transaction), rows)
+    record_stats_many(records)
+    with span('commit'):
+        db.session.commit()
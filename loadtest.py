@@ -0,0 +1,141 @@
+# Concurrent-connection load test
+#
+# Registers a throwaway user, holds --streams /api/stream connections open
+# (as many browser tabs would) and, while they are held, times --requests
+# /api/balance calls issued --concurrency at a time. With sync workers every
+# open stream pins a worker, so streams beyond the worker count and the
+# balance calls queue behind them. A gevent worker keeps serving both.
+# Sync workers turn streaming off unless STREAMING=1 is set, as below, to
+# measure exactly that.
+#
+#     STREAMING=1 WORKER_CLASS=sync WEB_CONCURRENCY=2 gunicorn app:app -c gunicorn.conf.py
+#     gunicorn app:app -c gunicorn.conf.py        # gevent, the default
+#     python loadtest.py http://localhost:5000 --streams 500
+#
+# Only the standard library is used, so it runs from any machine.
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+def register(base_url):
+    body = json.dumps({'username': f'load-{uuid.uuid4().hex[:12]}', 'password': uuid.uuid4().hex})
+    request = Request(base_url + '/register', body.encode(), {'Content-Type': 'application/json'})
+    with urlopen(request) as response:
+        return response.headers['Set-Cookie'].split(';', 1)[0]
+
+async def _connect(url, cookie, path):
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    writer.write((
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {url.netloc}\r\n'
+        f'Cookie: {cookie}\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode())
+    await writer.drain()
+    return reader, writer
+
+async def hold_stream(url, cookie, timeout, opened, done):
+    """Open one stream; record how long its first event took, then keep it
+    open until `done` is set."""
+    start = time.perf_counter()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(_connect(url, cookie, '/api/stream'), timeout)
+        await asyncio.wait_for(reader.readuntil(b'event: balance'), timeout)
+        opened.append(time.perf_counter() - start)
+        await done.wait()
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+
+async def get_balance(url, cookie, timeout):
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(_connect(url, cookie, '/api/balance'), timeout)
+        response = await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+    except (OSError, asyncio.TimeoutError):
+        return None
+    if not response.startswith(b'HTTP/1.1 200'):
+        return None
+    return time.perf_counter() - start
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+async def run(options):
+    url = urlsplit(options.url)
+    cookie = register(options.url.rstrip('/'))
+    
+    opened = []
+    done = asyncio.Event()
+    started = time.perf_counter()
+    streams = [
+        asyncio.create_task(hold_stream(url, cookie, options.timeout, opened, done))
+        for _ in range(options.streams)
+    ]
+    
+    # Give the streams time to connect before loading the regular endpoints
+    while len(opened) < options.streams and time.perf_counter() - started < options.timeout:
+        await asyncio.sleep(0.1)
+    connect_time = time.perf_counter() - started
+    
+    semaphore = asyncio.Semaphore(options.concurrency)
+    
+    async def limited():
+        async with semaphore:
+            return await get_balance(url, cookie, options.timeout)
+    
+    requests_started = time.perf_counter()
+    latencies = await asyncio.gather(*[limited() for _ in range(options.requests)])
+    requests_time = time.perf_counter() - requests_started
+    
+    done.set()
+    await asyncio.gather(*streams)
+    
+    ok = [latency for latency in latencies if latency is not None]
+    return {
+        'streams': options.streams,
+        'streamsOpened': len(opened),
+        'streamConnectSeconds': round(connect_time, 3),
+        'firstEventP50': round(percentile(opened, 0.5), 4),
+        'firstEventP99': round(percentile(opened, 0.99), 4),
+        'requests': options.requests,
+        'requestsOk': len(ok),
+        'requestsPerSec': round(len(ok) / requests_time, 1),
+        'latencyP50': round(percentile(ok, 0.5), 4),
+        'latencyP95': round(percentile(ok, 0.95), 4),
+        'latencyP99': round(percentile(ok, 0.99), 4)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Hold SSE connections open and time API calls meanwhile.')
+    parser.add_argument('url', help='base URL of a running server, e.g. http://localhost:5000')
+    parser.add_argument('--streams', type=int, default=200, help='concurrent /api/stream connections')
+    parser.add_argument('--requests', type=int, default=1000, help='/api/balance calls to time')
+    parser.add_argument('--concurrency', type=int, default=50, help='balance calls in flight at once')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds before a connection or call fails')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    options = parser.parse_args()
+    
+    result = asyncio.run(run(options))
+    if options.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"streams   {result['streamsOpened']}/{result['streams']} open after {result['streamConnectSeconds']}s "
+          f"(first event p50 {result['firstEventP50']}s, p99 {result['firstEventP99']}s)")
+    print(f"balance   {result['requestsOk']}/{result['requests']} ok, {result['requestsPerSec']} req/s "
+          f"(p50 {result['latencyP50']}s, p95 {result['latencyP95']}s, p99 {result['latencyP99']}s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+# Request instrumentation
+#
+# Every request is timed (before/after request hooks) and, inside it, the
+# spans that usually dominate a bet: reserving the provably-fair nonce (rng),
+# resolving the game (game), the SQL statements run (sql), the commit
+# (commit), encoding the JSON response (json) and, on login and registration,
+# waiting for the password hash (hash). Durations go into
+# in-process histograms labelled by route template and span (and by game for
+# game resolution), served in the Prometheus text format on /metrics. Spans
+# overlap: sql counts every statement, including those run inside rng.
+#
+# Like the event bus, the histograms are per process: scrape each worker, or
+# run the single worker gunicorn.conf.py defaults to.
+#
+# The sampling profiler (PROFILER=1, or POST /metrics/profile) interrupts the
+# process every `interval` seconds of CPU time and counts the stack it
+# stopped in; /metrics/profile returns the counts as folded stacks, the input
+# format of flamegraph.pl and speedscope.
+import bisect
+import os
+import signal
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class Histogram:
+    def __init__(self, name, description, labels, buckets=BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+        for label_values, counts, total in series:
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = _labels(('le',), (str(bound),))
+                lines.append(f'{self.name}_bucket{_join(labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_join(labels)} {total}')
+            lines.append(f'{self.name}_count{_join(labels)} {cumulative}')
+        return lines
+
+class Gauge:
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def add(self, amount):
+        with self._lock:
+            self.value += amount
+    
+    def render(self):
+        return [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} gauge', f'{self.name} {self.value}']
+
+def _labels(names, values):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+def _join(*labels):
+    labels = ','.join(label for label in labels if label)
+    return f'{{{labels}}}' if labels else ''
+
+class Metrics:
+    def __init__(self):
+        self.enabled = True
+        self.requests = Histogram(
+            'casino_http_request_duration_seconds',
+            'Time from the first request hook to the response.',
+            ('method', 'route', 'status')
+        )
+        self.in_flight = Gauge('casino_http_requests_in_flight', 'Requests being handled.')
+        self.spans = Histogram(
+            'casino_span_duration_seconds',
+            'Time spent in rng, game, sql, commit, json and hash per request (background work has route "").',
+            ('route', 'span')
+        )
+        self.games = Histogram(
+            'casino_game_duration_seconds',
+            'Time to resolve one game action (a batch counts once).',
+            ('game',)
+        )
+    
+    @contextmanager
+    def span(self, name, game=None):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.spans.observe(elapsed, _route(), name)
+            if game is not None:
+                self.games.observe(elapsed, game)
+    
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.in_flight, self.spans, self.games):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.json = TimedJSONProvider(app)
+    
+    def instrument_engine(self, engine):
+        """Time every SQL statement run on the engine (span 'sql', summed
+        per request)."""
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    
+    def _before_request(self):
+        if not self.enabled:
+            return
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql = 0.0
+        self.in_flight.add(1)
+    
+    def _after_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            self.requests.observe(time.perf_counter() - start, request.method, _route(), str(response.status_code))
+            if g.metrics_sql:
+                self.spans.observe(g.metrics_sql, _route(), 'sql')
+        return response
+    
+    def _teardown_request(self, exc):
+        if g.pop('metrics_sql', None) is not None:
+            self.in_flight.add(-1)
+
+def _route():
+    if not has_request_context():
+        return ''
+    # The rule template, so /api/play/<game>/batch is one series however
+    # many games are played through it
+    return request.url_rule.rule if request.url_rule else '<unmatched>'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_start'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_start']
+    if not registry.enabled:
+        return
+    if has_request_context() and 'metrics_sql' in g:
+        g.metrics_sql += elapsed
+    else:
+        registry.spans.observe(elapsed, '', 'sql')
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with registry.span('json'):
+            return super().dumps(obj, **kwargs)
+
+class SamplingProfiler:
+    """Counts the Python stacks the process is in, sampled on SIGPROF.
+    
+    The signal is delivered to the main thread, which under the gevent worker
+    runs every request; with thread-based workers only the main thread is
+    sampled. It must be started from the main thread.
+    """
+    
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = defaultdict(int)
+        self.running = False
+        self._previous = None
+    
+    def start(self):
+        if self.running:
+            return
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+    
+    def stop(self):
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+        self.running = False
+    
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        self.samples[';'.join(reversed(stack))] += 1
+    
+    def folded(self, reset=False):
+        samples = dict(self.samples)
+        if reset:
+            self.samples.clear()
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(samples.items(), key=lambda s: -s[1]))
+
+registry = Metrics()
+span = registry.span
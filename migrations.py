@@ -0,0 +1,66 @@
+# Schema migrations run at startup
+#
+# db.create_all() only creates missing tables; changes to existing ones are
+# applied here, each guarded so it runs once.
+from sqlalchemy import inspect, text
+from sqlalchemy.types import Float
+from models import db, Transaction
+from money import UNIT
+from stats import rebuild_stats
+
+# (table, columns) holding amounts, Float before money.py
+AMOUNT_COLUMNS = [
+    ('user', ('balance',)),
+    ('transaction', ('bet_amount', 'win_amount')),
+    ('user_stats', ('wagered', 'won'))
+]
+
+def amounts_are_floats():
+    columns = {c['name']: c['type'] for c in inspect(db.engine).get_columns('user')}
+    return isinstance(columns['balance'], Float)
+
+def migrate_amounts_to_units():
+    """Convert euro floats to integer cents. Returns True if it ran."""
+    if not amounts_are_floats():
+        return False
+    
+    if db.engine.dialect.name == 'postgresql':
+        for table, columns in AMOUNT_COLUMNS:
+            db.session.execute(text(f'ALTER TABLE "{table}" ' + ', '.join(
+                f'ALTER COLUMN {column} TYPE BIGINT USING round({column} * {UNIT})'
+                for column in columns
+            )))
+        db.session.commit()
+    else:
+        _rebuild_sqlite_tables()
+    
+    # Rounded per row, so sum the ledger again rather than round the sums
+    if db.session.query(Transaction.id).first():
+        rebuild_stats()
+    return True
+
+def _rebuild_sqlite_tables():
+    # SQLite cannot change a column's type: move each table aside, create it
+    # from the models and copy the rows over
+    tables = [db.metadata.tables[table] for table, _ in AMOUNT_COLUMNS]
+    with db.engine.begin() as connection:
+        # Keep other tables' foreign keys pointing at "user", not "user_float"
+        connection.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+        for table in tables:
+            for index in table.indexes:
+                connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index.name}"')
+            connection.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{table.name}_float"')
+        db.metadata.create_all(connection, tables=tables)
+        for (name, amounts), table in zip(AMOUNT_COLUMNS, tables):
+            columns = [f'"{column.name}"' for column in table.columns]
+            values = [
+                f'CAST(ROUND("{column.name}" * {UNIT}) AS INTEGER)' if column.name in amounts else f'"{column.name}"'
+                for column in table.columns
+            ]
+            connection.exec_driver_sql(
+                f'INSERT INTO "{name}" ({", ".join(columns)}) '
+                f'SELECT {", ".join(values)} FROM "{name}_float"'
+            )
+        for table in reversed(tables):
+            connection.exec_driver_sql(f'DROP TABLE "{table.name}_float"')
+        connection.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
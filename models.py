@@ -0,0 +1,71 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from money import STARTING_BALANCE
+
+db = SQLAlchemy()
+
+# Models
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    # Hashed and checked off the request path by passwords.PasswordHasher
+    password_hash = db.Column(db.String(200), nullable=False)
+    # Amounts are in cents (see money.py)
+    balance = db.Column(db.BigInteger, default=STARTING_BALANCE)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Transaction(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    game = db.Column(db.String(50), nullable=False)
+    bet_amount = db.Column(db.BigInteger, nullable=False)
+    win_amount = db.Column(db.BigInteger, nullable=False)
+    multiplier = db.Column(db.Float, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_transaction_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_transaction_created', 'created_at'),
+    )
+
+class GameState(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    game = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    # Random per write, for compare-and-set (see gamestate.py)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    game = db.Column(db.String(50), primary_key=True)
+    bets = db.Column(db.Integer, nullable=False, default=0)
+    wagered = db.Column(db.BigInteger, nullable=False, default=0)
+    won = db.Column(db.BigInteger, nullable=False, default=0)
+    max_multiplier = db.Column(db.Float, nullable=False, default=0)
+
+class FairSeed(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    server_seed = db.Column(db.String(64), nullable=False)
+    server_seed_hash = db.Column(db.String(64), nullable=False)
+    client_seed = db.Column(db.String(64), nullable=False)
+    nonce = db.Column(db.Integer, nullable=False, default=0)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    revealed_at = db.Column(db.DateTime)
+
+class CrashBet(db.Model):
+    # A live crash stake taken and not settled yet (see crash_rounds.py)
+    round_id = db.Column(db.Integer, db.ForeignKey('crash_round.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    bet_amount = db.Column(db.BigInteger, nullable=False)
+
+class CrashRound(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    server_seed = db.Column(db.String(64), nullable=False)
+    server_seed_hash = db.Column(db.String(64), nullable=False)
+    crash_point = db.Column(db.Float)
+    players = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    crashed_at = db.Column(db.DateTime)
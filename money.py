@@ -0,0 +1,45 @@
+# Money
+#
+# Balances and bet/win amounts are integers in minor units (cents), in the
+# database and everywhere on the server, so settlement and SUM() aggregates
+# are exact. Amounts are converted from the client's euros on the way in
+# (to_units) and back on the way out (from_units); payouts are rounded down
+# to the cent in the house's favour. Stakes go through to_stake, which only
+# takes positive amounts: a negative debit would credit the player.
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, ROUND_FLOOR
+
+UNIT = 100
+
+STARTING_BALANCE = 1000 * UNIT
+
+def to_units(amount):
+    """Euros (number or numeric string from a request) -> cents."""
+    try:
+        amount = Decimal(str(amount))
+    except InvalidOperation:
+        raise ValueError(f'invalid amount {amount!r}')
+    if not amount.is_finite():
+        raise ValueError(f'invalid amount {amount}')
+    return int((amount * UNIT).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+class InvalidBet(ValueError):
+    """A stake that is not a positive amount."""
+
+def to_stake(amount):
+    """A bet from a request -> cents; raises InvalidBet unless it is positive."""
+    try:
+        units = to_units(amount)
+    except ValueError as e:
+        raise InvalidBet(str(e))
+    if units <= 0:
+        raise InvalidBet('bet must be positive')
+    return units
+
+def from_units(units):
+    """Cents -> euros for JSON responses."""
+    return units / UNIT
+
+def payout(bet_units, multiplier):
+    """bet x multiplier in cents, rounded down. The multiplier goes through
+    its decimal repr, so 1.1 x 100 is 110 and not 110.00000000000001."""
+    return int((bet_units * Decimal(repr(float(multiplier)))).to_integral_value(rounding=ROUND_FLOOR))
@@ -0,0 +1,89 @@
+# Password hashing off the request path
+#
+# Werkzeug's scrypt takes tens of milliseconds of CPU per hash by design.
+# Computed inline, every login and registration held its worker for that long,
+# and under the gevent worker stalled every other request of the process with
+# it. Hashes are now computed in a small process pool: the request waits on
+# the result (yielding to other greenlets) while a pool process does the work.
+#
+# The queue is bounded: with `max_pending` hashes already queued or running,
+# a new one is refused with HasherBusy (the routes answer 503) instead of
+# piling up behind a burst of logins. The hash method and its parameters are
+# configurable (Werkzeug's "scrypt:n:r:p" / "pbkdf2:sha256:iterations"
+# strings); hashes made with other parameters are upgraded on the next login.
+#
+# Returning users skip the hash entirely with a remember-me token (auth.py).
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+class HasherBusy(Exception):
+    """The pool cannot take or finish the hash now; try again later."""
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=32, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    def _executor(self):
+        # Created on first use, so each gunicorn worker gets its own pool
+        # after the fork. Forked, not spawned: a spawned process re-imports
+        # the main module, which under `python app.py` is the whole app. The
+        # forked processes only ever run the hash functions.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'))
+        return self._pool
+    
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherBusy('too many hashes queued')
+            self._pending += 1
+        try:
+            future = self._executor().submit(fn, *args)
+        except BrokenProcessPool:
+            self._done(None)
+            self._pool = None
+            raise HasherBusy('hash pool restarting')
+        # Counted until the hash finishes, even if the request stops waiting
+        future.add_done_callback(self._done)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            raise HasherBusy('hash timed out')
+        except BrokenProcessPool:
+            # A pool process died; the next hash starts a new pool
+            self._pool = None
+            raise HasherBusy('hash pool restarting')
+    
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+    
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+    
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash):
+        """Whether a hash was made with another method or other parameters."""
+        method = password_hash.split('$', 1)[0]
+        return method != self.method and not method.startswith(self.method + ':')
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
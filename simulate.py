@@ -0,0 +1,186 @@
+# Monte Carlo RTP / house-edge simulation
+#
+# Plays millions of rounds of every game through the same modules the routes
+# use (the games package) without Flask or a database and
+# reports, per game and parameter set, the return to player (mean payout
+# multiplier), its standard deviation, a 95% confidence interval and the
+# simulation speed. Rounds are drawn in vectorized chunks and the chunks can
+# be spread over several processes.
+#
+#     python simulate.py                          # every scenario, 10^7 rounds each
+#     python simulate.py --games dice limbo --rounds 1000000 --workers 4
+#     python simulate.py --json > rtp.json
+import argparse
+import json
+import math
+import time
+from multiprocessing import Pool
+import numpy as np
+import games
+from games import mines, crash, pump, blackjack, blackjack_ev
+
+CHUNK = 1_000_000
+
+# Payout multipliers of k rounds; each takes (rng, k, *params). A game whose
+# stake can grow during a round (blackjack) returns (wins, stakes) instead,
+# in units of the opening bet
+
+def _instant(game):
+    def payouts(rng, k, *params):
+        return games.draw(game, k, *params, rng=rng)['multiplier']
+    return payouts
+
+def _crash(rng, k, cashout):
+    return crash.play_many(k, cashout, rng)['multiplier']
+
+def _pump(rng, k, cashout):
+    # The player cashes out at `cashout` if the balloon has not popped before
+    points = pump.pop_points(k, rng)
+    return np.where(cashout < points, cashout, 0.0)
+
+def _mines(rng, k, num_mines, gems):
+    # Mines are a uniform random subset of the 25 tiles; by symmetry the
+    # player reveals tiles 0..gems-1 and wins if none of them is a mine
+    positions = np.argsort(rng.random((k, mines.GRID_SIZE)), axis=1)[:, :num_mines]
+    safe = positions.min(axis=1) >= gems
+    return np.where(safe, mines.multiplier(num_mines, gems), 0.0)
+
+def _blackjack(rng, k, strategy):
+    # Not vectorizable: play each round from one shoe with the route's rules,
+    # the player declining insurance and either following the hints
+    # (strategy 'hint': hit, stand, double or split, see games/blackjack_ev.py)
+    # or never doubling or splitting and hitting below `strategy`
+    wins = np.empty(k)
+    stakes = np.empty(k)
+    shoe = {'cards': blackjack.shuffle_shoe(rng), 'position': 0}
+    for i in range(k):
+        if blackjack.needs_shuffle(shoe):
+            shoe = {'cards': blackjack.shuffle_shoe(rng), 'position': 0}
+        game = blackjack.deal(1.0, shoe)
+        if game['phase'] == 'insurance':
+            blackjack.insurance(game, 0)
+        while game['phase'] == 'player':
+            if strategy == 'hint':
+                action = blackjack_ev.hint(game)['action']
+            else:
+                action = 'hit' if blackjack.score(blackjack.active_hand(game)) < strategy else 'stand'
+            getattr(blackjack, action)(game)
+        outcomes, _ = blackjack.results(game)
+        wins[i] = sum(hand['bet'] * multiplier for hand, (_, multiplier) in zip(game['hands'], outcomes))
+        stakes[i] = sum(hand['bet'] for hand in game['hands'])
+    return wins, stakes
+
+GAMES = {
+    'plinko': _instant('plinko'),
+    'dice': _instant('dice'),
+    'limbo': _instant('limbo'),
+    'roulette': _instant('roulette'),
+    'crash': _crash,
+    'pump': _pump,
+    'mines': _mines,
+    'blackjack': _blackjack
+}
+
+SCENARIOS = [
+    ('plinko', ('low', 16)),
+    ('plinko', ('medium', 16)),
+    ('plinko', ('high', 16)),
+    ('plinko', ('high', 8)),
+    ('dice', (50.0, True)),
+    ('dice', (90.0, True)),
+    ('dice', (10.0, False)),
+    ('limbo', (1.5,)),
+    ('limbo', (2.0,)),
+    ('limbo', (10.0,)),
+    ('limbo', (50.0,)),
+    ('roulette', ('red',)),
+    ('roulette', ('even',)),
+    ('roulette', ('high',)),
+    ('roulette', ('dozen1',)),
+    ('crash', (1.5,)),
+    ('crash', (2.0,)),
+    ('crash', (10.0,)),
+    ('pump', (1.5,)),
+    ('pump', (3.0,)),
+    ('mines', (1, 5)),
+    ('mines', (3, 3)),
+    ('mines', (5, 10)),
+    ('mines', (24, 1)),
+    ('blackjack', (17,)),
+    ('blackjack', (13,)),
+    ('blackjack', ('hint',))
+]
+
+# The scalar blackjack loop is ~100x slower than the vectorized games; cap its rounds
+BLACKJACK_MAX_ROUNDS = 200_000
+
+def _run_chunk(job):
+    game, params, k, seed = job
+    wins = GAMES[game](np.random.default_rng(seed), k, *params)
+    stakes = np.ones(k)
+    if isinstance(wins, tuple):
+        wins, stakes = wins
+    return len(wins), float(wins.sum()), float(np.square(wins).sum()), \
+        float(stakes.sum()), float(np.square(stakes).sum()), float((wins * stakes).sum())
+
+def simulate(game, params, rounds, workers=1, seed=None, pool=None):
+    chunks = [CHUNK] * (rounds // CHUNK) + ([rounds % CHUNK] if rounds % CHUNK else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    jobs = [(game, params, k, s) for k, s in zip(chunks, seeds)]
+    
+    start = time.perf_counter()
+    results = pool.map(_run_chunk, jobs) if pool else [_run_chunk(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+    
+    n, total, total_sq, staked, staked_sq, cross = (sum(r[i] for r in results) for i in range(6))
+    # Returned per unit staked; with unit stakes these are the plain mean
+    # and variance of the payouts
+    rtp = total / staked
+    stake = staked / n
+    variance = max((total_sq - 2 * rtp * cross + rtp ** 2 * staked_sq) / n, 0.0) / stake ** 2
+    margin = 1.96 * math.sqrt(variance / n)
+    
+    return {
+        'game': game,
+        'params': list(params),
+        'rounds': n,
+        'rtp': rtp,
+        'houseEdge': 1.0 - rtp,
+        'stdev': math.sqrt(variance),
+        'ci95': [rtp - margin, rtp + margin],
+        'roundsPerSec': n / elapsed if elapsed else float('inf')
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo RTP simulation of every game.')
+    parser.add_argument('--games', nargs='*', choices=sorted(GAMES), help='only these games')
+    parser.add_argument('--rounds', type=int, default=10_000_000, help='rounds per scenario')
+    parser.add_argument('--workers', type=int, default=1, help='processes to spread chunks over')
+    parser.add_argument('--seed', type=int, help='seed for reproducible runs')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    options = parser.parse_args()
+    
+    scenarios = [s for s in SCENARIOS if not options.games or s[0] in options.games]
+    pool = Pool(options.workers) if options.workers > 1 else None
+    
+    results = []
+    try:
+        for game, params in scenarios:
+            rounds = options.rounds
+            if game == 'blackjack':
+                rounds = min(rounds, BLACKJACK_MAX_ROUNDS)
+            result = simulate(game, params, rounds, options.workers, options.seed, pool)
+            results.append(result)
+            if not options.json:
+                print(f"{game:<10} {str(tuple(params)):<14} rounds={result['rounds']:>10,} "
+                      f"rtp={result['rtp']:.4f} ({result['ci95'][0]:.4f}-{result['ci95'][1]:.4f}) "
+                      f"stdev={result['stdev']:.3f} {result['roundsPerSec']:>12,.0f} rounds/s", flush=True)
+    finally:
+        if pool:
+            pool.close()
+    
+    if options.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
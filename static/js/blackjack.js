@@ -45,13 +45,32 @@ function getBlackJackHTML() {
                     <button class="btn-play" id="bj-deal">Distribuer</button>
                 </div>
                 
+                <div id="bj-insurance-controls" style="display: none;">
+                    <div style="margin-bottom: 10px; color: var(--text-secondary);">Le croupier montre un As. Assurance ?</div>
+                    <button class="btn-play" id="bj-insurance-yes" style="background: linear-gradient(135deg, var(--accent-blue), #2563eb); margin-bottom: 10px;">
+                        🛡️ Prendre l'assurance
+                    </button>
+                    <button class="btn-play" id="bj-insurance-no" style="background: linear-gradient(135deg, var(--accent-yellow), #f59e0b);">
+                        Refuser
+                    </button>
+                </div>
+                
                 <div id="bj-game-controls" style="display: none;">
                     <button class="btn-play" id="bj-hit" style="background: linear-gradient(135deg, var(--accent-blue), #2563eb); margin-bottom: 10px;">
                         👆 Tirer une carte
                     </button>
-                    <button class="btn-play" id="bj-stand" style="background: linear-gradient(135deg, var(--accent-yellow), #f59e0b);">
+                    <button class="btn-play" id="bj-stand" style="background: linear-gradient(135deg, var(--accent-yellow), #f59e0b); margin-bottom: 10px;">
                         ✋ Rester
                     </button>
+                    <button class="btn-play" id="bj-double" style="background: linear-gradient(135deg, #8b5cf6, #7c3aed); margin-bottom: 10px;">
+                        ✖️2 Doubler
+                    </button>
+                    <button class="btn-play" id="bj-split" style="background: linear-gradient(135deg, #ec4899, #db2777); margin-bottom: 10px;">
+                        ✂️ Séparer
+                    </button>
+                    <button class="btn-play" id="bj-hint" style="background: var(--bg-tertiary);">
+                        💡 Conseil
+                    </button>
                 </div>
             </div>
         </div>
@@ -103,10 +122,14 @@ function showBlackJackRules() {
                         <ul style="margin-left: 20px; margin-top: 5px;">
                             <li><strong>Tirer</strong> : prendre une carte supplémentaire</li>
                             <li><strong>Rester</strong> : conserver votre main</li>
+                            <li><strong>Doubler</strong> : doubler la mise sur vos deux premières cartes et recevoir une seule carte</li>
+                            <li><strong>Séparer</strong> : jouer une paire en deux mains (jusqu'à 4), avec une mise par main</li>
                         </ul>
                     </li>
+                    <li>Si le croupier montre un As, vous pouvez prendre une assurance (la moitié de la mise, payée 2:1 s'il a un BlackJack)</li>
                     <li>Si vous dépassez 21, vous perdez (Bust)</li>
-                    <li>Le croupier tire jusqu'à atteindre 17+</li>
+                    <li>Le croupier tire jusqu'à atteindre 17+ (il reste sur 17 souple)</li>
+                    <li>Les cartes viennent d'un sabot de 6 jeux, mélangé à nouveau à la carte de coupe</li>
                     <li>Le plus proche de 21 gagne !</li>
                 </ol>
                 
@@ -154,17 +177,16 @@ async function dealBlackJack() {
         }
         
         bjGameActive = true;
-        currentBalance = data.balance;
-        updateBalanceDisplay();
-        
-        document.getElementById('bj-bet-controls').style.display = 'none';
-        document.getElementById('bj-game-controls').style.display = 'block';
-        
-        displayBlackJackHand(data.playerHand, data.dealerHand, data.playerScore, data.dealerScore, true);
         document.getElementById('game-message').textContent = '';
+        document.getElementById('bj-hit').onclick = () => playBlackJack('hit');
+        document.getElementById('bj-stand').onclick = () => playBlackJack('stand');
+        document.getElementById('bj-double').onclick = () => playBlackJack('double');
+        document.getElementById('bj-split').onclick = () => playBlackJack('split');
+        document.getElementById('bj-hint').onclick = showBlackJackHint;
+        document.getElementById('bj-insurance-yes').onclick = () => playBlackJack('insurance', {take: true});
+        document.getElementById('bj-insurance-no').onclick = () => playBlackJack('insurance', {take: false});
         
-        document.getElementById('bj-hit').onclick = () => hitBlackJack(bet);
-        document.getElementById('bj-stand').onclick = () => standBlackJack(bet);
+        showBlackJackRound(data);
         
     } catch (error) {
         console.error('Error:', error);
@@ -172,57 +194,92 @@ async function dealBlackJack() {
     }
 }
 
-async function hitBlackJack(bet) {
+async function playBlackJack(action, extra = {}) {
     try {
         const response = await fetch('/api/play/blackjack', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({action: 'hit'})
+            body: JSON.stringify({action, ...extra})
         });
         
         const data = await response.json();
         
-        displayBlackJackHand(data.playerHand, data.dealerHand, data.playerScore, data.dealerScore, true);
-        
-        if (data.gameOver) {
-            endBlackJack(data, bet);
+        if (data.error) {
+            showNotification(data.error, 'error');
+            return;
         }
         
+        showBlackJackRound(data);
+        
     } catch (error) {
         console.error('Error:', error);
     }
 }
 
-async function standBlackJack(bet) {
+function showBlackJackRound(data) {
+    if (data.balance !== undefined) {
+        currentBalance = data.balance;
+        updateBalanceDisplay();
+    }
+    
+    displayBlackJackHands(data);
+    
+    if (data.gameOver) {
+        endBlackJack(data);
+        return;
+    }
+    
+    document.getElementById('bj-bet-controls').style.display = 'none';
+    document.getElementById('bj-insurance-controls').style.display = data.insuranceOffered ? 'block' : 'none';
+    document.getElementById('bj-game-controls').style.display = data.insuranceOffered ? 'none' : 'block';
+    document.getElementById('bj-double').style.display = data.canDouble ? 'block' : 'none';
+    document.getElementById('bj-split').style.display = data.canSplit ? 'block' : 'none';
+}
+
+const BJ_ACTION_NAMES = {hit: 'Tirer', stand: 'Rester', double: 'Doubler', split: 'Séparer'};
+
+async function showBlackJackHint() {
     try {
-        const response = await fetch('/api/play/blackjack', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({action: 'stand'})
-        });
-        
+        const response = await fetch('/api/blackjack/hint');
         const data = await response.json();
         
-        displayBlackJackHand(data.playerHand, data.dealerHand, data.playerScore, data.dealerScore, false);
-        endBlackJack(data, bet);
+        if (data.error) {
+            showNotification(data.error, 'error');
+            return;
+        }
         
+        // Expected gain per unit of the hand's bet
+        const ev = data.ev[data.action];
+        showNotification(`Conseil : ${BJ_ACTION_NAMES[data.action]} (espérance ${ev >= 0 ? '+' : ''}${(ev * 100).toFixed(1)} %)`, 'info');
     } catch (error) {
         console.error('Error:', error);
     }
 }
 
-function displayBlackJackHand(playerHand, dealerHand, playerScore, dealerScore, hideDealer) {
+function displayBlackJackHands(data) {
     const playerCardsDiv = document.getElementById('player-cards');
     const dealerCardsDiv = document.getElementById('dealer-cards');
     
-    playerCardsDiv.innerHTML = playerHand.map(card => createCardHTML(card)).join('');
-    dealerCardsDiv.innerHTML = dealerHand.map((card, i) => {
-        if (hideDealer && i === 1) return createCardHTML('??');
-        return createCardHTML(card);
+    // Until the round is over only the dealer's up card is sent
+    const dealerHand = data.gameOver ? data.dealerHand : [...data.dealerHand, '??'];
+    dealerCardsDiv.innerHTML = dealerHand.map(card => createCardHTML(card)).join('');
+    document.getElementById('dealer-score').textContent = data.dealerScore;
+    
+    const hands = data.hands || [{cards: data.playerHand, score: data.playerScore}];
+    const split = hands.length > 1;
+    playerCardsDiv.innerHTML = hands.map((hand, i) => {
+        const active = split && !data.gameOver && i === data.activeHand;
+        const label = split ? `<div style="font-size: 12px; color: var(--text-muted); width: 100%;">Main ${i + 1} · ${hand.score}${hand.doubled ? ' · doublée' : ''}${hand.result ? ' · ' + hand.result : ''}</div>` : '';
+        return `
+            <div style="display: flex; flex-wrap: wrap; gap: 6px; padding: 6px; border-radius: 10px; border: 2px solid ${active ? 'var(--accent-green)' : 'transparent'};">
+                ${label}
+                ${hand.cards.map(card => createCardHTML(card)).join('')}
+            </div>
+        `;
     }).join('');
     
-    document.getElementById('player-score').textContent = playerScore;
-    document.getElementById('dealer-score').textContent = hideDealer ? '?' : dealerScore;
+    const scores = hands.map(hand => hand.soft && hand.score < 21 ? `${hand.score - 10}/${hand.score}` : hand.score);
+    document.getElementById('player-score').textContent = scores.join(' | ');
 }
 
 function createCardHTML(card) {
@@ -234,18 +291,20 @@ function createCardHTML(card) {
     `;
 }
 
-function endBlackJack(data, bet) {
+function endBlackJack(data) {
     bjGameActive = false;
     
     currentBalance = data.balance;
     updateBalanceDisplay();
-    loadHistory();
+    showLiveHistory();
     
     const messageDiv = document.getElementById('game-message');
+    const staked = data.hands.reduce((sum, hand) => sum + hand.bet, 0) + data.insurance;
+    const blackjack = data.hands.length === 1 && data.hands[0].result === 'blackjack';
     
     if (data.result === 'win') {
-        messageDiv.innerHTML = `<span style="color: var(--accent-green);">✅ Vous gagnez !</span>`;
-        const profit = data.win - bet;
+        messageDiv.innerHTML = `<span style="color: var(--accent-green);">${blackjack ? '🃏 BlackJack !' : '✅ Vous gagnez !'}</span>`;
+        const profit = data.win - staked;
         showNotification(`Gagné ! +${formatMoney(profit)}`, 'success');
     } else if (data.result === 'lose') {
         messageDiv.innerHTML = `<span style="color: var(--accent-red);">❌ Vous perdez !</span>`;
@@ -255,6 +314,7 @@ function endBlackJack(data, bet) {
         showNotification('Égalité !', 'info');
     }
     
+    document.getElementById('bj-insurance-controls').style.display = 'none';
     document.getElementById('bj-game-controls').style.display = 'none';
     document.getElementById('bj-bet-controls').style.display = 'block';
 }
@@ -1,4 +1,40 @@
 // Balance Chart Popup
+const CHART_PAGE_SIZE = 200;
+const CHART_MAX_TRANSACTIONS = 1000;
+
+// Transactions fetched for the chart, newest first; kept up to date from the
+// event stream so reopening the chart does not re-fetch the history
+let chartHistory = null;
+
+function addChartHistory(transactions) {
+    if (chartHistory) {
+        chartHistory = transactions.concat(chartHistory).slice(0, CHART_MAX_TRANSACTIONS);
+    }
+}
+
+function resetChartHistory() {
+    chartHistory = null;
+}
+
+async function loadChartHistory() {
+    if (chartHistory) return chartHistory;
+    
+    let transactions = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams({limit: CHART_PAGE_SIZE});
+        if (cursor) params.set('cursor', cursor);
+        
+        const response = await fetch(`/api/history?${params}`);
+        const data = await response.json();
+        transactions = transactions.concat(data.transactions);
+        cursor = data.nextCursor;
+    } while (cursor && transactions.length < CHART_MAX_TRANSACTIONS);
+    
+    chartHistory = transactions;
+    return chartHistory;
+}
+
 function createBalanceChart() {
     const overlay = document.createElement('div');
     overlay.id = 'balance-chart-overlay';
@@ -84,27 +120,27 @@ async function drawBalanceChart(canvas) {
     const width = canvas.width;
     const height = canvas.height;
     
-    // Get transaction history
-    let transactions = [];
+    // Get transaction history, newest first
+    let transactions;
     try {
-        const response = await fetch('/api/history');
-        transactions = await response.json();
+        transactions = await loadChartHistory();
     } catch (error) {
         console.error('Error loading history:', error);
         return;
     }
     
-    // Calculate balance over time (starting from 1000)
-    let balanceHistory = [{balance: 1000, time: 0}];
-    let runningBalance = 1000;
+    // Calculate balance over time, walking back from the current balance
+    let runningBalance = currentBalance;
+    let balanceHistory = [{balance: runningBalance, time: transactions.length}];
     
-    transactions.reverse().forEach((tx, index) => {
-        runningBalance = runningBalance - tx.bet + tx.win;
+    transactions.forEach((tx, index) => {
+        runningBalance = runningBalance + tx.bet - tx.win;
         balanceHistory.push({
             balance: runningBalance,
-            time: index + 1
+            time: transactions.length - index - 1
         });
     });
+    balanceHistory.reverse();
     
     if (balanceHistory.length < 2) {
         // Not enough data
@@ -252,7 +252,7 @@ async function cashoutChicken() {
         setTimeout(() => {
             currentBalance = data.balance;
             updateBalanceDisplay();
-            loadHistory();
+            showLiveHistory();
             
             endChickenGame();
             
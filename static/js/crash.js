@@ -12,6 +12,14 @@ function getCrashHTML() {
             </div>
             
             <div class="controls-panel">
+                <div class="control-group">
+                    <label class="control-label">Mode</label>
+                    <select class="control-select" id="crash-mode">
+                        <option value="solo">Solo</option>
+                        <option value="live">Live (multijoueur)</option>
+                    </select>
+                </div>
+                
                 <div class="control-group">
                     <label class="control-label">Mise</label>
                     <input type="number" class="control-input" id="crash-bet" value="10" min="1" step="1">
@@ -28,6 +36,11 @@ function getCrashHTML() {
                     <div style="font-size: 12px; color: var(--text-muted); margin-bottom: 8px;">Derniers crashs</div>
                     <div id="crash-history" style="display: flex; gap: 6px; flex-wrap: wrap;"></div>
                 </div>
+                
+                <div id="crash-players-panel" style="display: none; margin-top: 12px; padding: 16px; background: var(--bg-secondary); border: 1px solid var(--border-color); border-radius: 8px;">
+                    <div style="font-size: 12px; color: var(--text-muted); margin-bottom: 8px;">Joueurs</div>
+                    <div id="crash-players" style="display: flex; flex-direction: column; gap: 4px; font-size: 13px;"></div>
+                </div>
             </div>
         </div>
     `;
@@ -35,13 +48,28 @@ function getCrashHTML() {
 
 let crashCanvas, crashCtx;
 let crashHistory = [];
+let crashLive = null;
 
 function initCrash() {
     crashCanvas = document.getElementById('crash-canvas');
     crashCtx = crashCanvas.getContext('2d');
     
     const playBtn = document.getElementById('crash-play');
-    playBtn.addEventListener('click', playCrash);
+    playBtn.addEventListener('click', () => crashLive ? crashLiveAction() : playCrash());
+    
+    // Live rounds need the event stream
+    if (!STREAMING) document.querySelector('#crash-mode option[value="live"]').remove();
+    
+    document.getElementById('crash-mode').addEventListener('change', (e) => {
+        stopCrashLive();
+        if (e.target.value === 'live') {
+            startCrashLive();
+        } else {
+            drawCrashBoard();
+            playBtn.disabled = false;
+            playBtn.textContent = 'Jouer';
+        }
+    });
     
     drawCrashBoard();
     generateCrashHistory();
@@ -64,7 +92,7 @@ function updateCrashHistory() {
     }).join('');
 }
 
-function drawCrashBoard(currentMultiplier = 1.00) {
+function drawCrashBoard(currentMultiplier = 1.00, caption = null) {
     const width = crashCanvas.width;
     const height = crashCanvas.height;
     
@@ -99,6 +127,12 @@ function drawCrashBoard(currentMultiplier = 1.00) {
     crashCtx.font = 'bold 64px Inter';
     crashCtx.textAlign = 'center';
     crashCtx.fillText(`${currentMultiplier.toFixed(2)}x`, width / 2, height / 2);
+    
+    if (caption) {
+        crashCtx.fillStyle = '#7e8a9d';
+        crashCtx.font = '20px Inter';
+        crashCtx.fillText(caption, width / 2, height / 2 + 48);
+    }
 }
 
 async function playCrash() {
@@ -135,7 +169,8 @@ async function playCrash() {
         }
         
         // Animate crash
-        await animateCrash(data.path, data.crashPoint, data.won, data.multiplier);
+        const path = expandCrashPath(data.curve, data.crashPoint);
+        await animateCrash(path, data.crashPoint, data.won, data.multiplier);
         
         // Update history
         crashHistory.push(data.crashPoint);
@@ -144,7 +179,7 @@ async function playCrash() {
         // Update balance
         currentBalance = data.balance;
         updateBalanceDisplay();
-        loadHistory();
+        showLiveHistory();
         
         if (data.won) {
             const profit = data.win - bet;
@@ -163,6 +198,28 @@ async function playCrash() {
     }
 }
 
+// Expand the step schedule sent by the server into the points of the climb
+// (same loop as crash_path() in crash.py)
+function expandCrashPath(curve, crashPoint) {
+    const schedule = curve.schedule;
+    const path = [];
+    let current = curve.start;
+    let step = schedule[0][1];
+    
+    while (current < crashPoint) {
+        path.push(Math.round(current * 100) / 100);
+        current += step;
+        for (let i = 1; i < schedule.length; i++) {
+            if (current > schedule[i][0]) {
+                step = schedule[i][1];
+            }
+        }
+    }
+    
+    path.push(crashPoint);
+    return path;
+}
+
 async function animateCrash(path, crashPoint, won, cashedOut) {
     return new Promise(resolve => {
         const width = crashCanvas.width;
@@ -248,3 +305,167 @@ async function animateCrash(path, crashPoint, won, cashedOut) {
         animate();
     });
 }
+
+// Live mode: shared rounds driven by the server (/api/crash/live/stream).
+// The multiplier is computed locally from the time since the round started,
+// with the same curve as live_multiplier() in crash.py.
+function startCrashLive() {
+    const source = new EventSource('/api/crash/live/stream');
+    crashLive = {source, round: null, players: {}, bet: null, startedAt: 0, bettingEndsAt: 0, frame: null};
+    
+    ['round', 'betting', 'running'].forEach(name => {
+        source.addEventListener(name, (event) => applyCrashRound(JSON.parse(event.data)));
+    });
+    source.addEventListener('players', (event) => {
+        JSON.parse(event.data).forEach(player => crashLive.players[player.username] = player);
+        renderCrashPlayers();
+    });
+    source.addEventListener('crashed', (event) => endCrashLiveRound(JSON.parse(event.data)));
+    
+    document.getElementById('crash-players-panel').style.display = 'block';
+    crashLive.frame = requestAnimationFrame(drawCrashLive);
+}
+
+function stopCrashLive() {
+    if (!crashLive) return;
+    
+    crashLive.source.close();
+    cancelAnimationFrame(crashLive.frame);
+    crashLive = null;
+    
+    const panel = document.getElementById('crash-players-panel');
+    if (panel) panel.style.display = 'none';
+}
+
+function applyCrashRound(round) {
+    const now = performance.now();
+    if (round.state === 'betting' && (!crashLive.round || crashLive.round.id !== round.id)) {
+        crashLive.bet = null;
+    }
+    if (round.state === 'betting') {
+        crashLive.bettingEndsAt = now + round.bettingLeft * 1000;
+    } else if (round.state === 'running') {
+        crashLive.startedAt = now - (round.elapsed || 0) * 1000;
+    }
+    
+    crashLive.round = round;
+    crashLive.players = {};
+    (round.players || []).forEach(player => crashLive.players[player.username] = player);
+    renderCrashPlayers();
+}
+
+function crashLiveMultiplier() {
+    const elapsed = (performance.now() - crashLive.startedAt) / 1000;
+    return Math.floor(100 * Math.exp(crashLive.round.growth * elapsed)) / 100;
+}
+
+function drawCrashLive() {
+    if (!crashLive) return;
+    
+    const round = crashLive.round;
+    if (round && round.state === 'running') {
+        drawCrashBoard(crashLiveMultiplier());
+    } else if (round && round.state === 'betting') {
+        const left = Math.max(0, (crashLive.bettingEndsAt - performance.now()) / 1000);
+        drawCrashBoard(1.00, `Départ dans ${left.toFixed(1)}s`);
+    } else if (!round || round.state === 'starting') {
+        drawCrashBoard(1.00, 'En attente de la prochaine partie');
+    }
+    updateCrashLiveButton();
+    
+    crashLive.frame = requestAnimationFrame(drawCrashLive);
+}
+
+function updateCrashLiveButton() {
+    const playBtn = document.getElementById('crash-play');
+    const round = crashLive.round;
+    const bet = crashLive.bet;
+    
+    if (round && round.state === 'betting' && !bet) {
+        playBtn.disabled = false;
+        playBtn.textContent = 'Parier';
+    } else if (round && round.state === 'running' && bet && !bet.cashout) {
+        playBtn.disabled = false;
+        playBtn.textContent = `Encaisser ${formatMoney(bet.bet * crashLiveMultiplier())}`;
+    } else {
+        playBtn.disabled = true;
+        playBtn.textContent = bet ? 'Mise placée' : 'Prochaine partie...';
+    }
+}
+
+async function crashLiveAction() {
+    const round = crashLive.round;
+    if (!round) return;
+    
+    if (round.state === 'betting' && !crashLive.bet) {
+        const bet = parseFloat(document.getElementById('crash-bet').value);
+        const autoCashout = parseFloat(document.getElementById('crash-autocashout').value);
+        
+        const response = await fetch('/api/crash/live/bet', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({bet, autoCashout})
+        });
+        const data = await response.json();
+        if (data.error) {
+            showNotification(data.error, 'error');
+            return;
+        }
+        
+        crashLive.bet = {bet, autoCashout, cashout: null};
+        currentBalance = data.balance;
+        updateBalanceDisplay();
+    } else if (round.state === 'running' && crashLive.bet && !crashLive.bet.cashout) {
+        const response = await fetch('/api/crash/live/cashout', {method: 'POST'});
+        const data = await response.json();
+        if (data.error) {
+            showNotification(data.error, 'error');
+            return;
+        }
+        
+        crashLive.bet.cashout = data.multiplier;
+        showNotification(`Encaissé à ${data.multiplier.toFixed(2)}x ! Gain : ${formatMoney(data.win)}`, 'success');
+    }
+}
+
+function endCrashLiveRound(data) {
+    crashLive.round = {...crashLive.round, state: 'crashed'};
+    drawCrashBoard(data.crashPoint, 'CRASHED!');
+    
+    crashHistory.push(data.crashPoint);
+    updateCrashHistory();
+    
+    // The balance itself arrives on /api/stream once the round is settled
+    const bet = crashLive.bet;
+    if (bet && !bet.cashout) {
+        if (bet.autoCashout && bet.autoCashout <= data.crashPoint) {
+            showNotification(`Encaissé à ${bet.autoCashout.toFixed(2)}x ! Gain : ${formatMoney(bet.bet * bet.autoCashout)}`, 'success');
+        } else {
+            showNotification(`Crashed à ${data.crashPoint.toFixed(2)}x !`, 'error');
+        }
+    }
+    crashLive.bet = null;
+}
+
+function renderCrashPlayers() {
+    const list = document.getElementById('crash-players');
+    if (!list) return;
+    
+    list.innerHTML = '';
+    Object.values(crashLive.players).forEach(player => {
+        // Usernames are user input: set as text, never as HTML
+        const row = document.createElement('div');
+        row.style.cssText = 'display: flex; justify-content: space-between;';
+        
+        const name = document.createElement('span');
+        name.textContent = player.username;
+        
+        const amount = document.createElement('span');
+        amount.style.color = player.cashout ? 'var(--accent-green)' : 'var(--text-secondary)';
+        amount.textContent = formatMoney(player.bet) + (player.cashout ? ` @ ${player.cashout.toFixed(2)}x` : '');
+        
+        row.appendChild(name);
+        row.appendChild(amount);
+        list.appendChild(row);
+    });
+}
@@ -19,7 +19,7 @@ function getDiceHTML() {
                             <span id="dice-target-display" style="font-weight: 700; font-size: 20px;">50.00</span>
                         </div>
                         
-                        <input type="range" id="dice-target" min="1" max="99" value="50" step="0.01" 
+                        <input type="range" id="dice-target" min="2" max="98" value="50" step="0.01" 
                             style="width: 100%; height: 8px; border-radius: 4px; background: linear-gradient(to right, var(--accent-green) 0%, var(--accent-red) 100%); cursor: pointer; -webkit-appearance: none; appearance: none;">
                         
                         <div style="display: flex; justify-content: space-between; margin-top: 24px; gap: 12px;">
@@ -149,7 +149,7 @@ async function playDice() {
         // Update balance
         currentBalance = data.balance;
         updateBalanceDisplay();
-        loadHistory();
+        showLiveHistory();
         
         if (data.won) {
             const profit = data.win - bet;
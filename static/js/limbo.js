@@ -158,7 +158,7 @@ async function playLimbo() {
             
             currentBalance = data.balance;
             updateBalanceDisplay();
-            loadHistory();
+            showLiveHistory();
             
             setTimeout(() => {
                 resultDiv.textContent = '?';
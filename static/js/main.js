@@ -1,10 +1,16 @@
 // Main app functionality
 let currentBalance = 0;
+let historyItems = [];
+let pendingHistory = [];
+const HISTORY_SIZE = 50;
+// Whether the server streams updates (see STREAMING in app.py)
+const STREAMING = document.body.dataset.streaming === '1';
 
 // Initialize app
 document.addEventListener('DOMContentLoaded', () => {
     loadBalance();
     loadHistory();
+    if (STREAMING) connectStream();
     setupNavigation();
     
     // Load default game (Plinko)
@@ -62,36 +68,85 @@ async function loadHistory() {
             return;
         }
         
-        const historyList = document.getElementById('history-list');
-        
-        if (data.length === 0) {
-            historyList.innerHTML = '<div class="history-empty">Aucune partie jouée</div>';
-            return;
-        }
-        
-        historyList.innerHTML = data.map(item => {
-            const profit = item.win - item.bet;
-            const profitClass = profit >= 0 ? 'win' : 'lose';
-            const profitSign = profit >= 0 ? '+' : '';
-            
-            return `
-                <div class="history-item">
-                    <div class="history-item-header">
-                        <span class="history-game">${item.game}</span>
-                        <span class="history-profit ${profitClass}">${profitSign}${formatMoney(profit)}</span>
-                    </div>
-                    <div class="history-details">
-                        <span>Mise: ${formatMoney(item.bet)}</span>
-                        <span>x${item.multiplier.toFixed(2)}</span>
-                    </div>
-                </div>
-            `;
-        }).join('');
+        historyItems = data.transactions;
+        pendingHistory = [];
+        renderHistory();
     } catch (error) {
         console.error('Error loading history:', error);
     }
 }
 
+// Live balance and history over Server-Sent Events. Updates arriving while
+// a game is animating are held back until the game shows its result.
+function connectStream() {
+    const stream = new EventSource('/api/stream');
+    let connected = false;
+    
+    stream.addEventListener('open', () => {
+        // EventSource reconnects by itself; resync whatever was missed
+        if (connected) {
+            loadHistory();
+            resetChartHistory();
+        }
+        connected = true;
+    });
+    
+    stream.addEventListener('balance', (event) => {
+        const data = JSON.parse(event.data);
+        if (isPlaying || data.balance === currentBalance) return;
+        currentBalance = data.balance;
+        updateBalanceDisplay();
+    });
+    
+    stream.addEventListener('transactions', (event) => {
+        pendingHistory = JSON.parse(event.data).reverse().concat(pendingHistory);
+        if (!isPlaying) showLiveHistory();
+    });
+}
+
+function showLiveHistory() {
+    if (!STREAMING) {
+        // Nothing is pushed: fetch the history again
+        resetChartHistory();
+        loadHistory();
+        return;
+    }
+    if (pendingHistory.length === 0) return;
+    
+    addChartHistory(pendingHistory);
+    historyItems = pendingHistory.concat(historyItems).slice(0, HISTORY_SIZE);
+    pendingHistory = [];
+    renderHistory();
+}
+
+function renderHistory() {
+    const historyList = document.getElementById('history-list');
+    
+    if (historyItems.length === 0) {
+        historyList.innerHTML = '<div class="history-empty">Aucune partie jouée</div>';
+        return;
+    }
+    
+    historyList.innerHTML = historyItems.map(item => {
+        const profit = item.win - item.bet;
+        const profitClass = profit >= 0 ? 'win' : 'lose';
+        const profitSign = profit >= 0 ? '+' : '';
+        
+        return `
+            <div class="history-item">
+                <div class="history-item-header">
+                    <span class="history-game">${item.game}</span>
+                    <span class="history-profit ${profitClass}">${profitSign}${formatMoney(profit)}</span>
+                </div>
+                <div class="history-details">
+                    <span>Mise: ${formatMoney(item.bet)}</span>
+                    <span>x${item.multiplier.toFixed(2)}</span>
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
 // Setup navigation
 function setupNavigation() {
     document.querySelectorAll('.nav-item').forEach(item => {
@@ -111,6 +166,7 @@ function setupNavigation() {
 // Load game
 function loadGame(game) {
     const container = document.getElementById('game-container');
+    stopCrashLive();
     
     switch(game) {
         case 'plinko':
@@ -23,6 +23,7 @@ function getMinesHTML() {
                                 Encaisser
                             </button>
                         </div>
+                        <div id="mines-ladder" style="display: flex; gap: 6px; margin-top: 16px; overflow-x: auto;"></div>
                     </div>
                     
                     <div id="mines-grid" style="display: grid; grid-template-columns: repeat(5, 1fr); gap: 8px; max-width: 550px; margin: 0 auto;">
@@ -65,13 +66,51 @@ function getMinesHTML() {
 
 let minesGameActive = false;
 let minesRevealed = [];
+let minesCount = 3;
+let minesTable = null;
 
 function initMines() {
     generateMinesGrid();
+    loadMinesTable();
     
     document.getElementById('mines-start').addEventListener('click', startMinesGame);
 }
 
+// Multiplier ladder (mines count x gems found), fetched once
+async function loadMinesTable() {
+    if (minesTable) return;
+    
+    try {
+        const response = await fetch('/api/mines/table');
+        const data = await response.json();
+        minesTable = data.multipliers;
+    } catch (error) {
+        console.error('Error loading mines table:', error);
+    }
+}
+
+function renderMinesLadder() {
+    const ladder = document.getElementById('mines-ladder');
+    if (!minesTable) {
+        ladder.innerHTML = '';
+        return;
+    }
+    
+    const gemsFound = minesRevealed.length;
+    const row = minesTable[minesCount];
+    const steps = [];
+    for (let gems = gemsFound + 1; gems <= gemsFound + 5 && gems < row.length && row[gems] !== null; gems++) {
+        steps.push(row[gems]);
+    }
+    
+    ladder.innerHTML = steps.map((multiplier, i) => `
+        <div style="flex: 1; min-width: 64px; padding: 8px; text-align: center; background: var(--bg-tertiary); border: 1px solid ${i === 0 ? 'var(--accent-green)' : 'var(--border-color)'}; border-radius: 6px;">
+            <div style="font-size: 11px; color: var(--text-muted);">${gemsFound + i + 1} 💎</div>
+            <div style="font-size: 14px; font-weight: 700; color: var(--text-primary);">${multiplier.toFixed(2)}x</div>
+        </div>
+    `).join('');
+}
+
 function generateMinesGrid() {
     const grid = document.getElementById('mines-grid');
     grid.innerHTML = '';
@@ -114,7 +153,7 @@ function generateMinesGrid() {
 
 async function startMinesGame() {
     const betInput = document.getElementById('mines-bet');
-    const minesCount = document.getElementById('mines-count').value;
+    const selectedMines = parseInt(document.getElementById('mines-count').value);
     const startBtn = document.getElementById('mines-start');
     
     const bet = parseFloat(betInput.value);
@@ -130,7 +169,7 @@ async function startMinesGame() {
         const response = await fetch('/api/play/mines', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({action: 'start', bet, mines: parseInt(minesCount)})
+            body: JSON.stringify({action: 'start', bet, mines: selectedMines})
         });
         
         const data = await response.json();
@@ -143,6 +182,7 @@ async function startMinesGame() {
         
         minesGameActive = true;
         minesRevealed = [];
+        minesCount = selectedMines;
         
         // Update UI
         currentBalance = data.balance;
@@ -230,6 +270,7 @@ async function revealMinesTile(position) {
 function updateMinesStats(multiplier, bet) {
     document.getElementById('mines-current-multiplier').textContent = multiplier.toFixed(2) + 'x';
     document.getElementById('mines-potential-win').textContent = formatMoney(bet * multiplier);
+    renderMinesLadder();
     
     const cashoutBtn = document.getElementById('mines-cashout');
     cashoutBtn.onclick = cashoutMines;
@@ -265,7 +306,7 @@ async function cashoutMines() {
         setTimeout(() => {
             currentBalance = data.balance;
             updateBalanceDisplay();
-            loadHistory();
+            showLiveHistory();
             
             endMinesGame();
             
@@ -26,6 +26,13 @@ function getPlinkoHTML() {
                     </select>
                 </div>
                 
+                <div class="control-group">
+                    <label class="control-label">Rangées</label>
+                    <select class="control-select" id="plinko-rows">
+                        ${[8, 9, 10, 11, 12, 13, 14, 15, 16].map(r => `<option value="${r}"${r === 16 ? ' selected' : ''}>${r}</option>`).join('')}
+                    </select>
+                </div>
+                
                 <button class="btn-play" id="plinko-play">Jouer</button>
                 
                 <div class="multipliers-display" id="plinko-multipliers"></div>
@@ -36,6 +43,9 @@ function getPlinkoHTML() {
 
 let plinkoCanvas, plinkoCtx;
 let isPlaying = false;
+// Every board's multipliers, landing probabilities and RTP (/api/plinko/table)
+let plinkoTable = null;
+let plinkoRows = 16;
 
 function initPlinko() {
     plinkoCanvas = document.getElementById('plinko-canvas');
@@ -43,38 +53,71 @@ function initPlinko() {
     
     const playBtn = document.getElementById('plinko-play');
     const riskSelect = document.getElementById('plinko-risk');
+    const rowsSelect = document.getElementById('plinko-rows');
     
     // Update multipliers display
-    updatePlinkoMultipliers();
     riskSelect.addEventListener('change', updatePlinkoMultipliers);
+    rowsSelect.addEventListener('change', () => {
+        plinkoRows = parseInt(rowsSelect.value);
+        updatePlinkoMultipliers();
+        drawPlinkoBoard();
+    });
+    plinkoRows = parseInt(rowsSelect.value);
     
     playBtn.addEventListener('click', playPlinko);
     
     drawPlinkoBoard();
+    loadPlinkoTable();
+}
+
+async function loadPlinkoTable() {
+    if (!plinkoTable) {
+        const response = await fetch('/api/plinko/table');
+        plinkoTable = await response.json();
+    }
+    updatePlinkoMultipliers();
 }
 
 function updatePlinkoMultipliers() {
+    if (!plinkoTable) return;
     const risk = document.getElementById('plinko-risk').value;
-    const multipliers = {
-        low: [0.5, 0.7, 0.9, 1.0, 1.1, 1.3, 1.5, 1.3, 1.1, 1.0, 0.9, 0.7, 0.5],
-        medium: [0.3, 0.5, 0.7, 1.0, 1.5, 2.0, 3.0, 2.0, 1.5, 1.0, 0.7, 0.5, 0.3],
-        high: [0.2, 0.3, 0.5, 1.0, 2.0, 5.0, 10.0, 5.0, 2.0, 1.0, 0.5, 0.3, 0.2]
-    };
+    const board = plinkoTable[plinkoRows][risk];
     
     const display = document.getElementById('plinko-multipliers');
     display.innerHTML = `
         <div style="margin-top: 20px; padding-top: 20px; border-top: 1px solid var(--border-color);">
-            <div style="font-size: 12px; color: var(--text-muted); margin-bottom: 12px; text-transform: uppercase; letter-spacing: 0.5px;">Multiplicateurs</div>
+            <div style="font-size: 12px; color: var(--text-muted); margin-bottom: 12px; text-transform: uppercase; letter-spacing: 0.5px;">Multiplicateurs (RTP ${(board.rtp * 100).toFixed(2)} %)</div>
             <div style="display: flex; flex-wrap: wrap; gap: 6px; font-size: 11px; font-weight: 600;">
-                ${multipliers[risk].map(m => {
+                ${board.multipliers.map((m, i) => {
                     const color = m >= 3 ? 'var(--accent-green)' : m >= 1.5 ? 'var(--accent-blue)' : m >= 1 ? 'var(--accent-yellow)' : 'var(--accent-red)';
-                    return `<span style="flex: 1; min-width: 40px; padding: 6px; background: ${color}15; color: ${color}; border: 1px solid ${color}30; border-radius: 4px; text-align: center;">${m}x</span>`;
+                    const chance = (board.probabilities[i] * 100).toPrecision(2);
+                    return `<span title="${chance} %" style="flex: 1; min-width: 40px; padding: 6px; background: ${color}15; color: ${color}; border: 1px solid ${color}30; border-radius: 4px; text-align: center;">${m}x</span>`;
                 }).join('')}
             </div>
         </div>
     `;
 }
 
+// Peg row layout, shared by the board and the ball
+function plinkoRowLayout(row) {
+    const width = plinkoCanvas.width;
+    const ballRadius = 10;
+    const minPegSpacing = ballRadius * 3; // Espacement minimum entre piquets
+    const maxWidth = 500;
+    const pegsInRow = row + 3;
+    
+    // Center the pegs and create pyramid shape
+    const rowWidth = (maxWidth / plinkoRows) * (row + 1);
+    const spacing = Math.max(rowWidth / (pegsInRow - 1), minPegSpacing);
+    const actualRowWidth = spacing * (pegsInRow - 1);
+    return {
+        pegsInRow,
+        spacing,
+        startX: (width - actualRowWidth) / 2,
+        y: 80 + row * (560 / plinkoRows)
+    };
+}
+
 function drawPlinkoBoard() {
     const width = plinkoCanvas.width;
     const height = plinkoCanvas.height;
@@ -85,24 +128,11 @@ function drawPlinkoBoard() {
     plinkoCtx.fillStyle = '#0f1923';
     plinkoCtx.fillRect(0, 0, width, height);
     
-    // Draw pegs (16 rows) - PYRAMID SHAPE avec espacement pour la balle
-    const rows = 16;
-    const startY = 80;
-    const rowSpacing = 35;
+    // Draw pegs - PYRAMID SHAPE avec espacement pour la balle
     const pegRadius = 5;
-    const ballRadius = 10; // Rayon de la balle
-    const minPegSpacing = ballRadius * 3; // Espacement minimum entre piquets
-    const maxWidth = 500;
     
-    for (let row = 0; row < rows; row++) {
-        const pegsInRow = row + 3;
-        const y = startY + row * rowSpacing;
-        
-        // Center the pegs and create pyramid shape
-        const rowWidth = (maxWidth / rows) * (row + 1);
-        const spacing = Math.max(rowWidth / (pegsInRow - 1), minPegSpacing);
-        const actualRowWidth = spacing * (pegsInRow - 1);
-        const startX = (width - actualRowWidth) / 2;
+    for (let row = 0; row < plinkoRows; row++) {
+        const {pegsInRow, spacing, startX, y} = plinkoRowLayout(row);
         
         for (let i = 0; i < pegsInRow; i++) {
             const x = startX + spacing * i;
@@ -128,7 +158,7 @@ function drawPlinkoBoard() {
     }
     
     // Draw buckets at bottom
-    const buckets = 13;
+    const buckets = plinkoRows + 1;
     const bucketWidth = width / buckets;
     const bucketHeight = 50;
     const bucketY = height - bucketHeight - 10;
@@ -151,6 +181,7 @@ async function playPlinko() {
     
     const bet = parseFloat(betInput.value);
     const risk = riskSelect.value;
+    const rows = plinkoRows;
     
     if (bet > currentBalance) {
         showNotification('Solde insuffisant', 'error');
@@ -165,7 +196,7 @@ async function playPlinko() {
         const response = await fetch('/api/play/plinko', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({bet, risk})
+            body: JSON.stringify({bet, risk, rows})
         });
         
         const data = await response.json();
@@ -176,12 +207,12 @@ async function playPlinko() {
         }
         
         // Animate ball drop
-        await animatePlinko(data.path, data.multiplier);
+        await animatePlinko(data.path, data.rows, data.slot, data.multiplier);
         
         // Update balance
         currentBalance = data.balance;
         updateBalanceDisplay();
-        loadHistory();
+        showLiveHistory();
         
         const profit = data.win - bet;
         if (profit > 0) {
@@ -200,31 +231,28 @@ async function playPlinko() {
     }
 }
 
-async function animatePlinko(path, multiplier) {
+async function animatePlinko(path, rows, slot, multiplier) {
     return new Promise(resolve => {
         drawPlinkoBoard();
         
         const width = plinkoCanvas.width;
         const height = plinkoCanvas.height;
-        const ballRadius = 10;
-        const rows = 16;
-        const startY = 60;
-        const rowSpacing = 35;
-        const maxWidth = 500;
-        const minPegSpacing = ballRadius * 3;
         
         let currentRow = 0;
+        // Bounces to the right so far: bit i of the path is set when the
+        // ball went right at row i
+        let rights = 0;
         let ball = {
             x: width / 2,
-            y: startY
+            y: 60
         };
         
         const animateToRow = () => {
             if (currentRow >= rows) {
                 // Animation vers le bucket final
-                const buckets = 13;
+                const buckets = rows + 1;
                 const bucketWidth = width / buckets;
-                const finalPosition = path[path.length - 1];
+                const finalPosition = slot;
                 const finalX = (finalPosition + 0.5) * bucketWidth;
                 const bucketY = height - 60;
                 
@@ -280,15 +308,11 @@ async function animatePlinko(path, multiplier) {
             }
             
             // Calculer position cible pour cette rangée
-            const pegsInRow = currentRow + 3;
-            const rowWidth = (maxWidth / rows) * (currentRow + 1);
-            const spacing = Math.max(rowWidth / (pegsInRow - 1), minPegSpacing);
-            const actualRowWidth = spacing * (pegsInRow - 1);
-            const startX = (width - actualRowWidth) / 2;
+            const {spacing, startX, y} = plinkoRowLayout(currentRow);
             
-            const pegIndex = path[currentRow];
-            const targetX = startX + spacing * pegIndex;
-            const targetY = startY + currentRow * rowSpacing;
+            const targetX = startX + spacing * (rights + 1);
+            const targetY = y - 12;
+            rights += (path >> currentRow) & 1;
             
             // Animer vers le piquet
             let step = 0;
@@ -58,8 +58,13 @@ function getPumpHTML() {
 
 let pumpActive = false;
 let pumpInterval = null;
+let pumpStatusInterval = null;
 let pumpMultiplier = 1.0;
-let pumpMaxMultiplier = 1.0;
+let pumpGrowth = 0;
+let pumpStarted = 0;
+
+// Multipliers above this show the balloon in danger colours
+const PUMP_DANGER = 3;
 
 function initPump() {
     document.getElementById('pump-start').addEventListener('click', startPump);
@@ -93,9 +98,12 @@ async function startPump() {
             return;
         }
         
+        // The server times the balloon and keeps the pop point: inflate it
+        // at the server's rate and ask whether it has popped
         pumpActive = true;
         pumpMultiplier = 1.0;
-        pumpMaxMultiplier = data.maxMultiplier;
+        pumpGrowth = data.growth;
+        pumpStarted = performance.now();
         
         currentBalance = data.balance;
         updateBalanceDisplay();
@@ -104,6 +112,7 @@ async function startPump() {
         document.getElementById('pump-cashout').onclick = () => cashoutPump(bet);
         
         animatePump();
+        pumpStatusInterval = setInterval(checkPump, 250);
         
     } catch (error) {
         console.error('Error:', error);
@@ -117,35 +126,23 @@ function animatePump() {
     const multiplierDisplay = document.getElementById('pump-multiplier');
     const svg = document.getElementById('balloon-svg');
     
-    let baseSize = 200;
-    let iteration = 0;
-    
     pumpInterval = setInterval(() => {
         if (!pumpActive) {
             clearInterval(pumpInterval);
             return;
         }
         
-        iteration++;
-        
-        // Increase multiplier (slows down as it gets higher)
-        const increment = 0.01 + Math.random() * 0.02;
-        pumpMultiplier += increment;
-        
-        // Check if popped
-        if (pumpMultiplier >= pumpMaxMultiplier) {
-            popBalloon(balloon, svg);
-            return;
-        }
+        // Same curve as games/pump.py multiplier_at
+        const elapsed = (performance.now() - pumpStarted) / 1000;
+        pumpMultiplier = Math.floor(100 * Math.exp(pumpGrowth * elapsed)) / 100;
         
         // Update size
-        const scale = 1 + (pumpMultiplier - 1) * 0.5;
+        const scale = 1 + Math.min(pumpMultiplier - 1, 4) * 0.25;
         balloon.style.transform = `scale(${scale})`;
         multiplierDisplay.textContent = pumpMultiplier.toFixed(2) + 'x';
         
         // Change color as it gets dangerous
-        const dangerLevel = pumpMultiplier / pumpMaxMultiplier;
-        if (dangerLevel > 0.7) {
+        if (pumpMultiplier > PUMP_DANGER) {
             svg.querySelector('ellipse').setAttribute('fill', 'url(#balloon-danger)');
             if (!document.getElementById('balloon-danger')) {
                 const defs = svg.querySelector('defs');
@@ -159,73 +156,90 @@ function animatePump() {
             }
         }
         
-    }, 100);
+    }, 50);
+}
+
+async function checkPump() {
+    if (!pumpActive) return;
+    
+    try {
+        const response = await fetch('/api/play/pump', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({action: 'status'})
+        });
+        
+        const data = await response.json();
+        
+        // Settled on the server when it popped
+        if (data.popped && pumpActive) {
+            currentBalance = data.balance;
+            updateBalanceDisplay();
+            showLiveHistory();
+            popBalloon(data.popPoint);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+    }
 }
 
-function popBalloon(balloon, svg) {
+function popBalloon(popPoint) {
     clearInterval(pumpInterval);
+    clearInterval(pumpStatusInterval);
     pumpActive = false;
     
     // Explosion effect
+    const balloon = document.getElementById('pump-balloon');
     balloon.style.transform = 'scale(0)';
     balloon.style.opacity = '0';
     
-    document.getElementById('pump-message').innerHTML = `💥 <span style="color: var(--accent-red); font-weight: 700;">EXPLOSION à ${pumpMaxMultiplier.toFixed(2)}x !</span>`;
+    document.getElementById('pump-multiplier').textContent = popPoint.toFixed(2) + 'x';
+    document.getElementById('pump-message').innerHTML = `💥 <span style="color: var(--accent-red); font-weight: 700;">EXPLOSION à ${popPoint.toFixed(2)}x !</span>`;
     document.getElementById('pump-message').style.fontSize = '20px';
     
-    setTimeout(async () => {
-        try {
-            const response = await fetch('/api/play/pump', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({action: 'pop'})
-            });
-            
-            const data = await response.json();
-            currentBalance = data.balance;
-            updateBalanceDisplay();
-            loadHistory();
-            
-            showNotification(`Le ballon a explosé à ${pumpMaxMultiplier.toFixed(2)}x !`, 'error');
-            
-            setTimeout(() => resetPump(), 2000);
-            
-        } catch (error) {
-            console.error('Error:', error);
-            resetPump();
-        }
-    }, 500);
+    showNotification(`Le ballon a explosé à ${popPoint.toFixed(2)}x !`, 'error');
+    
+    setTimeout(() => resetPump(), 2000);
 }
 
 async function cashoutPump(bet) {
     if (!pumpActive) return;
     
     clearInterval(pumpInterval);
+    clearInterval(pumpStatusInterval);
     pumpActive = false;
     
     document.getElementById('pump-cashout').disabled = true;
     
     try {
+        // Priced at the server's multiplier when the request arrives
         const response = await fetch('/api/play/pump', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({action: 'cashout', multiplier: pumpMultiplier})
+            body: JSON.stringify({action: 'cashout'})
         });
         
         const data = await response.json();
         
         if (data.error) {
             showNotification(data.error, 'error');
+            resetPump();
             return;
         }
         
         currentBalance = data.balance;
         updateBalanceDisplay();
-        loadHistory();
+        showLiveHistory();
+        
+        if (data.popped) {
+            popBalloon(data.popPoint);
+            return;
+        }
         
         const profit = data.win - bet;
         showNotification(`Encaissé à ${data.multiplier.toFixed(2)}x ! +${formatMoney(profit)}`, 'success');
         
+        document.getElementById('pump-multiplier').textContent = data.multiplier.toFixed(2) + 'x';
         document.getElementById('pump-message').innerHTML = `✅ <span style="color: var(--accent-green); font-weight: 700;">Encaissé ! ${formatMoney(data.win)}</span>`;
         
         setTimeout(() => resetPump(), 2000);
@@ -241,6 +255,7 @@ function resetPump() {
     pumpActive = false;
     pumpMultiplier = 1.0;
     clearInterval(pumpInterval);
+    clearInterval(pumpStatusInterval);
     
     const balloon = document.getElementById('pump-balloon');
     balloon.style.transform = 'scale(1)';
@@ -256,4 +271,5 @@ function resetPump() {
     document.getElementById('pump-start').style.display = 'block';
     document.getElementById('pump-cashout').style.display = 'none';
     document.getElementById('pump-bet').disabled = false;
+    document.getElementById('pump-cashout').disabled = false;
 }
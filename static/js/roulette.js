@@ -3,7 +3,7 @@ function getRouletteHTML() {
     return `
         <div class="game-header">
             <h1 class="game-title">🎰 Roulette</h1>
-            <p class="game-description">Le classique des casinos ! Misez sur Rouge/Noir, Pair/Impair ou un numéro.</p>
+            <p class="game-description">Le classique des casinos ! Misez sur Rouge/Noir, Pair/Impair, les douzaines ou vos numéros, plusieurs paris par tour.</p>
         </div>
         
         <div class="game-content">
@@ -31,9 +31,28 @@ function getRouletteHTML() {
                         <option value="odd">Impair (x2)</option>
                         <option value="low">1-18 (x2)</option>
                         <option value="high">19-36 (x2)</option>
+                        <option value="dozen1">1re douzaine (x3)</option>
+                        <option value="dozen2">2e douzaine (x3)</option>
+                        <option value="dozen3">3e douzaine (x3)</option>
+                        <option value="column1">1re colonne (x3)</option>
+                        <option value="column2">2e colonne (x3)</option>
+                        <option value="column3">3e colonne (x3)</option>
+                        <option value="straight">Plein - 1 numéro (x36)</option>
+                        <option value="split">Cheval - 2 numéros (x18)</option>
+                        <option value="street">Transversale - 3 numéros (x12)</option>
+                        <option value="corner">Carré - 4 numéros (x9)</option>
+                        <option value="line">Sixain - 6 numéros (x6)</option>
                     </select>
                 </div>
                 
+                <div class="control-group" id="roulette-numbers-group" style="display: none;">
+                    <label class="control-label">Numéros (ex : 17 ou 1,2,4,5)</label>
+                    <input type="text" class="control-input" id="roulette-numbers" placeholder="17">
+                </div>
+                
+                <button class="btn-play" id="roulette-add" style="background: var(--bg-tertiary); margin-bottom: 10px;">Ajouter au ticket</button>
+                <div id="roulette-slip" style="margin-bottom: 10px; font-size: 13px; color: var(--text-secondary);"></div>
+                
                 <button class="btn-play" id="roulette-play">Lancer la roue</button>
                 
                 <div style="margin-top: 20px; padding: 16px; background: var(--bg-secondary); border: 1px solid var(--border-color); border-radius: 8px;">
@@ -51,6 +70,9 @@ function getRouletteHTML() {
 }
 
 let rouletteCanvas, rouletteCtx;
+// Bets added to the slip, all resolved by the next spin
+let rouletteSlip = [];
+const ROULETTE_INSIDE_BETS = ['straight', 'split', 'street', 'corner', 'line'];
 const redNumbers = [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36];
 const blackNumbers = [2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35];
 
@@ -59,9 +81,54 @@ function initRoulette() {
     rouletteCtx = rouletteCanvas.getContext('2d');
     
     document.getElementById('roulette-play').addEventListener('click', playRoulette);
+    document.getElementById('roulette-add').addEventListener('click', () => {
+        const bet = readRouletteBet();
+        if (bet) {
+            rouletteSlip.push(bet);
+            renderRouletteSlip();
+        }
+    });
+    document.getElementById('roulette-type').addEventListener('change', (e) => {
+        document.getElementById('roulette-numbers-group').style.display = ROULETTE_INSIDE_BETS.includes(e.target.value) ? 'block' : 'none';
+    });
+    rouletteSlip = [];
+    renderRouletteSlip();
     drawRouletteWheel(0);
 }
 
+function readRouletteBet() {
+    const bet = parseFloat(document.getElementById('roulette-bet').value);
+    const typeSelect = document.getElementById('roulette-type');
+    const entry = {type: typeSelect.value, bet, label: typeSelect.options[typeSelect.selectedIndex].text};
+    
+    if (ROULETTE_INSIDE_BETS.includes(entry.type)) {
+        entry.numbers = document.getElementById('roulette-numbers').value
+            .split(',').map(n => n.trim()).filter(n => n !== '').map(Number);
+        if (entry.numbers.length === 0 || entry.numbers.some(isNaN)) {
+            showNotification('Indiquez les numéros du pari', 'error');
+            return null;
+        }
+        entry.label += ` : ${entry.numbers.join(', ')}`;
+    }
+    return entry;
+}
+
+function renderRouletteSlip() {
+    const slipDiv = document.getElementById('roulette-slip');
+    if (rouletteSlip.length === 0) {
+        slipDiv.innerHTML = '';
+        return;
+    }
+    
+    const total = rouletteSlip.reduce((sum, bet) => sum + bet.bet, 0);
+    slipDiv.innerHTML = rouletteSlip.map((bet, i) => `
+        <div style="display: flex; justify-content: space-between; padding: 4px 0;">
+            <span>${bet.label}</span>
+            <span>${formatMoney(bet.bet)} <a href="#" onclick="rouletteSlip.splice(${i}, 1); renderRouletteSlip(); return false;" style="color: var(--accent-red);">✕</a></span>
+        </div>
+    `).join('') + `<div style="padding-top: 4px; color: var(--text-primary);">Total : ${formatMoney(total)}</div>`;
+}
+
 function drawRouletteWheel(rotation) {
     const ctx = rouletteCtx;
     const centerX = 200;
@@ -134,13 +201,13 @@ function drawRouletteWheel(rotation) {
 async function playRoulette() {
     if (isPlaying) return;
     
-    const betInput = document.getElementById('roulette-bet');
-    const typeSelect = document.getElementById('roulette-type');
     const playBtn = document.getElementById('roulette-play');
     const resultDiv = document.getElementById('roulette-result');
     
-    const bet = parseFloat(betInput.value);
-    const betType = typeSelect.value;
+    // The slip, or the bet currently selected when the slip is empty
+    const bets = rouletteSlip.length ? rouletteSlip : [readRouletteBet()];
+    if (!bets[0]) return;
+    const bet = bets.reduce((sum, b) => sum + b.bet, 0);
     
     if (bet > currentBalance) {
         showNotification('Solde insuffisant', 'error');
@@ -156,7 +223,7 @@ async function playRoulette() {
         const response = await fetch('/api/play/roulette', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({bet, betType})
+            body: JSON.stringify({bets: bets.map(({type, numbers, bet}) => ({type, numbers, bet}))})
         });
         
         const data = await response.json();
@@ -182,11 +249,11 @@ async function playRoulette() {
         
         currentBalance = data.balance;
         updateBalanceDisplay();
-        loadHistory();
+        showLiveHistory();
         
         if (data.won) {
             const profit = data.win - bet;
-            showNotification(`Gagné ! ${num} - +${formatMoney(profit)}`, 'success');
+            showNotification(`Gagné ! ${num} - ${profit >= 0 ? '+' : ''}${formatMoney(profit)}`, 'success');
         } else {
             showNotification(`Perdu ! ${num}`, 'error');
         }
@@ -0,0 +1,151 @@
+# Per-user, per-game aggregates
+#
+# UserStats rows are bumped by the wallet in the same commit as the bets they
+# count, so dashboards read totals in O(1) instead of scanning Transaction.
+from sqlalchemy import insert, update, select, func, case, values, column, literal, true, String, Integer, BigInteger, Float
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, Transaction, UserStats
+from money import from_units
+
+_UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+def _aggregate(records):
+    totals = {}
+    for record in records:
+        bets, wagered, won, max_multiplier = totals.get(record['game'], (0, 0, 0, 0.0))
+        totals[record['game']] = (
+            bets + 1,
+            wagered + record['bet_amount'],
+            won + record['win_amount'],
+            max(max_multiplier, record['multiplier'])
+        )
+    return totals
+
+def _stats_rows(user_id, records):
+    return [{
+        'user_id': user_id,
+        'game': game,
+        'bets': bets,
+        'wagered': wagered,
+        'won': won,
+        'max_multiplier': max_multiplier
+    } for game, (bets, wagered, won, max_multiplier) in _aggregate(records).items()]
+
+def _on_conflict_add(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id, UserStats.game],
+        set_={
+            'bets': UserStats.bets + stmt.excluded.bets,
+            'wagered': UserStats.wagered + stmt.excluded.wagered,
+            'won': UserStats.won + stmt.excluded.won,
+            'max_multiplier': case(
+                (stmt.excluded.max_multiplier > UserStats.max_multiplier, stmt.excluded.max_multiplier),
+                else_=UserStats.max_multiplier
+            )
+        }
+    )
+
+def stats_upsert_from(user_id, records, source):
+    """Postgres: record_stats as a statement that only writes if `source`
+    (a CTE) returns a row, for embedding in the wallet's settlement query."""
+    rows = values(
+        column('game', String),
+        column('bets', Integer),
+        column('wagered', BigInteger),
+        column('won', BigInteger),
+        column('max_multiplier', Float),
+        name='bet_stats'
+    ).data([
+        (row['game'], row['bets'], row['wagered'], row['won'], row['max_multiplier'])
+        for row in _stats_rows(user_id, records)
+    ])
+    return _on_conflict_add(postgresql.insert(UserStats).from_select(
+        ['user_id', 'game', 'bets', 'wagered', 'won', 'max_multiplier'],
+        select(literal(user_id), rows.c.game, rows.c.bets, rows.c.wagered, rows.c.won, rows.c.max_multiplier)
+        .select_from(source).join(rows, true())
+    ))
+
+def _upsert_stats(rows):
+    if not rows:
+        return
+    
+    dialect = db.engine.dialect.name
+    if dialect in _UPSERT_INSERTS:
+        # One multi-row INSERT .. ON CONFLICT; rows are unique per (user, game)
+        db.session.execute(_on_conflict_add(_UPSERT_INSERTS[dialect](UserStats).values(rows)))
+        return
+    
+    for row in rows:
+        result = db.session.execute(
+            update(UserStats)
+            .where(UserStats.user_id == row['user_id'], UserStats.game == row['game'])
+            .values(
+                bets=UserStats.bets + row['bets'],
+                wagered=UserStats.wagered + row['wagered'],
+                won=UserStats.won + row['won'],
+                max_multiplier=case(
+                    (UserStats.max_multiplier < row['max_multiplier'], row['max_multiplier']),
+                    else_=UserStats.max_multiplier
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            db.session.execute(insert(UserStats).values(**row))
+
+def record_stats(user_id, records):
+    """Add settled Transaction records to the user's stats (caller commits)."""
+    _upsert_stats(_stats_rows(user_id, records))
+
+def record_stats_many(records_by_user):
+    """record_stats for several users in one statement (caller commits)."""
+    _upsert_stats([
+        row
+        for user_id, records in records_by_user.items()
+        for row in _stats_rows(user_id, records)
+    ])
+
+def rebuild_stats():
+    """Recompute every UserStats row from the Transaction ledger."""
+    db.session.query(UserStats).delete()
+    db.session.execute(insert(UserStats).from_select(
+        ['user_id', 'game', 'bets', 'wagered', 'won', 'max_multiplier'],
+        select(
+            Transaction.user_id,
+            Transaction.game,
+            func.count(),
+            func.sum(Transaction.bet_amount),
+            func.sum(Transaction.win_amount),
+            func.coalesce(func.max(Transaction.multiplier), 0)
+        ).group_by(Transaction.user_id, Transaction.game)
+    ))
+    db.session.commit()
+
+def user_stats(user_id):
+    rows = db.session.execute(
+        select(UserStats.game, UserStats.bets, UserStats.wagered, UserStats.won, UserStats.max_multiplier)
+        .where(UserStats.user_id == user_id)
+    ).all()
+    
+    games = {}
+    total = {'bets': 0, 'wagered': 0, 'won': 0, 'maxMultiplier': 0.0}
+    for game, bets, wagered, won, max_multiplier in rows:
+        games[game] = {
+            'bets': bets,
+            'wagered': from_units(wagered),
+            'won': from_units(won),
+            'profit': from_units(won - wagered),
+            'maxMultiplier': max_multiplier
+        }
+        total['bets'] += bets
+        total['wagered'] += wagered
+        total['won'] += won
+        total['maxMultiplier'] = max(total['maxMultiplier'], max_multiplier)
+    
+    total['profit'] = from_units(total['won'] - total['wagered'])
+    total['wagered'] = from_units(total['wagered'])
+    total['won'] = from_units(total['won'])
+    return {'games': games, 'total': total}
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# The app reads its configuration at import: a throwaway database, no hint
+# warm-up and passwords hashed inline
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'casino.db')
+os.environ.setdefault('BLACKJACK_HINT_WARMUP', '0')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as casino
+
+@pytest.fixture
+def app():
+    return casino.app
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    username = f'player{os.urandom(4).hex()}'
+    response = client.post('/register', json={'username': username, 'password': 'secret'})
+    assert response.status_code == 200
+    return client
+
+@pytest.fixture
+def user_id(client):
+    with client.session_transaction() as flask_session:
+        return flask_session['user_id']
+
+def balance(client):
+    return client.get('/api/balance').json['balance']
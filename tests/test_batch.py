@@ -0,0 +1,72 @@
+from conftest import balance
+
+def batch(client, game, **data):
+    return client.post(f'/api/play/{game}/batch', json=data)
+
+def test_roulette_batch_rejects_unknown_bets(client):
+    before = balance(client)
+    assert batch(client, 'roulette', bet=1, count=5, type='purple').status_code == 400
+    assert batch(client, 'roulette', bet=1, count=5, type='split', numbers=[1, 5]).status_code == 400
+    assert batch(client, 'roulette', bets=[{'bet': 1, 'type': 'red'}, {'bet': 1, 'type': 'nope'}]).status_code == 400
+    assert balance(client) == before
+
+def test_roulette_batch_takes_inside_bets(client):
+    response = batch(client, 'roulette', bet=1, count=50, type='straight', numbers=[17])
+    assert response.status_code == 200
+    for number, multiplier in zip(response.json['outcomes'], response.json['multipliers']):
+        assert multiplier == (36.0 if number == 17 else 0)
+    
+    response = batch(client, 'roulette', bets=[{'bet': 1, 'type': 'red'}, {'bet': 1, 'type': 'corner', 'numbers': [1, 2, 4, 5]}])
+    assert response.status_code == 200 and response.json['count'] == 2
+
+def test_roulette_bets_read_the_same_on_both_routes(client):
+    # The slip's keys, the single bet of older clients and no numbers
+    for bet in ({'type': 'red'}, {'betType': 'red'}, {'type': 'red', 'numbers': None}):
+        assert client.post('/api/play/roulette', json=dict(bet, bet=1)).status_code == 200
+        assert client.post('/api/play/roulette', json={'bets': [dict(bet, bet=1)]}).status_code == 200
+        assert batch(client, 'roulette', count=2, **dict(bet, bet=1)).status_code == 200
+        assert batch(client, 'roulette', bets=[dict(bet, bet=1)]).status_code == 200
+
+def test_plinko_batch_rejects_unknown_boards(client):
+    assert batch(client, 'plinko', bet=1, count=5, risk='xx').status_code == 400
+    assert batch(client, 'plinko', bet=1, count=5, risk='low', rows=7).status_code == 400
+    assert batch(client, 'plinko', bet=1, count=5, risk='low', rows='many').status_code == 400
+    assert batch(client, 'plinko', bets=[{'bet': 1}, {'bet': 1, 'rows': None}]).status_code == 400
+    assert batch(client, 'plinko', bet=1, count=5, risk='low', rows=8).status_code == 200
+
+def test_plinko_seed_verification_defaults_to_sixteen_rows(client):
+    def verify(args):
+        response = client.post('/api/fair/verify', json={
+            'game': 'plinko', 'serverSeed': 'server', 'clientSeed': 'client', 'nonce': 0, 'count': 3, 'args': args
+        })
+        assert response.status_code == 200
+        return response.json['outcomes']
+    
+    assert verify(['low']) == verify(['low', 16])
+
+def test_limbo_and_crash_reject_targets_below_the_minimum(client):
+    before = balance(client)
+    for target in (1.0, 0.5, -3, 'nan'):
+        assert client.post('/api/play/limbo', json={'bet': 1, 'target': target}).status_code == 400
+        assert batch(client, 'limbo', bet=1, count=5, target=target).status_code == 400
+        assert client.post('/api/play/crash', json={'bet': 1, 'autoCashout': target}).status_code == 400
+    assert balance(client) == before
+    assert client.post('/api/play/limbo', json={'bet': 1, 'target': 1.01}).status_code == 200
+
+def test_dice_rejects_win_chances_out_of_range(client):
+    before = balance(client)
+    for target, over in ((100, True), (0, False), (-5, True), (1, True), ('nan', True)):
+        assert client.post('/api/play/dice', json={'bet': 1, 'target': target, 'over': over}).status_code == 400
+        assert batch(client, 'dice', bet=1, count=5, target=target, over=over).status_code == 400
+    assert balance(client) == before
+    assert batch(client, 'dice', bet=1, count=5, target=50, over=True).status_code == 200
+
+def test_batch_rejects_malformed_requests(client):
+    before = balance(client)
+    assert batch(client, 'dice', bet=1, count='lots', target=50).status_code == 400
+    assert batch(client, 'dice', bet=1, count=None, target=50).status_code == 400
+    assert batch(client, 'dice', bet=1, count=5, target=50, stopOnProfit='x').status_code == 400
+    assert batch(client, 'dice', bet=1, count=5, target=50, stopOnLoss=[1]).status_code == 400
+    assert batch(client, 'dice', target=50, bets=[{'bet': 1}, 2]).status_code == 400
+    assert batch(client, 'dice', target=50, bets=5).status_code == 400
+    assert balance(client) == before
@@ -0,0 +1,67 @@
+from conftest import casino, balance
+from models import Transaction
+
+def deal(client):
+    # Until a round that does not end on the deal (or on the dealer's peek
+    # once insurance is declined)
+    while True:
+        response = client.post('/api/play/blackjack', json={'action': 'deal', 'bet': 10})
+        assert response.status_code == 200
+        if response.json['insuranceOffered']:
+            response = client.post('/api/play/blackjack', json={'action': 'insurance', 'take': False})
+            assert response.status_code == 200
+        if not response.json['gameOver']:
+            return response.json
+
+def blackjack_rounds(app, user_id):
+    with app.app_context():
+        return Transaction.query.filter_by(user_id=user_id, game='blackjack').count()
+
+def test_stand_during_hit_settles_once(app, client, user_id, monkeypatch):
+    deal(client)
+    settled = blackjack_rounds(app, user_id)
+    
+    # A stand finishes and settles the round between the hit's read and write
+    hit = casino.BLACKJACK_ACTIONS['hit']
+    stands = []
+    def hit_after_stand(game):
+        stands.append(client.post('/api/play/blackjack', json={'action': 'stand'}))
+        return hit(game)
+    monkeypatch.setitem(casino.BLACKJACK_ACTIONS, 'hit', hit_after_stand)
+    
+    response = client.post('/api/play/blackjack', json={'action': 'hit'})
+    monkeypatch.setitem(casino.BLACKJACK_ACTIONS, 'hit', hit)
+    
+    assert stands[0].status_code == 200 and stands[0].json['gameOver']
+    assert response.status_code == 400
+    assert client.post('/api/play/blackjack', json={'action': 'stand'}).status_code == 400
+    assert blackjack_rounds(app, user_id) == settled + 1
+
+def test_concurrent_deal_keeps_the_open_round_and_its_stake(client, monkeypatch):
+    deal_round = casino.blackjack.deal
+    while True:
+        # Nothing left open by the last try
+        client.post('/api/play/blackjack', json={'action': 'stand'})
+        
+        # Another deal lands between this deal's check for an open round and
+        # its write
+        inner = []
+        def deal_during_deal(bet_amount, shoe):
+            monkeypatch.setattr(casino.blackjack, 'deal', deal_round)
+            before = balance(client)
+            inner.append((client.post('/api/play/blackjack', json={'action': 'deal', 'bet': 10}), before))
+            return deal_round(bet_amount, shoe)
+        monkeypatch.setattr(casino.blackjack, 'deal', deal_during_deal)
+        
+        response = client.post('/api/play/blackjack', json={'action': 'deal', 'bet': 10})
+        dealt, before = inner[0]
+        if dealt.json['gameOver']:
+            continue
+        if response.status_code == 400:
+            break
+        # A blackjack (from a shoe of its own) is settled without an open round
+        assert response.json['gameOver']
+    
+    assert response.json['error'] == 'Finish your current game first'
+    assert balance(client) == before - 10
+    assert client.post('/api/play/blackjack', json={'action': 'stand'}).status_code == 200
@@ -0,0 +1,94 @@
+import pytest
+from conftest import balance
+import events
+import crash_rounds
+from crash_rounds import CrashRounds
+from models import db, CrashRound, CrashBet
+
+@pytest.fixture
+def rounds(app, monkeypatch):
+    """Live rounds whose betting round is set up by hand, with no thread."""
+    rounds = CrashRounds(app, events.bus)
+    monkeypatch.setattr(rounds, 'start', lambda: None)
+    with app.app_context():
+        row = CrashRound(server_seed='0' * 64, server_seed_hash='0' * 64)
+        db.session.add(row)
+        db.session.commit()
+        rounds.round = {'id': row.id, 'state': 'betting', 'hash': row.server_seed_hash, 'players': {}}
+    return rounds
+
+def open_bets(app):
+    with app.app_context():
+        return CrashBet.query.count()
+
+def test_failed_round_refunds_its_stakes(app, client, user_id, rounds):
+    before = balance(client)
+    with app.app_context():
+        rounds.bet(user_id, 'player', 1000)
+        with pytest.raises(ValueError):
+            rounds.bet(user_id, 'player', 1000)
+    assert balance(client) == before - 10
+    assert open_bets(app) == 1
+    
+    rounds._abandon_round()
+    assert balance(client) == before
+    assert open_bets(app) == 0
+    with app.app_context(), pytest.raises(ValueError):
+        rounds.bet(user_id, 'player', 1000)
+
+def test_unsettled_rounds_of_a_previous_run_are_refunded(app, client, user_id, rounds):
+    before = balance(client)
+    with app.app_context():
+        rounds.bet(user_id, 'player', 1000)
+    
+    # The next process, after a restart
+    restarted = CrashRounds(app, events.bus)
+    assert restarted.refund_open_bets() == 1
+    assert restarted.refund_open_bets() == 0
+    assert balance(client) == before
+
+def test_settlement_skips_bets_refunded_meanwhile(app, client, user_id, rounds):
+    before = balance(client)
+    with app.app_context():
+        rounds.bet(user_id, 'player', 1000)
+    players = dict(rounds.round['players'])
+    players[user_id]['cashout'] = 2.0
+    
+    # The round is refunded (it failed) before its settlement commits
+    assert rounds.refund_open_bets(rounds.round['id']) == 1
+    rounds._settle(rounds.round['id'], 3.0, players)
+    assert balance(client) == before
+    assert open_bets(app) == 0
+
+def test_settlement_pays_open_bets_once(app, client, user_id, rounds):
+    before = balance(client)
+    with app.app_context():
+        rounds.bet(user_id, 'player', 1000)
+    players = dict(rounds.round['players'])
+    players[user_id]['cashout'] = 2.0
+    
+    rounds._settle(rounds.round['id'], 3.0, players)
+    assert balance(client) == before + 10
+    assert rounds.refund_open_bets(rounds.round['id']) == 0
+    assert balance(client) == before + 10
+
+def test_bet_closed_by_a_failed_round_is_refunded_once(app, client, user_id, rounds, monkeypatch):
+    before = balance(client)
+    place_bet = crash_rounds.place_bet
+    def place_bet_then_fail(*args):
+        # The round fails (refunding its open bets) while the stake is taken
+        balance = place_bet(*args)
+        rounds._abandon_round()
+        return balance
+    monkeypatch.setattr(crash_rounds, 'place_bet', place_bet_then_fail)
+    
+    with app.app_context(), pytest.raises(ValueError, match='Betting is closed'):
+        rounds.bet(user_id, 'player', 1000)
+    assert balance(client) == before
+    assert open_bets(app) == 0
+
+def test_live_routes_need_streaming(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'STREAMING', False)
+    assert client.post('/api/crash/live/bet', json={'bet': 1}).status_code == 404
+    assert client.post('/api/crash/live/cashout').status_code == 404
+    assert client.get('/api/crash/live/stream').status_code == 404
@@ -0,0 +1,20 @@
+import fair
+
+def verify(client, game, count=1, args=()):
+    return client.post('/api/fair/verify', json={
+        'game': game, 'serverSeed': 'server', 'clientSeed': 'client', 'nonce': 0, 'count': count, 'args': list(args)
+    })
+
+def test_verify_needs_a_login(app):
+    assert verify(app.test_client(), 'dice', args=[50, True]).status_code == 401
+
+def test_blackjack_verification_is_capped(client):
+    assert verify(client, 'blackjack', count=fair.MAX_VERIFY_SHOES).status_code == 200
+    assert verify(client, 'blackjack', count=fair.MAX_VERIFY_SHOES + 1).status_code == 400
+    assert verify(client, 'blackjack', args=[1000]).status_code == 400
+    assert verify(client, 'blackjack', args=[6]).status_code == 200
+
+def test_mines_verification_rejects_impossible_boards(client):
+    for num_mines in (0, 25, -1, 10 ** 6, None):
+        assert verify(client, 'mines', args=[num_mines]).status_code == 400
+    assert len(verify(client, 'mines', args=[24]).json['outcomes']['mines'][0]) == 24
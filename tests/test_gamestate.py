@@ -0,0 +1,78 @@
+import pytest
+from conftest import casino, balance
+from gamestate import GameStateStore, MemoryStore, DatabaseStore
+from models import Transaction
+
+GAME = {'bet': 10000, 'mines': [0, 1, 2], 'revealed': [], 'num_mines': 3}
+
+@pytest.mark.parametrize('backend', [MemoryStore, DatabaseStore])
+def test_update_after_take_is_refused(app, user_id, backend):
+    store = GameStateStore(backend())
+    with app.app_context():
+        store.put(user_id, 'mines', GAME)
+        
+        read = store.get(user_id, 'mines')
+        assert store.take(user_id, 'mines') is not None
+        read['revealed'].append(5)
+        assert not store.update(user_id, 'mines', read)
+        assert store.get(user_id, 'mines') is None
+        
+        # A new game in the same slot is not the state read before either
+        store.put(user_id, 'mines', GAME)
+        assert not store.update(user_id, 'mines', read)
+        assert not store.delete(user_id, 'mines', read)
+        assert store.get(user_id, 'mines')['revealed'] == []
+        store.delete(user_id, 'mines')
+
+@pytest.mark.parametrize('backend', [MemoryStore, DatabaseStore])
+def test_add_refuses_an_occupied_slot(app, user_id, backend):
+    store = GameStateStore(backend())
+    with app.app_context():
+        assert store.add(user_id, 'mines', GAME)
+        assert not store.add(user_id, 'mines', dict(GAME, revealed=[4]))
+        assert store.get(user_id, 'mines')['revealed'] == []
+        assert store.take(user_id, 'mines') is not None
+        assert store.add(user_id, 'mines', GAME)
+        store.delete(user_id, 'mines')
+
+@pytest.mark.parametrize('game, start', [
+    ('mines', {'action': 'start', 'bet': 100, 'mines': 3}),
+    ('pump', {'action': 'start', 'bet': 100})
+])
+def test_second_start_keeps_the_open_game_and_its_stake(client, game, start):
+    assert client.post(f'/api/play/{game}', json=start).status_code == 200
+    before = balance(client)
+    response = client.post(f'/api/play/{game}', json=start)
+    assert response.status_code == 400
+    assert response.json['error'] == 'Finish your current game first'
+    assert balance(client) == before
+    assert client.post(f'/api/play/{game}', json={'action': 'cashout'}).status_code == 200
+
+def mines_transactions(app, user_id):
+    with app.app_context():
+        return Transaction.query.filter_by(user_id=user_id, game='mines').count()
+
+@pytest.mark.parametrize('hit', [False, True])
+def test_cashout_during_reveal_settles_once(app, client, user_id, monkeypatch, hit):
+    assert client.post('/api/play/mines', json={'action': 'start', 'bet': 100, 'mines': 3}).status_code == 200
+    with app.app_context():
+        game = casino.game_states.get(user_id, 'mines')
+    position = next(p for p in range(25) if (p in game['mines']) == hit)
+    
+    # A cashout lands between the reveal's read of the game and its write
+    reveal = casino.mines.reveal
+    cashouts = []
+    def reveal_after_cashout(game, position):
+        cashouts.append(client.post('/api/play/mines', json={'action': 'cashout'}))
+        return reveal(game, position)
+    monkeypatch.setattr(casino.mines, 'reveal', reveal_after_cashout)
+    
+    response = client.post('/api/play/mines', json={'action': 'reveal', 'position': position})
+    monkeypatch.setattr(casino.mines, 'reveal', reveal)
+    
+    assert cashouts[0].status_code == 200
+    assert response.status_code == 400
+    after_cashout = cashouts[0].json['balance']
+    assert client.post('/api/play/mines', json={'action': 'cashout'}).status_code == 400
+    assert balance(client) == after_cashout
+    assert mines_transactions(app, user_id) == 1
@@ -0,0 +1,17 @@
+from conftest import balance
+from games import mines
+
+def test_every_cashout_returns_the_house_edge(app):
+    for num_mines in range(1, mines.GRID_SIZE):
+        chance = 1.0
+        assert mines.multiplier(num_mines, 0) == 1.0
+        for gems in range(1, mines.GRID_SIZE - num_mines + 1):
+            chance *= (mines.GRID_SIZE - num_mines - gems + 1) / (mines.GRID_SIZE - gems + 1)
+            assert abs(mines.multiplier(num_mines, gems) * chance - mines.HOUSE_EDGE) <= 0.0051 * chance
+
+def test_cashout_before_any_reveal_gives_the_bet_back(client):
+    before = balance(client)
+    assert client.post('/api/play/mines', json={'action': 'start', 'bet': 10, 'mines': 3}).status_code == 200
+    response = client.post('/api/play/mines', json={'action': 'cashout'})
+    assert response.status_code == 200 and response.json['multiplier'] == 1.0
+    assert balance(client) == before
@@ -0,0 +1,40 @@
+import math
+import time
+from conftest import casino, balance
+from games import pump
+
+def start(app, client, user_id, pop_point, multiplier):
+    """Start a game, then set its pop point and how far it has inflated."""
+    response = client.post('/api/play/pump', json={'action': 'start', 'bet': 10})
+    assert response.status_code == 200
+    # The pop point stays on the server
+    assert 'maxMultiplier' not in response.json and 'popPoint' not in response.json
+    
+    with app.app_context():
+        game = casino.game_states.get(user_id, 'pump')
+        game['max_multiplier'] = pop_point
+        game['started'] = time.time() - math.log(multiplier) / pump.GROWTH
+        casino.game_states.put(user_id, 'pump', game)
+
+def test_cashout_is_priced_on_the_server_clock(app, client, user_id):
+    start(app, client, user_id, pop_point=2.0, multiplier=1.5)
+    
+    # The multiplier the client names is ignored
+    response = client.post('/api/play/pump', json={'action': 'cashout', 'multiplier': 1.99})
+    assert 1.49 <= response.json['multiplier'] < 1.6
+    assert not response.json['popped']
+
+def test_popped_balloon_settles_once_and_pays_nothing(app, client, user_id):
+    start(app, client, user_id, pop_point=2.0, multiplier=2.5)
+    before = balance(client)
+    
+    status = client.post('/api/play/pump', json={'action': 'status'}).json
+    assert status['popped'] and status['popPoint'] == 2.0
+    assert client.post('/api/play/pump', json={'action': 'cashout'}).status_code == 400
+    assert balance(client) == before
+
+def test_cashout_after_the_pop_pays_nothing(app, client, user_id):
+    start(app, client, user_id, pop_point=1.2, multiplier=3.0)
+    
+    response = client.post('/api/play/pump', json={'action': 'cashout', 'multiplier': 1.1})
+    assert response.json['popped'] and response.json['win'] == 0
@@ -0,0 +1,242 @@
+# Wallet / ledger
+#
+# Balance changes are applied with a single conditional UPDATE on the user row
+# (balance = balance - debit + credit WHERE balance >= debit) instead of loading
+# the User, mutating it in Python and flushing it back. The database serialises
+# concurrent updates on the row, so two workers can never both spend the same
+# balance, and the Transaction row (plus the user's stats) is written in the
+# same commit. Amounts are integer cents (see money.py). After the commit the
+# new balance is written through to the auth user cache and published, with
+# the logged rounds, on the user's event stream.
+# Optionally the Transaction rows are written behind in bulk (ledger.py).
+from sqlalchemy import update, select, insert, bindparam, values, column, literal, true, String, Float, BigInteger
+from datetime import datetime
+from models import db, User, Transaction
+from stats import record_stats, record_stats_many, stats_upsert_from
+from auth import user_cache
+from events import bus
+from metrics import span
+from money import from_units
+
+# ledger.TransactionLog when Transaction rows are written behind (see ledger.py)
+_write_behind = None
+
+
+def set_write_behind(log):
+    global _write_behind
+    _write_behind = log
+
+
+def _apply(user_id, debit, credit, records=(), required=None, rows=()):
+    # A negative debit or credit would move money the other way past the
+    # balance guard
+    if debit < 0 or credit < 0:
+        raise ValueError(f'negative amount (debit {debit}, credit {credit})')
+    if required is None:
+        required = debit
+    
+    # Committed with the balance change, or rolled back with it
+    for row in rows:
+        db.session.add(row)
+    
+    stmt = update(User).where(User.id == user_id)
+    if required > 0:
+        stmt = stmt.where(User.balance >= required)
+    stmt = stmt.values(balance=User.balance - debit + credit)\
+        .execution_options(synchronize_session=False)
+    
+    now = datetime.utcnow()
+    logged_records = () if _write_behind else records
+    single_statement = db.engine.dialect.name == 'postgresql'
+    if single_statement:
+        row = db.session.execute(_settlement_query(stmt, user_id, logged_records, now)).first()
+    elif db.engine.dialect.update_returning:
+        row = db.session.execute(stmt.returning(User.balance)).first()
+    else:
+        result = db.session.execute(stmt)
+        row = None
+        if result.rowcount:
+            row = db.session.execute(select(User.balance).where(User.id == user_id)).first()
+    
+    if row is None:
+        db.session.rollback()
+        return None
+    
+    if logged_records and not single_statement:
+        db.session.execute(insert(Transaction), [
+            dict(record, user_id=user_id, created_at=now) for record in logged_records
+        ])
+        record_stats(user_id, logged_records)
+    
+    with span('commit'):
+        db.session.commit()
+    if records and _write_behind:
+        _write_behind.append(user_id, records, now)
+    
+    balance = int(row[0])
+    _published(user_id, balance, credit - debit, records, now)
+    return balance
+
+
+def _settlement_query(stmt, user_id, records, now):
+    # Postgres: the balance UPDATE, the Transaction inserts and the stats
+    # upsert as one statement (data-modifying CTEs), one round trip per bet.
+    # The inserts select from the UPDATE's RETURNING, so nothing is logged
+    # when the balance guard rejects the bet.
+    updated = stmt.returning(User.balance).cte('updated')
+    query = select(updated.c.balance)
+    if not records:
+        return query
+    
+    rounds = values(
+        column('game', String),
+        column('bet_amount', BigInteger),
+        column('win_amount', BigInteger),
+        column('multiplier', Float),
+        name='rounds'
+    ).data([
+        (record['game'], record['bet_amount'], record['win_amount'], record['multiplier'])
+        for record in records
+    ])
+    logged = insert(Transaction).from_select(
+        ['user_id', 'game', 'bet_amount', 'win_amount', 'multiplier', 'created_at'],
+        select(literal(user_id), rounds.c.game, rounds.c.bet_amount, rounds.c.win_amount, rounds.c.multiplier, literal(now))
+        .select_from(updated).join(rounds, true())
+    ).cte('logged')
+    counted = stats_upsert_from(user_id, records, updated).cte('counted')
+    return query.add_cte(logged, counted)
+
+
+def _published(user_id, balance, delta, records, now):
+    user_cache.set_balance(user_id, balance)
+    
+    bus.publish(user_id, 'balance', {'balance': from_units(balance), 'delta': from_units(delta)})
+    if records:
+        bus.publish(user_id, 'transactions', [{
+            'game': record['game'],
+            'bet': from_units(record['bet_amount']),
+            'win': from_units(record['win_amount']),
+            'multiplier': record['multiplier'],
+            'profit': from_units(record['win_amount'] - record['bet_amount']),
+            'time': now.isoformat()
+        } for record in records])
+
+
+def settle_bet(user_id, game, bet_amount, win_amount, multiplier):
+    """Debit the bet, credit the win and log the round in one commit.
+    
+    Returns the new balance, or None if the balance does not cover the bet.
+    """
+    return _apply(user_id, bet_amount, win_amount, [{
+        'game': game,
+        'bet_amount': bet_amount,
+        'win_amount': win_amount,
+        'multiplier': multiplier
+    }])
+
+
+def place_bet(user_id, bet_amount, rows=()):
+    """Take the stake for a multi-step game (mines, pump, blackjack, live
+    crash). `rows` (a live crash open bet) are inserted in the same commit.
+    
+    Returns the new balance, or None if the balance does not cover the bet.
+    """
+    return _apply(user_id, bet_amount, 0, rows=rows)
+
+
+def refund_bet(user_id, bet_amount):
+    """Give back a stake taken by place_bet for a bet that was not placed."""
+    return _apply(user_id, 0, bet_amount)
+
+
+def settle_open_bet(user_id, game, bet_amount, win_amount, multiplier):
+    """Credit the win of a game whose stake was taken by place_bet and log it."""
+    return _apply(user_id, 0, win_amount, [{
+        'game': game,
+        'bet_amount': bet_amount,
+        'win_amount': win_amount,
+        'multiplier': multiplier
+    }])
+
+
+def settle_batch(user_id, game, rounds):
+    """Settle a sequence of (bet, win, multiplier) rounds in one commit.
+    
+    The balance is updated once with the net result and the Transaction rows
+    are bulk inserted. The guard is the deepest point the balance reaches while
+    playing the rounds in order, so a batch is accepted exactly when every bet
+    in it could have been placed one by one. Returns the new balance, or None.
+    """
+    total_bet = 0
+    total_win = 0
+    required = 0
+    records = []
+    for bet_amount, win_amount, multiplier in rounds:
+        if bet_amount <= 0 or win_amount < 0:
+            raise ValueError(f'invalid round (bet {bet_amount}, win {win_amount})')
+        required = max(required, total_bet + bet_amount - total_win)
+        total_bet += bet_amount
+        total_win += win_amount
+        records.append({
+            'game': game,
+            'bet_amount': bet_amount,
+            'win_amount': win_amount,
+            'multiplier': multiplier
+        })
+    
+    return _apply(user_id, total_bet, total_win, records, required)
+
+
+def settle_round(game, bets):
+    """Settle every bet of a shared round (live crash) in one commit.
+    
+    `bets` is a list of (user_id, bet, win, multiplier), one per user, whose
+    stakes were taken by place_bet. Winners are credited with one executemany
+    UPDATE and all the rounds are logged with one bulk insert. Returns the new
+    balance of each user.
+    """
+    if not bets:
+        return {}
+    
+    now = datetime.utcnow()
+    records = {
+        user_id: [{
+            'game': game,
+            'bet_amount': bet_amount,
+            'win_amount': win_amount,
+            'multiplier': multiplier
+        }]
+        for user_id, bet_amount, win_amount, multiplier in bets
+    }
+    
+    users = User.__table__
+    credits = [{'uid': user_id, 'credit': win_amount} for user_id, _, win_amount, _ in bets if win_amount > 0]
+    if credits:
+        db.session.execute(
+            update(users)
+            .where(users.c.id == bindparam('uid'))
+            .values(balance=users.c.balance + bindparam('credit')),
+            credits
+        )
+    
+    if not _write_behind:
+        db.session.execute(insert(Transaction), [
+            dict(record, user_id=user_id, created_at=now)
+            for user_id, user_records in records.items()
+            for record in user_records
+        ])
+        record_stats_many(records)
+    with span('commit'):
+        db.session.commit()
+    
+    if _write_behind:
+        for user_id, user_records in records.items():
+            _write_behind.append(user_id, user_records, now)
+    
+    balances = dict(db.session.execute(
+        select(User.id, User.balance).where(User.id.in_(list(records)))
+    ).all())
+    for user_id, _, win_amount, _ in bets:
+        balances[user_id] = int(balances[user_id])
+        _published(user_id, balances[user_id], win_amount, records[user_id], now)
+    return balances